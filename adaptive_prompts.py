@@ -0,0 +1,142 @@
+# adaptive_prompts.py
+from collections import Counter
+
+import cv2
+import numpy as np
+import torch
+from segment_anything import SamAutomaticMaskGenerator
+from segment_anything.utils.amg import MaskData, batch_iterator, uncrop_boxes_xyxy, uncrop_points
+from torchvision.ops.boxes import batched_nms
+
+import profiling
+from compact_mask import CompactMask
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# İlk geçişte tam ızgaranın her ADAPTIVE_COARSE_STRIDE satır/sütunundan biri istenir (2: noktaların 1/4'ü)
+ADAPTIVE_COARSE_STRIDE = 2
+
+# İlk geçişte kapsama haritasına eklenecek maskelerin en düşük tahmini IoU'su (yüksek güvenli maskeler)
+ADAPTIVE_COVER_IOU = 0.92
+
+# Izgara hücresindeki kenar pikseli oranı bu değeri aşarsa nokta kapsanmış olsa da istenir
+# (nesne sınırları, duvardaki küçük nesneler)
+ADAPTIVE_EDGE_DENSITY = 0.15
+
+# Kenar yoğunluğunun hesaplandığı görüntünün uzun kenarı ve Canny eşikleri
+EDGE_MAX_SIDE = 256
+CANNY_THRESHOLDS = (50, 150)
+
+
+def coarse_selection(n, stride=ADAPTIVE_COARSE_STRIDE):
+    """n×n ızgaranın (satır öncelikli) ilk geçişte istenecek noktaları için boolean seçim."""
+    rows, cols = np.divmod(np.arange(n * n), n)
+    offset = stride // 2
+    return (rows % stride == offset) & (cols % stride == offset)
+
+
+def edge_density_at(image, points, n):
+    """
+    Noktaların (piksel koordinatı) çevresindeki ızgara hücresinde Canny kenar pikseli oranı.
+    Kenar haritası uzun kenarı EDGE_MAX_SIDE olan küçültülmüş gri görüntüde hesaplanır.
+    """
+    H, W = image.shape[:2]
+    scale = min(EDGE_MAX_SIDE / max(H, W), 1.0)
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(int(W * scale), 1), max(int(H * scale), 1)), interpolation=cv2.INTER_AREA)
+    edges = (cv2.Canny(gray, *CANNY_THRESHOLDS) > 0).astype(np.float32)
+    h, w = edges.shape
+    density = cv2.blur(edges, (max(int(round(w / n)), 1), max(int(round(h / n)), 1)))
+    xs = np.clip((points[:, 0] * scale).astype(int), 0, w - 1)
+    ys = np.clip((points[:, 1] * scale).astype(int), 0, h - 1)
+    return density[ys, xs]
+
+
+# --------------------------------------------------------------------------
+# İKİ GEÇİŞLİ MASKE ÜRETECİ
+# --------------------------------------------------------------------------
+
+class AdaptiveMaskGenerator(SamAutomaticMaskGenerator):
+    """
+    SamAutomaticMaskGenerator'ın iki geçişli nokta istemli sürümü. adaptive_prompts=True iken önce
+    ızgaranın seyrek bir alt kümesi istenir; ardından tam ızgaranın kalan noktalarından yalnızca
+    yüksek güvenli bir maskeyle kapsanmayan ya da kenar yoğunluğu yüksek olanlar istenir. İstenen
+    noktalar her zaman tam ızgaranın alt kümesidir; sonraki adımlar (NMS, küçük bölge temizliği)
+    değişmez. adaptive_prompts=False iken üst sınıfla aynı çalışır.
+    """
+
+    def __init__(self, model, adaptive_prompts=False, coarse_stride=ADAPTIVE_COARSE_STRIDE,
+                 cover_iou_thresh=ADAPTIVE_COVER_IOU, edge_density_thresh=ADAPTIVE_EDGE_DENSITY, **kwargs):
+        super().__init__(model, **kwargs)
+        self.adaptive_prompts = adaptive_prompts
+        self.coarse_stride = coarse_stride
+        self.cover_iou_thresh = cover_iou_thresh
+        self.edge_density_thresh = edge_density_thresh
+        # Toplam istenen / tam ızgarada istenecek nokta sayıları
+        self.prompt_stats = Counter()
+
+    def _prompt_points(self, points, cropped_im_size, crop_box, orig_size):
+        data = MaskData()
+        for (batch,) in batch_iterator(self.points_per_batch, points):
+            data.cat(self._process_batch(batch, cropped_im_size, crop_box, orig_size))
+        return data
+
+    def _coverage_at(self, data, points, crop_box, orig_size):
+        """Yüksek güvenli maskelerin birleşiminin noktalardaki değeri (nokta kapsandıysa True)."""
+        coverage = np.zeros(orig_size, dtype=bool)
+        for rle, iou in zip(data["rles"], data["iou_preds"].tolist()):
+            if iou >= self.cover_iou_thresh:
+                CompactMask.from_rle(rle).paint(coverage)
+        xs = np.clip(points[:, 0].astype(int) + crop_box[0], 0, orig_size[1] - 1)
+        ys = np.clip(points[:, 1].astype(int) + crop_box[1], 0, orig_size[0] - 1)
+        return coverage[ys, xs]
+
+    def _process_crop(self, image, crop_box, crop_layer_idx, orig_size):
+        grid = self.point_grids[crop_layer_idx]
+        n = int(round(np.sqrt(len(grid))))
+        if not self.adaptive_prompts or n * n != len(grid) or n < 2 * self.coarse_stride:
+            self.prompt_stats['prompted'] += len(grid)
+            self.prompt_stats['dense'] += len(grid)
+            return super()._process_crop(image, crop_box, crop_layer_idx, orig_size)
+
+        x0, y0, x1, y1 = crop_box
+        cropped_im = image[y0:y1, x0:x1, :]
+        cropped_im_size = cropped_im.shape[:2]
+        self.predictor.set_image(cropped_im)
+        points = grid * np.array(cropped_im_size)[None, ::-1]
+
+        # 1. geçiş: seyrek ızgara
+        coarse = coarse_selection(n, self.coarse_stride)
+        with profiling.stage("sam_coarse_pass"):
+            data = self._prompt_points(points[coarse], cropped_im_size, crop_box, orig_size)
+
+        # 2. geçiş: kapsanmayan ya da kenar yoğun noktalar
+        with profiling.stage("sam_refine_pass"):
+            rest = np.flatnonzero(~coarse)
+            uncovered = ~self._coverage_at(data, points[rest], crop_box, orig_size)
+            edgy = edge_density_at(cropped_im, points[rest], n) > self.edge_density_thresh
+            refine = rest[uncovered | edgy]
+            if refine.size:
+                data.cat(self._prompt_points(points[refine], cropped_im_size, crop_box, orig_size))
+        self.predictor.reset_image()
+
+        prompted = int(coarse.sum()) + refine.size
+        self.prompt_stats['prompted'] += prompted
+        self.prompt_stats['dense'] += len(grid)
+        profiling.count("sam_prompts_saved", len(grid) - prompted)
+
+        # Kalan adımlar SamAutomaticMaskGenerator._process_crop ile aynıdır
+        keep_by_nms = batched_nms(
+            data["boxes"].float(),
+            data["iou_preds"],
+            torch.zeros(len(data["boxes"])),
+            iou_threshold=self.box_nms_thresh,
+        )
+        data.filter(keep_by_nms)
+        data["boxes"] = uncrop_boxes_xyxy(data["boxes"], crop_box)
+        data["points"] = uncrop_points(data["points"], crop_box)
+        data["crop_boxes"] = torch.tensor([crop_box for _ in range(len(data["rles"]))])
+        return data
@@ -1,7 +1,16 @@
 # app.py
-from model_loader import load_sam_model, get_segmentation_masks
+from model_loader import (get_sam_model, get_segmentation_masks, set_result_store, set_sam_profile,
+                          SAM_GENERATOR_SETTINGS, SAM_PROFILES, SAM_PROFILE)
+from classifier import set_classifier_profile, CLASSIFIER_PROFILES, CLASSIFIER_PROFILE
+from mask_dedup import set_dedup_policy, DEDUP_POLICIES, DEDUP_POLICY, DEDUP_MAX_MASKS
+from result_store import ResultStore
 from utils import read_image, display_results
-from generator import load_generator_pipeline, generate_redesign_image
+from generator import generate_redesign_image, INPAINTING_PROFILES
+from batch_processing import run_batch, DEFAULT_QUEUE_SIZE, CLASSIFICATION_CACHE_FILENAME
+import profiling
+import argparse
+import glob
+import json
 import os
 
 
@@ -57,19 +66,23 @@ def initial_analysis_and_suggestion(classified_objects):
     print("--------------------------------------\n")
 
 
-def redesign_and_search_items(classified_objects, original_image_np):
-    """Kullanıcının prompt'una göre yeniden tasarımı yapar ve eşya arama linklerini sunar."""
+def redesign_and_search_items(classified_objects, original_image_np, profile=None, steps=None):
+    """
+    Kullanıcının prompt'una göre yeniden tasarımı yapar ve eşya arama linklerini sunar.
+    profile/steps generate_redesign_image'a iletilir (inpainting profili ve adım sayısı).
+    """
     print("\n--- Yeniden Tasarım ve Eşya Arama ---")
 
     # 1. Kullanıcıdan prompt alımı
     user_prompt = input(
         "Lütfen yeni tasarım için promptunuzu girin (Örn: modern minimalist koltuklar, beyaz duvarlar): ")
 
-    # 2. Generative AI ile yeniden tasarım
+    # 2. Generative AI ile yeniden tasarım (pipeline ilk çağrıda yüklenir, ağırlık indirilebilir)
     print("\nAdım 2: Yeni Tasarım Görseli Oluşturuluyor (Stable Diffusion)...")
 
     # generate_redesign_image'a temizlenmiş nesne listesi ve orijinal görüntü gönderiliyor
-    redesigned_image_pil = generate_redesign_image(original_image_np, classified_objects, user_prompt)
+    redesigned_image_pil = generate_redesign_image(original_image_np, classified_objects, user_prompt,
+                                                   profile=profile, steps=steps)
 
     if redesigned_image_pil:
         redesigned_image_pil.show()
@@ -89,39 +102,187 @@ def redesign_and_search_items(classified_objects, original_image_np):
 
 # --------------------------------------------------------------------------
 
-def main():
-    """Uygulamanın ana akışını çalıştırır."""
-    test_image_path = "test_oda_fotografi2.jpg"
+def parse_args(argv=None):
+    """Komut satırı argümanlarını çözümler."""
+    parser = argparse.ArgumentParser(description="SAM + ViT oda nesnesi segmentasyonu ve sınıflandırması")
+    parser.add_argument("--image", default="test_oda_fotografi2.jpg",
+                        help="Etkileşimli mod için giriş görseli")
+    parser.add_argument("--batch", metavar="KLASÖR_VEYA_GLOB",
+                        help="Başsız (headless) toplu mod: klasör veya glob deseni (ör. 'ilanlar/**/*.jpg')")
+    parser.add_argument("--video", metavar="KAYNAK",
+                        help="Video modu: video dosyası, kamera indeksi ya da kare klasörü/glob deseni")
+    parser.add_argument("--video-stride", type=int, default=1,
+                        help="Video modunda her N karede birini oku (aradakiler çözülmez)")
+    parser.add_argument("--max-frames", type=int, help="Video modunda okunacak en fazla kare")
+    parser.add_argument("--output", default="batch_output",
+                        help="Toplu ve video modunda JSON sonuçlarının yazılacağı klasör")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Aşamalar arasındaki kuyruk kapasitesi")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Sonucu zaten bulunan görüntüleri de yeniden işle")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Toplu modda süreç sayısı (>1 ise ağırlıkları paylaşan fork edilmiş süreç havuzu)")
+    parser.add_argument("--images-per-worker", type=int, default=1,
+                        help="Süreç havuzunda bir sürece tek seferde verilecek görüntü sayısı")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Süreç başına torch intra-op thread sayısı (varsayılan: çekirdek / süreç)")
+    parser.add_argument("--classification-cache", metavar="DOSYA",
+                        help="Kırpıntı sınıflandırma önbelleği (varsayılan: <output>/"
+                             f"{CLASSIFICATION_CACHE_FILENAME})")
+    parser.add_argument("--no-classification-cache", action="store_true",
+                        help="Kalıcı kırpıntı önbelleğini kullanma")
+    parser.add_argument("--result-store", metavar="KLASÖR",
+                        help="Segmentasyon sonuçlarını bu klasörde sakla; aynı görüntü ve ayarlar için "
+                             "SAM/ViT yeniden çalıştırılmaz")
+    parser.add_argument("--sam-profile", choices=list(SAM_PROFILES), default=SAM_PROFILE,
+                        help="SAM omurgası / nicemlenmiş görüntü kodlayıcı (model_loader.SAM_PROFILES)")
+    parser.add_argument("--vit-profile", choices=list(CLASSIFIER_PROFILES), default=CLASSIFIER_PROFILE,
+                        help="ViT sınıflandırıcı profili (classifier.CLASSIFIER_PROFILES)")
+    parser.add_argument("--dedup-policy", choices=list(DEDUP_POLICIES), default=DEDUP_POLICY,
+                        help="Sınıflandırma öncesi yinelenen / iç içe maske tekilleştirmesi (mask_dedup); "
+                             "'suppress' ve 'merge' daha az nesne döndürür")
+    parser.add_argument("--max-masks", type=int, default=DEDUP_MAX_MASKS,
+                        help="Görüntü başına sınıflandırılacak en fazla maske (varsayılan: sınırsız)")
+    parser.add_argument("--adaptive-prompts", action="store_true",
+                        help="SAM'da iki geçişli nokta istemi: seyrek ızgara + yalnızca kapsanmayan / kenar "
+                             "yoğun bölgeler (daha az maske çözücü çağrısı)")
+    parser.add_argument("--render", metavar="DOSYA",
+                        help="Etkileşimli modda sonuç görselini pencere yerine bu dosyaya yaz (png/jpg/webp)")
+    parser.add_argument("--render-format", choices=["png", "jpg", "webp"],
+                        help="Toplu modda her JSON sonucunun yanına bu biçimde sonuç görseli yaz")
+    parser.add_argument("--inpainting-profile", choices=list(INPAINTING_PROFILES),
+                        help="Yeniden tasarım profili (fast: daha az adım, hızlı zamanlayıcı, yalnızca maske "
+                             "bölgesi; varsayılan: generator.INPAINTING_PROFILE)")
+    parser.add_argument("--steps", type=int,
+                        help="Yeniden tasarımdaki difüzyon adım sayısı (profilin değerini geçersiz kılar)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Aşama bazında süre/bellek ölçümünü aç ve sonda yüzdelik özetini yazdır")
+    parser.add_argument("--trace", metavar="DOSYA",
+                        help="Görüntü başına profil izini ve özeti bu JSON dosyasına yaz (--profile içerir)")
+    parser.add_argument("--profile-stage", metavar="AŞAMA",
+                        help="Tek bir aşamaya profilleyici bağla (ör. sam_generate, vit_forward, diffusion)")
+    parser.add_argument("--profiler", choices=profiling.PROFILER_KINDS, default="cprofile",
+                        help="--profile-stage için profilleyici türü")
+    parser.add_argument("--profile-output", metavar="DOSYA",
+                        help="Profilleyici çıktı dosyası (varsayılan: profile_<aşama>.prof/.json)")
+    parser.add_argument("--profile-calls", type=int, default=1,
+                        help="Aşamanın profillenecek çağrı sayısı")
+    return parser.parse_args(argv)
+
+
+def setup_profiling(args):
+    """Komut satırı seçeneklerine göre ölçümü ve profilleyici kancasını hazırlar."""
+    if args.profile or args.trace:
+        profiling.enable()
+    if args.profile_stage:
+        if args.batch and args.workers > 1:
+            print("UYARI: Profilleyici çıktısı çocuk süreçlerde kalır; --profile-stage için --workers 1 kullanın.")
+        profiling.attach_profiler(args.profile_stage, kind=args.profiler, output_path=args.profile_output,
+                                  max_calls=args.profile_calls)
+
+
+def finish_profiling(args):
+    """Profil sonuçlarını yazdırır ve istenirse iz dosyasını yazar."""
+    if not profiling.is_enabled():
+        return
+    profiling.detach_profilers()
+    profiling.print_summary()
+    if args.trace:
+        profiling.write_trace(args.trace)
 
-    try:
-        input_image = read_image(test_image_path)
-        print(f"Görüntü okundu: {test_image_path}")
 
-        # Generative AI Pipeline'ını yükle (Ağırlık indirilecektir)
-        load_generator_pipeline()
+def run_video(args):
+    """Video modunu çalıştırır; izleri <output>/<kaynak adı>_tracks.json dosyasına yazar."""
+    from video_segmentation import segment_video
 
-        sam_model = load_sam_model()
+    if args.result_store:
+        print("UYARI: Video modunda sonuç deposu kullanılmaz.")
+    source = int(args.video) if args.video.isdigit() else args.video
+    try:
+        sam_model = get_sam_model()
         if sam_model is None:
             return
+        record = segment_video(source, sam_model, stride=args.video_stride, max_frames=args.max_frames)
+        if isinstance(source, int):
+            name = f"kamera{source}"
+        else:
+            # Glob desenlerinde dosya adı yerine klasör adı kullanılır
+            path = os.path.normpath(source)
+            name = os.path.splitext(os.path.basename(os.path.dirname(path) if glob.has_magic(path) else path))[0]
+        path = os.path.join(args.output, f"{name or 'video'}_tracks.json")
+        os.makedirs(args.output, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        print(f"İzler yazıldı: {path}")
+    except FileNotFoundError as e:
+        print(f"\nHATA: {e}")
+    finally:
+        finish_profiling(args)
 
-        classified_objects = get_segmentation_masks(input_image, sam_model)
 
-        final_clean_objects = get_clean_labels(classified_objects)
+def main(argv=None):
+    """Uygulamanın ana akışını çalıştırır."""
+    args = parse_args(argv)
+    setup_profiling(args)
+    set_sam_profile(args.sam_profile)
+    set_classifier_profile(args.vit_profile)
+    set_dedup_policy(args.dedup_policy, args.max_masks)
+    if args.adaptive_prompts:
+        SAM_GENERATOR_SETTINGS['adaptive_prompts'] = True
+
+    if args.video:
+        run_video(args)
+        return
 
-        # Görselleştirme (Sınıflandırılamadı etiketlerinin de görünmesi için tüm listeyi kullanıyoruz)
-        display_results(input_image, classified_objects, "Tespit Edilen Nesneler ve Etiketler (Temizlenmiş)")
+    if args.batch:
+        cache_path = None
+        if not args.no_classification_cache:
+            cache_path = args.classification_cache or os.path.join(args.output, CLASSIFICATION_CACHE_FILENAME)
+        try:
+            run_batch(args.batch, args.output, queue_size=args.queue_size, skip_existing=not args.no_resume,
+                      workers=args.workers, images_per_worker=args.images_per_worker,
+                      threads_per_worker=args.threads_per_worker, classification_cache_path=cache_path,
+                      result_store_dir=args.result_store, render_format=args.render_format)
+        finally:
+            finish_profiling(args)
+        return
 
-        initial_analysis_and_suggestion(final_clean_objects)
+    test_image_path = args.image
+    if args.result_store:
+        set_result_store(ResultStore(args.result_store))
 
-        # Orijinal görüntüyü yeniden tasarım fonksiyonuna gönderiyoruz
-        redesign_and_search_items(final_clean_objects, input_image)
+    with profiling.image_scope(test_image_path):
+        try:
+            input_image = read_image(test_image_path)
+            print(f"Görüntü okundu: {test_image_path}")
 
-    except FileNotFoundError as e:
-        print(f"\nHATA: {e}")
-        print(
-            "Lütfen 'test_oda_fotografi.jpg' dosyasını koyduğunuzdan ve model ağırlıklarının bulunduğundan emin olun.")
-    except Exception as e:
-        print(f"Beklenmedik bir hata oluştu: {e}")
+            # Generative AI Pipeline'ı burada yüklenmez; yalnızca yeniden tasarım istendiğinde yüklenir
+            sam_model = get_sam_model()
+            if sam_model is None:
+                return
+
+            classified_objects = get_segmentation_masks(input_image, sam_model)
+
+            final_clean_objects = get_clean_labels(classified_objects)
+
+            # Görselleştirme (Sınıflandırılamadı etiketlerinin de görünmesi için tüm listeyi kullanıyoruz)
+            display_results(input_image, classified_objects, "Tespit Edilen Nesneler ve Etiketler (Temizlenmiş)",
+                            output_path=args.render)
+
+            initial_analysis_and_suggestion(final_clean_objects)
+
+            # Orijinal görüntüyü yeniden tasarım fonksiyonuna gönderiyoruz
+            redesign_and_search_items(final_clean_objects, input_image, profile=args.inpainting_profile,
+                                      steps=args.steps)
+
+        except FileNotFoundError as e:
+            print(f"\nHATA: {e}")
+            print(
+                "Lütfen 'test_oda_fotografi.jpg' dosyasını koyduğunuzdan ve model ağırlıklarının bulunduğundan emin olun.")
+        except Exception as e:
+            print(f"Beklenmedik bir hata oluştu: {e}")
+        finally:
+            finish_profiling(args)
 
 
 if __name__ == "__main__":
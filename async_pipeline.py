@@ -0,0 +1,253 @@
+# async_pipeline.py
+import asyncio
+import functools
+import itertools
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import profiling
+from model_loader import get_sam_model, generate_masks, classify_masks, load_stored_result, store_result
+from generator import generate_redesign_image, generate_redesign_variants, DEFAULT_SEED
+from utils import read_image, decode_image
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Görüntü çözme, sonuç deposu ve dosya yazma işlerini yürüten iş parçacığı sayısı
+ASYNC_IO_WORKERS = 4
+
+# Model başına ayrılmış iş parçacığı sayısı. SAM ve ViT ayrı havuzlarda çalıştığından bir isteğin
+# ViT aşaması başka bir isteğin SAM aşamasıyla örtüşebilir.
+MODEL_WORKERS = {'sam': 1, 'vit': 1, 'inpainting': 1}
+
+# Model başına çalışanlara ek olarak kuyrukta bekleyebilecek en fazla çağrı; dolduğunda yeni
+# çağrılar yer açılana kadar (olay döngüsünü bloklamadan) bekler
+MODEL_MAX_PENDING = 16
+
+# Çağrı başına varsayılan zaman aşımı (s); None: sınırsız
+DEFAULT_TIMEOUT = None
+
+
+# --------------------------------------------------------------------------
+# MODEL BAŞINA SINIRLI YÜRÜTÜCÜ
+# --------------------------------------------------------------------------
+
+class ModelExecutor:
+    """
+    Tek bir model için ayrılmış, kuyruğu sınırlı iş parçacığı havuzu. İptal edilen çağrı henüz
+    başlamadıysa kuyruktan düşer; çalışmaya başlamışsa tamamlanır ve sonucu atılır (kuyruk yeri
+    çağrı gerçekten bitince boşalır).
+    """
+
+    def __init__(self, name, workers=1, max_pending=MODEL_MAX_PENDING):
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-model")
+        self._slots = asyncio.Semaphore(workers + max_pending)
+        self.stats = Counter()
+        # Kuyruktaki ve çalışan (sonucu atılmış olanlar dahil) çağrı sayısı
+        self.inflight = 0
+
+    async def run(self, scope, fn, *args, **kwargs):
+        """fn(*args, **kwargs)'ı modelin havuzunda çalıştırır; aşamalar scope izine yazılır."""
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        try:
+            future = self._executor.submit(_scoped_call, scope, fn, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        self.inflight += 1
+        future.add_done_callback(lambda _: _call_soon(loop, self._finished))
+        self.stats['submitted'] += 1
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            self.stats['cancelled' if future.cancelled() else 'abandoned'] += 1
+            raise
+        self.stats['completed'] += 1
+        return result
+
+    def _finished(self):
+        self.inflight -= 1
+        self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _scoped_call(scope, fn, args, kwargs):
+    with profiling.image_scope(scope):
+        return fn(*args, **kwargs)
+
+
+def _call_soon(loop, callback):
+    # Olay döngüsü kapandıysa bekleyen kimse kalmamıştır
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass
+
+
+# --------------------------------------------------------------------------
+# ASENKRON CEPHE
+# --------------------------------------------------------------------------
+
+class AsyncPipeline:
+    """
+    Segmentasyon + sınıflandırma ve yeniden tasarım için asyncio cephesi. Görüntü çözme ve dosya
+    yazma G/Ç havuzunda, SAM / ViT / inpainting çağrıları modele ayrılmış ModelExecutor'larda
+    çalışır; olay döngüsü hiçbir aşamada bloklanmaz. Tek bir olay döngüsünde kullanılmalıdır.
+    """
+
+    def __init__(self, io_workers=ASYNC_IO_WORKERS, model_workers=None, max_pending=MODEL_MAX_PENDING,
+                 timeout=DEFAULT_TIMEOUT):
+        self._io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="async-io")
+        workers = dict(MODEL_WORKERS, **(model_workers or {}))
+        self.models = {name: ModelExecutor(name, count, max_pending) for name, count in workers.items()}
+        self.timeout = timeout
+        self.stats = Counter()
+        self._request_ids = itertools.count(1)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Havuzları kapatır; kuyrukta bekleyen çağrılar iptal edilir."""
+        self._io.shutdown(wait=False, cancel_futures=True)
+        for executor in self.models.values():
+            executor.shutdown()
+
+    async def _io_call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io, functools.partial(fn, *args, **kwargs))
+
+    async def _with_timeout(self, coro, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+        except asyncio.CancelledError:
+            self.stats['cancelled'] += 1
+            raise
+
+    async def load_image(self, source):
+        """Dosya yolu, kodlanmış veri (bytes, memoryview, mmap) ya da RGB dizi kabul eder; RGB dizi döndürür."""
+        if isinstance(source, np.ndarray):
+            return source
+        if isinstance(source, (str, os.PathLike)):
+            return await self._io_call(read_image, os.fspath(source))
+        return await self._io_call(decode_image, source)
+
+    async def _segment(self, scope, source, max_side, sam_overrides):
+        image = await self.load_image(source)
+        store_key, stored_objects = await self._io_call(load_stored_result, image, max_side=max_side,
+                                                        **sam_overrides)
+        if stored_objects is not None:
+            return image, stored_objects
+
+        # Model ilk çağrıda SAM havuzunda yüklenir
+        sam_model = await self.models['sam'].run(scope, get_sam_model)
+        if sam_model is None:
+            print("SAM modeli yüklenemedi. Segmentasyon iptal edildi.")
+            return image, None
+        results = await self.models['sam'].run(scope, generate_masks, image, sam_model, max_side=max_side,
+                                               **sam_overrides)
+        objects = await self.models['vit'].run(scope, classify_masks, image, results)
+        await self._io_call(store_result, store_key, image.shape, objects)
+        return image, objects
+
+    async def segment_and_classify(self, source, max_side=None, timeout=None, **sam_overrides):
+        """
+        Görüntüyü (yol, bayt ya da RGB dizi) segmentleyip sınıflandırır; get_segmentation_masks ile
+        aynı nesne listesini döndürür (SAM yüklenemezse None). timeout aşılırsa asyncio.TimeoutError
+        yükselir ve henüz başlamamış model çağrıları çalıştırılmaz.
+        """
+        scope = f"async-{next(self._request_ids)}"
+        _, objects = await self._with_timeout(self._segment(scope, source, max_side, sam_overrides), timeout)
+        return objects
+
+    async def _redesign(self, scope, source, classified_objects, output_path, max_side, sam_overrides, fn, *args,
+                        **options):
+        if classified_objects is None:
+            image, classified_objects = await self._segment(scope, source, max_side, sam_overrides)
+            if classified_objects is None:
+                return None
+        else:
+            image = await self.load_image(source)
+        redesigned = await self.models['inpainting'].run(scope, fn, image, classified_objects, *args, **options)
+        if redesigned is not None and output_path is not None:
+            await self._io_call(redesigned.save, output_path)
+        return redesigned
+
+    async def redesign(self, source, prompt, classified_objects=None, profile=None, steps=None, seed=DEFAULT_SEED,
+                       output_path=None, max_side=None, timeout=None, **sam_overrides):
+        """
+        Görüntüyü prompt'a göre yeniden tasarlar ve PIL görüntüsü döndürür (başarısızsa None).
+        classified_objects verilmezse önce segment_and_classify adımları çalışır; output_path
+        verilirse sonuç G/Ç havuzunda dosyaya yazılır.
+        """
+        scope = f"async-{next(self._request_ids)}"
+        return await self._with_timeout(
+            self._redesign(scope, source, classified_objects, output_path, max_side, sam_overrides,
+                           generate_redesign_image, prompt, profile=profile, steps=steps, seed=seed), timeout)
+
+    async def redesign_variants(self, source, prompts, seeds=None, classified_objects=None, profile=None, steps=None,
+                                max_side=None, timeout=None, **sam_overrides):
+        """
+        Birden çok stil prompt'u / tohum için varyant listesi döndürür (prompt × tohum sırasıyla;
+        başarısızsa None). Varyantlar inpainting havuzunda tek çağrıda batch halinde üretilir;
+        bkz. generator.generate_redesign_variants.
+        """
+        scope = f"async-{next(self._request_ids)}"
+        return await self._with_timeout(
+            self._redesign(scope, source, classified_objects, None, max_side, sam_overrides,
+                           generate_redesign_variants, prompts, seeds=seeds, profile=profile, steps=steps), timeout)
+
+
+# --------------------------------------------------------------------------
+# VARSAYILAN CEPHE
+# --------------------------------------------------------------------------
+
+_async_pipeline = None
+_async_pipeline_lock = threading.Lock()
+
+
+def get_async_pipeline():
+    """Modül düzeyindeki fonksiyonların kullandığı AsyncPipeline'ı döndürür (ilk çağrıda oluşturulur)."""
+    global _async_pipeline
+    with _async_pipeline_lock:
+        if _async_pipeline is None:
+            _async_pipeline = AsyncPipeline()
+        return _async_pipeline
+
+
+def set_async_pipeline(pipeline):
+    """Modül düzeyindeki fonksiyonların kullanacağı AsyncPipeline'ı ayarlar (None: varsayılana dön)."""
+    global _async_pipeline
+    with _async_pipeline_lock:
+        _async_pipeline = pipeline
+
+
+async def segment_and_classify(source, **kwargs):
+    """`await segment_and_classify("oda.jpg")`; bkz. AsyncPipeline.segment_and_classify."""
+    return await get_async_pipeline().segment_and_classify(source, **kwargs)
+
+
+async def redesign(source, prompt, **kwargs):
+    """`await redesign(baytlar, "modern koltuk")`; bkz. AsyncPipeline.redesign."""
+    return await get_async_pipeline().redesign(source, prompt, **kwargs)
+
+
+async def redesign_variants(source, prompts, **kwargs):
+    """`await redesign_variants(baytlar, ["modern", "boho"])`; bkz. AsyncPipeline.redesign_variants."""
+    return await get_async_pipeline().redesign_variants(source, prompts, **kwargs)
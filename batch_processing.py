@@ -0,0 +1,397 @@
+# batch_processing.py
+import gc
+import glob
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import torch
+
+from utils import read_image
+from image_io import decode_info
+from model_registry import registry
+from model_loader import (get_sam_model, generate_masks, classify_masks, load_stored_result, store_result,
+                          set_result_store, get_result_store)
+from classifier import set_classification_cache, get_classification_cache
+from classification_cache import ClassificationCache
+from result_store import ResultStore
+from renderer import render_results
+import profiling
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+# Aşamalar arasındaki kuyruk kapasitesi (bellekte bekleyen çözülmüş görüntü sayısını sınırlar)
+DEFAULT_QUEUE_SIZE = 4
+
+# Toplu modda kırpıntı önbelleğinin sonuç klasörü içindeki varsayılan dosya adı
+CLASSIFICATION_CACHE_FILENAME = "classification_cache.sqlite"
+
+# Kuyruk sonu işareti
+_STOP = object()
+
+# Süreç havuzu modunda fork öncesi ebeveyn süreçte ayarlanır; çocuk süreçler kopyala-yaz (copy-on-write)
+# ile aynı model ağırlıklarını paylaşır
+_worker_sam_model = None
+
+
+# --------------------------------------------------------------------------
+# GİRDİ / ÇIKTI YARDIMCILARI
+# --------------------------------------------------------------------------
+
+def find_images(source):
+    """Bir klasördeki (alt klasörler dahil) veya glob desenine uyan görüntü dosyalarını sıralı döndürür."""
+    if os.path.isdir(source):
+        paths = []
+        for dirpath, _, filenames in os.walk(source):
+            paths.extend(os.path.join(dirpath, name) for name in filenames)
+    else:
+        paths = glob.glob(source, recursive=True)
+
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def result_path_for(image_path, input_root, output_dir):
+    """Görüntünün sonuç dosyası yolunu, girdi köküne göre göreli klasör yapısını koruyarak üretir."""
+    relative = os.path.relpath(os.path.abspath(image_path), input_root)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + ".json")
+
+
+def serialize_objects(image_path, image_shape, classified_objects, decode_info=None):
+    """
+    Sınıflandırılmış nesneleri JSON'a yazılabilir kayda dönüştürür (maskeler RLE olarak). width,
+    height ve koordinatlar çözülen görüntünün boyutundadır; decode_info (image_io.decode_info)
+    verilirse özgün boyut ve çözme oranı kayda eklenir, verilmezse görüntü küçültülmemiş sayılır.
+    """
+    H, W = image_shape[:2]
+    decode_info = decode_info or {'original_width': W, 'original_height': H, 'decode_scale': 1.0}
+    return {
+        'image': image_path,
+        'width': W,
+        'height': H,
+        'original_width': decode_info['original_width'],
+        'original_height': decode_info['original_height'],
+        'decode_scale': decode_info['decode_scale'],
+        'objects': [
+            {
+                'label': obj['label'],
+                'bbox': [int(v) for v in obj['bbox']],
+                'area': obj['mask'].area,
+                'mask_rle': obj['mask'].to_rle(),
+            }
+            for obj in classified_objects
+        ],
+    }
+
+
+def write_result(path, record):
+    """Sonucu önce geçici dosyaya yazar; yarım kalan yazımlar tamamlanmış sayılmaz."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# --------------------------------------------------------------------------
+# AŞAMALAR
+# --------------------------------------------------------------------------
+
+def _decode(job):
+    job['array'] = read_image(job['image'])
+    job['decode_info'] = decode_info(job['image'], job['array'])
+    return job
+
+
+def _segment(job, sam_model):
+    # Depoda eşleşen sonuç varsa SAM ve ViT atlanır
+    job['store_key'], stored_objects = load_stored_result(job['array'])
+    if stored_objects is not None:
+        job['objects'] = stored_objects
+        return job
+    job['sam_results'] = generate_masks(job['array'], sam_model)
+    return job
+
+
+def _classify(job):
+    if 'objects' in job:
+        return job
+    job['objects'] = classify_masks(job['array'], job.pop('sam_results'))
+    store_result(job.pop('store_key'), job['array'].shape, job['objects'])
+    return job
+
+
+def _write(job):
+    image = job.pop('array')
+    objects = job.pop('objects')
+    write_result(job['output'], serialize_objects(job['image'], image.shape, objects, job.pop('decode_info')))
+    if job.get('render'):
+        render_results(image, objects, job['render'])
+    return job
+
+
+# --------------------------------------------------------------------------
+# AŞAMA İSTATİSTİKLERİ
+# --------------------------------------------------------------------------
+
+class StageStats:
+    """Bir aşamanın işlediği öğe sayısını, meşgul süresini ve hatalarını tutar."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            'items': self.items,
+            'errors': self.errors,
+            'busy_s': round(self.busy_seconds, 3),
+            'items_per_s': round(self.items / self.busy_seconds, 3) if self.busy_seconds else None,
+        }
+
+
+def _run_stage(stats, func, in_queue, out_queue, failures):
+    """Girdi kuyruğundan öğe alıp işleyen ve sonucu çıktı kuyruğuna koyan aşama döngüsü."""
+    while True:
+        item = in_queue.get()
+        if item is _STOP:
+            if out_queue is not None:
+                out_queue.put(_STOP)
+            return
+
+        t0 = time.perf_counter()
+        try:
+            # Aşama içindeki ölçümler (profiling.stage) bu görüntünün izine yazılır
+            with profiling.image_scope(item['image']), profiling.stage(f"batch_{stats.name}"):
+                result = func(item)
+        except Exception as e:
+            stats.errors += 1
+            failures.append({'image': item['image'], 'stage': stats.name, 'error': str(e)})
+            print(f"HATA ({stats.name}): {item['image']}: {e}")
+            continue
+        finally:
+            stats.busy_seconds += time.perf_counter() - t0
+
+        stats.items += 1
+        if out_queue is not None:
+            out_queue.put(result)
+
+
+# --------------------------------------------------------------------------
+# TOPLU İŞLEME
+# --------------------------------------------------------------------------
+
+def _run_threaded(jobs, sam_model, queue_size):
+    """Aşamaları tek süreçte, sınırlı kuyruklarla bağlı thread'lerde çalıştırır."""
+    stages = [('decode', _decode), ('segment', lambda job: _segment(job, sam_model)),
+              ('classify', _classify), ('write', _write)]
+    stats = {name: StageStats(name) for name, _ in stages}
+    failures = []
+
+    input_queue = queue.Queue()
+    for job in jobs:
+        input_queue.put(job)
+    input_queue.put(_STOP)
+
+    queues = [input_queue] + [queue.Queue(maxsize=queue_size) for _ in stages[1:]] + [None]
+    threads = [
+        threading.Thread(target=_run_stage, name=f"batch-{name}",
+                         args=(stats[name], func, queues[i], queues[i + 1], failures), daemon=True)
+        for i, (name, func) in enumerate(stages)
+    ]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats, failures
+
+
+# --------------------------------------------------------------------------
+# SÜREÇ HAVUZU MODU
+# --------------------------------------------------------------------------
+
+def _init_worker(threads_per_worker):
+    """Çocuk süreçte intra-op thread sayısını sabitler (çekirdeklerin aşırı paylaşılmasını önler)."""
+    torch.set_num_threads(threads_per_worker)
+
+
+def _process_in_worker(job):
+    """Bir görüntüyü çocuk süreçte baştan sona işler ve aşama sürelerini döndürür."""
+    stages = (('decode', _decode), ('segment', lambda j: _segment(j, _worker_sam_model)),
+              ('classify', _classify), ('write', _write))
+    timings = {}
+    outcome = {'image': job['image'], 'timings': timings, 'failed_stage': None, 'error': None}
+    for name, func in stages:
+        t0 = time.perf_counter()
+        try:
+            with profiling.image_scope(job['image']), profiling.stage(f"batch_{name}"):
+                func(job)
+        except Exception as e:
+            outcome['failed_stage'], outcome['error'] = name, str(e)
+            break
+        finally:
+            timings[name] = time.perf_counter() - t0
+    # Profil izi çocuk süreçte toplanır; ebeveyne sonuçla birlikte taşınır
+    if profiling.is_enabled():
+        outcome['trace'] = profiling.pop_trace(job['image'])
+    return outcome
+
+
+def _run_process_pool(jobs, sam_model, workers, images_per_worker, threads_per_worker):
+    """
+    Görüntüleri fork edilmiş çocuk süreçlerde işler. SAM ve ViT ağırlıkları fork öncesinde ebeveynde
+    yüklenir; çocuklar bu sayfaları kopyala-yaz (copy-on-write) ile paylaşır, ağırlıklar tekrar yüklenmez.
+    """
+    global _worker_sam_model
+
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    # Ağırlıklar fork öncesi yüklenir; gc.freeze ile çöp toplayıcının paylaşılan sayfalara
+    # yazarak kopyalanmalarına yol açması engellenir
+    registry.warmup("vit")
+    _worker_sam_model = sam_model
+    gc.collect()
+    gc.freeze()
+
+    stats = {name: StageStats(name) for name in ('decode', 'segment', 'classify', 'write')}
+    failures = []
+    try:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers, initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+            for outcome in pool.imap_unordered(_process_in_worker, jobs, chunksize=images_per_worker):
+                for name, seconds in outcome['timings'].items():
+                    stats[name].busy_seconds += seconds
+                    if name == outcome['failed_stage']:
+                        stats[name].errors += 1
+                    else:
+                        stats[name].items += 1
+                profiling.merge_trace(outcome.get('trace'))
+                if outcome['error'] is not None:
+                    failures.append({'image': outcome['image'], 'stage': outcome['failed_stage'],
+                                     'error': outcome['error']})
+                    print(f"HATA ({outcome['failed_stage']}): {outcome['image']}: {outcome['error']}")
+    finally:
+        gc.unfreeze()
+        _worker_sam_model = None
+
+    return stats, failures
+
+
+# --------------------------------------------------------------------------
+# TOPLU İŞLEME
+# --------------------------------------------------------------------------
+
+def run_batch(source, output_dir, queue_size=DEFAULT_QUEUE_SIZE, sam_model=None, skip_existing=True,
+              workers=1, images_per_worker=1, threads_per_worker=None, classification_cache_path=None,
+              result_store_dir=None, render_format=None):
+    """
+    Klasör/glob içindeki görüntüleri çözme → SAM segmentasyonu → batch sınıflandırma → sonuç yazma
+    aşamalarından geçirir. Sonucu zaten yazılmış görüntüler atlanır.
+
+    workers=1 iken aşamalar ayrı thread'lerde çalışır ve sınırlı kuyruklarla bağlanır; böylece JPEG
+    çözme ve dosya yazma model çıkarımıyla örtüşür. workers>1 iken görüntüler, model ağırlıklarını
+    paylaşan fork edilmiş süreçlere images_per_worker'lık parçalar halinde dağıtılır.
+
+    classification_cache_path verilirse kırpıntı sınıflandırma sonuçları bu sqlite dosyasında saklanır;
+    tekrar eden çalıştırmalarda daha önce görülmüş kırpıntılar için ViT çalıştırılmaz.
+
+    result_store_dir verilirse görüntü başına sonuçlar (maskeler dahil) bu klasördeki sonuç deposuna
+    yazılır; aynı içerikli görüntü aynı ayarlarla tekrar geldiğinde SAM ve ViT hiç çalışmaz.
+
+    render_format ("png", "jpg", "webp") verilirse her JSON sonucunun yanına maskeli/etiketli görsel yazılır.
+    """
+    image_paths = find_images(source)
+    if not image_paths:
+        print(f"İşlenecek görüntü bulunamadı: {source}")
+        return None
+
+    input_root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in image_paths])
+    jobs = []
+    skipped = 0
+    for path in image_paths:
+        output_path = result_path_for(path, input_root, output_dir)
+        if skip_existing and os.path.exists(output_path):
+            skipped += 1
+            continue
+        job = {'image': path, 'output': output_path}
+        if render_format:
+            job['render'] = os.path.splitext(output_path)[0] + "." + render_format.lstrip(".")
+        jobs.append(job)
+
+    print(f"Toplam {len(image_paths)} görüntü bulundu; {skipped} tanesi daha önce işlenmiş, "
+          f"{len(jobs)} tanesi işlenecek.")
+    if not jobs:
+        return {'total': len(image_paths), 'skipped': skipped, 'processed': 0, 'failures': [], 'stages': {}}
+
+    if sam_model is None:
+        sam_model = get_sam_model()
+        if sam_model is None:
+            return None
+
+    if classification_cache_path:
+        set_classification_cache(ClassificationCache(classification_cache_path))
+    if result_store_dir:
+        set_result_store(ResultStore(result_store_dir))
+
+    if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        print("UYARI: Bu platformda fork desteklenmiyor; süreç havuzu yerine tek süreç kullanılacak.")
+        workers = 1
+
+    t0 = time.perf_counter()
+    if workers > 1:
+        stats, failures = _run_process_pool(jobs, sam_model, workers, images_per_worker, threads_per_worker)
+    else:
+        stats, failures = _run_threaded(jobs, sam_model, queue_size)
+    wall_seconds = time.perf_counter() - t0
+
+    report = {
+        'total': len(image_paths),
+        'skipped': skipped,
+        'processed': stats['write'].items,
+        'failures': failures,
+        'workers': workers,
+        'wall_s': round(wall_seconds, 3),
+        'images_per_s': round(stats['write'].items / wall_seconds, 3) if wall_seconds else None,
+        'stages': {name: s.as_dict() for name, s in stats.items()},
+    }
+    cache = get_classification_cache()
+    if cache is not None:
+        # Süreç havuzu modunda isabet/ıska sayaçları çocuk süreçlerde kalır; burada yalnızca boyut doğrudur
+        report['classification_cache'] = cache.stats()
+    store = get_result_store()
+    if store is not None:
+        # Süreç havuzu modunda isabet/ıska sayaçları çocuk süreçlerde kalır
+        report['result_store'] = store.stats()
+    print_batch_report(report)
+    return report
+
+
+def print_batch_report(report):
+    """Aşama bazında verim (throughput) raporunu yazdırır."""
+    print("\n--- Toplu İşleme Raporu ---")
+    print(f"İşlenen: {report['processed']}  Atlanan: {report['skipped']}  Hatalı: {len(report['failures'])}  "
+          f"Süreç: {report['workers']}")
+    print(f"Toplam süre: {report['wall_s']:.1f} s  ({report['images_per_s'] or 0:.2f} görüntü/s)")
+    print(f"{'Aşama':<10}{'öğe':>8}{'hata':>6}{'meşgul (s)':>12}{'öğe/s':>10}")
+    for name, s in report['stages'].items():
+        rate = f"{s['items_per_s']:.2f}" if s['items_per_s'] else "-"
+        print(f"{name:<10}{s['items']:>8}{s['errors']:>6}{s['busy_s']:>12.1f}{rate:>10}")
+    if 'classification_cache' in report:
+        c = report['classification_cache']
+        print(f"Kırpıntı önbelleği: {c['hits']} isabet, {c['misses']} ıska, {c['entries']} kayıt "
+              f"({c['bytes'] / 2 ** 20:.1f} MB)")
+    if 'result_store' in report:
+        r = report['result_store']
+        print(f"Sonuç deposu: {r['hits']} isabet, {r['misses']} ıska, {r['files']} dosya "
+              f"({r['bytes'] / 2 ** 20:.1f} MB)")
+    print("---------------------------\n")
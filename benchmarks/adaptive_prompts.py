@@ -0,0 +1,119 @@
+# benchmarks/adaptive_prompts.py
+"""
+İki geçişli (uyarlamalı) nokta istemi ile tam ızgara karşılaştırması. Paketteki fotoğraflarda aynı
+SAM ayarlarıyla önce tam ızgara, sonra adaptive_prompts=True çalıştırılır (gömme önbellekten gelir,
+yalnızca maske çözücü ve son işleme ölçülür). Raporlanan: çözücüye gönderilen nokta sayısı ve
+tasarruf, süre, maske sayısı ve tam ızgara maskelerinin geri çağırımı (recall: uyarlamalı sonuçta
+IoU >= eşik olan bir karşılığı bulunan tam ızgara maskelerinin oranı).
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.adaptive_prompts --stub
+    python -m benchmarks.adaptive_prompts --stub --points-per-side 16 --edge-density 0.1
+    python -m benchmarks.adaptive_prompts                          # gerçek SAM ağırlıklarıyla
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGES = os.path.join(REPO_ROOT, "test_oda_fotografi*.jpg")
+RECALL_THRESHOLDS = (0.5, 0.75, 0.9)
+
+
+def best_ious(reference, candidates):
+    """reference maskelerinin her biri için candidates içindeki en yüksek maske IoU'su."""
+    from mask_composition import bbox_iou_matrix, mask_iou
+
+    if not reference:
+        return np.zeros(0)
+    if not candidates:
+        return np.zeros(len(reference))
+    overlaps = bbox_iou_matrix([m.bbox for m in reference], [m.bbox for m in candidates])
+    return np.array([max((mask_iou(ref, candidates[j]) for j in np.flatnonzero(overlaps[i] > 0)), default=0.0)
+                     for i, ref in enumerate(reference)])
+
+
+def run(engine, image, max_side, overrides):
+    """(maskeler, istenen nokta, tam ızgara noktası, süre s) döndürür."""
+    from compact_mask import CompactMask
+
+    generator = engine.mask_generator
+    before = dict(generator.prompt_stats)
+    t0 = time.perf_counter()
+    results = engine.generate(image, max_side=max_side, **overrides)
+    seconds = time.perf_counter() - t0
+    prompted = generator.prompt_stats['prompted'] - before.get('prompted', 0)
+    dense = generator.prompt_stats['dense'] - before.get('dense', 0)
+    return [CompactMask.from_rle(r['segmentation']) for r in results], prompted, dense, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uyarlamalı nokta istemi: çözücü çağrısı ve geri çağırım")
+    parser.add_argument("--stub", action="store_true", help="Ağırlıksız yedek SAM kullan")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Ölçümde kullanılacak görüntüler (glob)")
+    parser.add_argument("--points-per-side", type=int, help="Izgara boyutu (varsayılan: SAM ayarı)")
+    parser.add_argument("--max-side", type=int, default=1024)
+    parser.add_argument("--coarse-stride", type=int, help="İlk geçiş adımı (adaptive_prompts.ADAPTIVE_COARSE_STRIDE)")
+    parser.add_argument("--cover-iou", type=float, help="Kapsama için en düşük tahmini IoU")
+    parser.add_argument("--edge-density", type=float, help="Kenar yoğunluğu eşiği")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    import model_loader
+    if args.stub:
+        from benchmarks.stubs import install_stub_models, STUB_SAM_SETTINGS
+        install_stub_models()
+        model_loader.SAM_GENERATOR_SETTINGS.update(STUB_SAM_SETTINGS)
+    from utils import read_image
+
+    engine = model_loader.get_segmentation_engine(model_loader.get_sam_model())
+    generator = engine.mask_generator
+    for name, value in (('coarse_stride', args.coarse_stride), ('cover_iou_thresh', args.cover_iou),
+                        ('edge_density_thresh', args.edge_density)):
+        if value is not None:
+            setattr(generator, name, value)
+    overrides = {'points_per_side': args.points_per_side} if args.points_per_side else {}
+
+    results = []
+    for path in sorted(glob.glob(args.images)):
+        image = read_image(path)
+        # Gömme önce hesaplanır; iki yol da yalnızca istem + çözücü + son işleme süresini öder
+        engine.generate(image, max_side=args.max_side, **overrides)
+        dense_masks, dense_points, _, dense_s = run(engine, image, args.max_side,
+                                                    dict(overrides, adaptive_prompts=False))
+        adaptive_masks, prompted, grid, adaptive_s = run(engine, image, args.max_side,
+                                                         dict(overrides, adaptive_prompts=True))
+        ious = best_ious(dense_masks, adaptive_masks)
+        row = {
+            'image': os.path.basename(path),
+            'grid_points': grid,
+            'prompted_points': prompted,
+            'decoder_calls_saved': 1 - prompted / grid,
+            'dense_s': dense_s,
+            'adaptive_s': adaptive_s,
+            'dense_masks': len(dense_masks),
+            'adaptive_masks': len(adaptive_masks),
+        }
+        row.update({f'recall@{t}': float((ious >= t).mean()) if ious.size else 1.0 for t in RECALL_THRESHOLDS})
+        results.append(row)
+
+    print(f"{'Görüntü':<26}{'nokta':>12}{'tasarruf':>10}{'süre (s)':>16}{'maske':>9}"
+          + "".join(f"{'recall@' + str(t):>13}" for t in RECALL_THRESHOLDS))
+    for r in results:
+        print(f"{r['image']:<26}{r['prompted_points']:>5}/{r['grid_points']:<6}{r['decoder_calls_saved'] * 100:>9.0f}%"
+              f"{r['dense_s']:>8.2f}/{r['adaptive_s']:<7.2f}{r['dense_masks']:>4}/{r['adaptive_masks']:<4}"
+              + "".join(f"{r['recall@' + str(t)] * 100:>12.1f}%" for t in RECALL_THRESHOLDS))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# benchmarks/async_pipeline.py
+"""
+Asenkron cephe (async_pipeline) ölçümü ve davranış kontrolleri. Paketteki fotoğraflar (ve yatay
+çevrilmiş kopyaları) önce eşzamanlı (senkron) get_segmentation_masks ile sırayla, sonra
+asyncio.gather ile aynı anda işlenir. Raporlanan:
+  - toplam süre ve olay döngüsü gecikmesi (10 ms'lik kalp atışı görevinin en büyük gecikmesi)
+  - iki yolun etiketlerinin aynı olup olmadığı
+  - zaman aşımı: süre dolduğunda ViT aşamasının hiç kuyruğa girmediği
+  - iptal: kuyrukta bekleyen SAM çağrılarının çalıştırılmadan düştüğü
+  - (--redesign) baytlardan yeniden tasarım + dosyaya yazma
+Etiketler farklıysa, zaman aşımı yükselmezse ya da ViT çağrısı kuyruğa girerse komut 1 ile çıkar
+(birim testleri: tests/test_async_pipeline.py).
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.async_pipeline --stub
+    python -m benchmarks.async_pipeline --stub --redesign
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGES = os.path.join(REPO_ROOT, "test_oda_fotografi*.jpg")
+HEARTBEAT_S = 0.01
+
+
+async def heartbeat(lags, stop):
+    """HEARTBEAT_S aralıklarla uyanır; planlanan zamana göre gecikmeleri kaydeder."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_S
+        await asyncio.sleep(HEARTBEAT_S)
+        lags.append(loop.time() - expected)
+
+
+async def measure(coro):
+    """(sonuç, süre s, en büyük olay döngüsü gecikmesi ms) döndürür."""
+    lags, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    t0 = time.perf_counter()
+    try:
+        result = await coro
+    finally:
+        seconds = time.perf_counter() - t0
+        stop.set()
+        await beat
+    return result, seconds, max(lags, default=0.0) * 1000
+
+
+async def run_checks(pipeline, images, encoded, args):
+    import model_loader
+
+    engine = model_loader.get_segmentation_engine(model_loader.get_sam_model())
+    report = {}
+
+    # Aynı anda gelen istekler
+    engine.embedding_cache.clear()
+    results, seconds, lag_ms = await measure(asyncio.gather(*(pipeline.segment_and_classify(data)
+                                                             for data in encoded)))
+    report.update(async_s=seconds, async_max_loop_lag_ms=lag_ms, async_labels=[[o['label'] for o in r]
+                                                                            for r in results])
+
+    # Zaman aşımı: SAM çalışırken süre dolar, ViT aşaması hiç kuyruğa girmez
+    engine.embedding_cache.clear()
+    vit_before = pipeline.models['vit'].stats['submitted']
+    try:
+        await pipeline.segment_and_classify(images[0], timeout=args.timeout)
+        report['timeout_raised'] = False
+    except asyncio.TimeoutError:
+        report['timeout_raised'] = True
+    report['timeout_vit_calls'] = pipeline.models['vit'].stats['submitted'] - vit_before
+    await drain(pipeline)
+
+    # İptal: ilk SAM çağrısı çalışırken diğerleri kuyrukta bekler ve çalıştırılmadan düşer
+    engine.embedding_cache.clear()
+    sam_stats = pipeline.models['sam'].stats
+    before = dict(sam_stats)
+    tasks = [asyncio.create_task(pipeline.segment_and_classify(image)) for image in images]
+    await asyncio.sleep(args.timeout)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    report['cancel_dropped_before_start'] = sam_stats['cancelled'] - before.get('cancelled', 0)
+    report['cancel_abandoned_running'] = sam_stats['abandoned'] - before.get('abandoned', 0)
+    await drain(pipeline)
+
+    if args.redesign:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tasarim.png")
+            redesigned, seconds, lag_ms = await measure(pipeline.redesign(encoded[0], "modern koltuk",
+                                                                          steps=2, output_path=path))
+            report.update(redesign_s=seconds, redesign_max_loop_lag_ms=lag_ms,
+                          redesign_written=redesigned is not None and os.path.exists(path))
+    return report
+
+
+async def drain(pipeline):
+    """Sonucu atılmış olanlar dahil tüm model çağrıları bitene kadar bekler (ölçümler karışmasın)."""
+    while any(executor.inflight for executor in pipeline.models.values()):
+        await asyncio.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asenkron cephe: eşzamanlı istekler, zaman aşımı, iptal")
+    parser.add_argument("--stub", action="store_true", help="Ağırlıksız yedek SAM/ViT/inpainting kullan")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Ölçümde kullanılacak görüntüler (glob)")
+    parser.add_argument("--timeout", type=float, default=0.5, help="Zaman aşımı / iptal kontrolündeki süre (s)")
+    parser.add_argument("--redesign", action="store_true", help="Yeniden tasarım yolunu da çalıştır")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    import model_loader
+    if args.stub:
+        from benchmarks.stubs import install_stub_models, install_stub_inpainting, STUB_SAM_SETTINGS
+        install_stub_models()
+        install_stub_inpainting()
+        model_loader.SAM_GENERATOR_SETTINGS.update(STUB_SAM_SETTINGS)
+    from async_pipeline import AsyncPipeline
+    from utils import read_image
+
+    images = []
+    for path in sorted(glob.glob(args.images)):
+        image = read_image(path)
+        images += [image, np.ascontiguousarray(image[:, ::-1])]
+    encoded = [cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR))[1].tobytes() for image in images]
+
+    # Senkron yol: aynı istekler sırayla (çözme dahil)
+    from utils import decode_image
+    sam_model = model_loader.get_sam_model()
+    if sam_model is None:
+        print("HATA: SAM modeli yüklenemedi (ağırlık dosyası yok mu?). Ağırlıksız ölçüm için --stub kullanın.")
+        sys.exit(1)
+    model_loader.get_segmentation_engine(sam_model).embedding_cache.clear()
+    t0 = time.perf_counter()
+    sync_labels = [[o['label'] for o in model_loader.get_segmentation_masks(decode_image(data), sam_model)]
+                   for data in encoded]
+    sync_s = time.perf_counter() - t0
+
+    async def run():
+        async with AsyncPipeline() as pipeline:
+            return await run_checks(pipeline, images, encoded, args)
+
+    report = asyncio.run(run())
+    report['identical_labels'] = report.pop('async_labels') == sync_labels
+    report = {'requests': len(encoded), 'sync_s': sync_s, **report}
+
+    print(f"\n{report['requests']} istek")
+    print(f"Senkron (sırayla)   : {report['sync_s']:>7.2f} s")
+    print(f"Asenkron (gather)   : {report['async_s']:>7.2f} s   olay döngüsü en büyük gecikme "
+          f"{report['async_max_loop_lag_ms']:.1f} ms   etiketler aynı: {'evet' if report['identical_labels'] else 'HAYIR'}")
+    print(f"Zaman aşımı ({args.timeout} s): {'yükseldi' if report['timeout_raised'] else 'YÜKSELMEDİ'}, "
+          f"kuyruğa giren ViT çağrısı: {report['timeout_vit_calls']}")
+    print(f"İptal: {report['cancel_dropped_before_start']} SAM çağrısı başlamadan düştü, "
+          f"{report['cancel_abandoned_running']} çalışan çağrının sonucu atıldı")
+    if args.redesign:
+        print(f"Yeniden tasarım     : {report['redesign_s']:>7.2f} s   olay döngüsü en büyük gecikme "
+              f"{report['redesign_max_loop_lag_ms']:.1f} ms   dosya yazıldı: "
+              f"{'evet' if report['redesign_written'] else 'HAYIR'}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    # Davranış kontrolleri: etiket eşliği, zaman aşımında ViT'in hiç çalışmaması, yeniden tasarım çıktısı
+    failed = not report['identical_labels'] or not report['timeout_raised'] or report['timeout_vit_calls']
+    if args.redesign and not report['redesign_written']:
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/crop_preprocessing.py
+"""
+Kırpıntı ön işleme karşılaştırması: kırpıntı başına PIL dönüşümü + ViTImageProcessor (eski yol)
+ile görüntü tensörü görünümlerinden toplu hazırlama (crop_preprocessing.prepare_crop_batch).
+Kutular ve maskeler paketteki fotoğraflar üzerinde sentetik olarak üretilir; model gerekmez.
+Süreye ek olarak tensör yolunun PIL yoluna göre piksel farkı raporlanır.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.crop_preprocessing
+    python -m benchmarks.crop_preprocessing --objects 100 --repeat 10
+    python -m benchmarks.crop_preprocessing --stub     # yedek ViT ile etiket uyumu da ölçülür
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGES = os.path.join(REPO_ROOT, "test_oda_fotografi*.jpg")
+
+
+def synthetic_objects(height, width, count, seed=0):
+    """SAM çıktısına benzeyen (kutu, CompactMask, alan) üçlüleri üretir; kutular (x0, y0, x1, y1)."""
+    from compact_mask import CompactMask
+
+    rng = np.random.default_rng(seed)
+    objects = []
+    for _ in range(count):
+        w = int(rng.integers(24, width // 2))
+        h = int(rng.integers(24, height // 2))
+        x0 = int(rng.integers(0, width - w))
+        y0 = int(rng.integers(0, height - h))
+        local = np.zeros((h, w), dtype=np.uint8)
+        cv2.ellipse(local, (w // 2, h // 2), (w // 2, h // 2), 0, 0, 360, 1, -1)
+        mask = CompactMask(local.astype(bool), (x0, y0), (height, width))
+        objects.append(((x0, y0, x0 + w, y0 + h), mask, mask.area))
+    return objects
+
+
+def _timed(fn, repeat):
+    """fn'i bir kez ısındırıp repeat kez çalıştırır; (son sonuç, ortalama süre) döndürür."""
+    result = fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def bench_image(path, count, repeat, feature_extractor):
+    from crop_preprocessing import prepare_crop_batch, BACKGROUND_MODES
+
+    image = cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB)
+    H, W, _ = image.shape
+    objects = synthetic_objects(H, W, count)
+    boxes = [box for box, _, _ in objects]
+    masks = [mask for _, mask, _ in objects]
+
+    def pil_path():
+        crops = [image[y0:y1, x0:x1] for x0, y0, x1, y1 in boxes]
+        return feature_extractor(images=crops, return_tensors="pt")["pixel_values"]
+
+    reference, pil_s = _timed(pil_path, repeat)
+    result = {'image': os.path.basename(path), 'size': f"{W}x{H}", 'objects': count,
+              'pil_ms': pil_s * 1000}
+    for background in BACKGROUND_MODES:
+        batch, tensor_s = _timed(lambda: prepare_crop_batch(image, boxes, masks=masks, background=background,
+                                                            feature_extractor=feature_extractor), repeat)
+        result[f'{background}_ms'] = tensor_s * 1000
+        if background == "keep":
+            # Normalize edilmiş [-1, 1] aralığındaki fark 0-255 piksel birimine çevrilir
+            diff = (batch - reference).abs() * 127.5
+            result['keep_mean_abs_diff'] = float(diff.mean())
+            result['keep_p99_abs_diff'] = float(diff.flatten().quantile(0.99))
+    return result, image, objects
+
+
+def label_agreement(image, objects):
+    """Yedek ViT ile PIL ve tensör ("keep") yollarının etiketlerini karşılaştırır."""
+    from classifier import classify_cropped_objects_batch, classify_regions_batch
+
+    H, W, _ = image.shape
+    boxes = [box for box, _, _ in objects]
+    areas = [area for _, _, area in objects]
+    crops = [image[y0:y1, x0:x1] for x0, y0, x1, y1 in boxes]
+    pil_labels = classify_cropped_objects_batch(crops, areas, H * W)
+    tensor_labels = classify_regions_batch(image, boxes, areas, H * W)
+    return sum(a == b for a, b in zip(pil_labels, tensor_labels)) / max(len(objects), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kırpıntı ön işleme (PIL ve tensör) karşılaştırması")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Ölçümde kullanılacak görüntüler (glob)")
+    parser.add_argument("--objects", type=int, default=60, help="Görüntü başına nesne sayısı")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, help="torch iş parçacığı sayısı")
+    parser.add_argument("--stub", action="store_true", help="Yedek ViT ile etiket uyumunu da ölç")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    import torch
+    from transformers import ViTImageProcessor
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    # google/vit-large-patch16-224 işlemcisinin ayarları (224, bilinear, ortalama/std 0.5) varsayılanlardır
+    feature_extractor = ViTImageProcessor()
+    if args.stub:
+        from benchmarks.stubs import install_stub_models
+        install_stub_models()
+
+    results = []
+    for path in sorted(glob.glob(args.images)):
+        result, image, objects = bench_image(path, args.objects, args.repeat, feature_extractor)
+        if args.stub:
+            result['label_agreement'] = label_agreement(image, objects)
+        results.append(result)
+
+    print(f"{'Görüntü':<28}{'boyut':>11}{'PIL (ms)':>10}{'keep':>8}{'zero':>8}{'blur':>8}"
+          f"{'hızlanma':>10}{'ort. fark':>11}{'p99 fark':>10}")
+    for r in results:
+        print(f"{r['image']:<28}{r['size']:>11}{r['pil_ms']:>10.1f}{r['keep_ms']:>8.1f}{r['zero_ms']:>8.1f}"
+              f"{r['blur_ms']:>8.1f}{r['pil_ms'] / r['keep_ms']:>9.1f}x{r['keep_mean_abs_diff']:>11.2f}"
+              f"{r['keep_p99_abs_diff']:>10.2f}")
+        if 'label_agreement' in r:
+            print(f"  etiket uyumu (PIL / tensör): %{r['label_agreement'] * 100:.0f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
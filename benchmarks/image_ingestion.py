@@ -0,0 +1,149 @@
+# benchmarks/image_ingestion.py
+"""
+Görüntü okuma (image_io) ölçümü. Paketteki bir fotoğraf büyütülerek büyük JPEG'ler (varsayılan
+24 MP ve 48 MP) oluşturulur; her okuma yöntemi her dosya için ayrı bir Python sürecinde çalıştırılır.
+Raporlanan: çözme süresi (ortanca), çıktı boyutu ve çözme sırasında eklenen tepe bellek (max RSS -
+çözme öncesi RSS).
+
+Yöntemler:
+  imread+cvtColor      eski read_image: cv2.imread (BGR) + cvtColor ile ikinci RGB kopya
+  read_file (tam)      image_io.read_file(max_side=0): önceden ayrılmış tek diziye doğrudan RGB
+  read_file (küçük)    image_io.read_file(max_side=REDUCED_MAX_SIDE): DCT ölçekleme ile doğrudan çözme
+  bytes+imdecode       eski decode_image: baytlar + imdecode + cvtColor kopyası
+  memoryview (tam)     image_io.decode_bytes(memoryview, max_side=0): kopyasız girdi, doğrudan RGB
+  memoryview (küçük)   image_io.decode_bytes(memoryview, max_side=REDUCED_MAX_SIDE)
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.image_ingestion
+    python -m benchmarks.image_ingestion --megapixels 12 48 --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+SOURCE_IMAGE = os.path.join(REPO_ROOT, "test_oda_fotografi1.jpg")
+# Küçültülmüş okuma yöntemlerinin uzun kenar sınırı (image_io.DECODE_MAX_SIDE varsayılanı 0: tam)
+REDUCED_MAX_SIDE = 1600
+
+METHODS = ("imread+cvtColor", "read_file (tam)", "read_file (küçük)", "bytes+imdecode", "memoryview (tam)",
+           "memoryview (küçük)")
+
+
+def make_large_jpeg(directory, megapixels, quality=90):
+    """Kaynak fotoğrafı yaklaşık megapixels boyutuna büyütüp JPEG olarak yazar; yolu döndürür."""
+    import cv2
+    image = cv2.imread(SOURCE_IMAGE)
+    H, W = image.shape[:2]
+    scale = (megapixels * 1e6 / (H * W)) ** 0.5
+    large = cv2.resize(image, (int(W * scale), int(H * scale)), interpolation=cv2.INTER_CUBIC)
+    path = os.path.join(directory, f"buyuk_{megapixels}mp.jpg")
+    cv2.imwrite(path, large, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return path
+
+
+def _reader(method, path):
+    """Yöntemin tek okuma fonksiyonunu döndürür."""
+    import cv2
+    import numpy as np
+    from image_io import decode_bytes, read_file
+
+    if method == "imread+cvtColor":
+        return lambda: cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB)
+    if method == "read_file (tam)":
+        return lambda: read_file(path, max_side=0)
+    if method == "read_file (küçük)":
+        return lambda: read_file(path, max_side=REDUCED_MAX_SIDE)
+    with open(path, "rb") as f:
+        data = f.read()
+    if method == "bytes+imdecode":
+        return lambda: cv2.cvtColor(cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR),
+                                    cv2.COLOR_BGR2RGB)
+    view = memoryview(data)
+    if method == "memoryview (tam)":
+        return lambda: decode_bytes(view, max_side=0)
+    if method == "memoryview (küçük)":
+        return lambda: decode_bytes(view, max_side=REDUCED_MAX_SIDE)
+    raise ValueError(f"Bilinmeyen yöntem: {method}")
+
+
+def run_method(method, path, repeat):
+    """Yöntemi bu süreçte ölçer; ilk okumanın tepe bellek artışı ve ortanca süre döndürülür."""
+    import statistics
+    import time
+    from profiling import _rss_mb, peak_rss_mb
+
+    read = _reader(method, path)
+    before = _rss_mb()
+    t0 = time.perf_counter()
+    image = read()
+    timings = [time.perf_counter() - t0]
+    peak_added = peak_rss_mb() - before
+    shape = list(image.shape)
+    del image
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        read()
+        timings.append(time.perf_counter() - t0)
+    return {'decode_ms': statistics.median(timings) * 1000, 'shape': shape, 'peak_added_mb': peak_added}
+
+
+def _run_child(*arguments):
+    """
+    Bu modülü alt süreçte çalıştırır; son stdout satırını JSON olarak döndürür. Linux'ta max RSS
+    exec sonrasında üst süreçten devralındığından büyük diziler de yalnızca alt süreçlerde oluşturulur.
+    """
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.image_ingestion", *arguments], cwd=REPO_ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "bilinmeyen hata"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Görüntü okuma: çözme süresi ve tepe bellek")
+    parser.add_argument("--megapixels", type=int, nargs="*", default=[24, 48], help="Oluşturulacak JPEG boyutları")
+    parser.add_argument("--repeat", type=int, default=3, help="Yöntem başına okuma sayısı")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--child", nargs=2, metavar=("YÖNTEM", "DOSYA"), help=argparse.SUPPRESS)
+    parser.add_argument("--make", nargs=2, metavar=("KLASÖR", "MP"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_method(*args.child, args.repeat)))
+        return
+    if args.make:
+        print(json.dumps(make_large_jpeg(args.make[0], int(args.make[1]))))
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for megapixels in args.megapixels:
+            path = _run_child("--make", directory, str(megapixels))
+            size_mb = os.path.getsize(path) / 2 ** 20
+            for method in METHODS:
+                row = {'megapixels': megapixels, 'file_mb': size_mb, 'method': method}
+                row.update(_run_child("--child", method, path, "--repeat", str(args.repeat)))
+                rows.append(row)
+
+    print(f"\nKüçültülmüş okuma: max_side = {REDUCED_MAX_SIDE}")
+    print(f"{'MP':>4}{'dosya MB':>10}  {'yöntem':<20}{'çözme (ms)':>12}{'çıktı':>14}{'ek tepe MB':>12}")
+    for r in rows:
+        if 'error' in r:
+            print(f"{r['megapixels']:>4}{r['file_mb']:>10.1f}  {r['method']:<20}HATA: {r['error']}")
+            continue
+        shape = f"{r['shape'][1]}x{r['shape'][0]}"
+        print(f"{r['megapixels']:>4}{r['file_mb']:>10.1f}  {r['method']:<20}{r['decode_ms']:>12.1f}{shape:>14}"
+              f"{r['peak_added_mb']:>12.0f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
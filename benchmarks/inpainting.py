@@ -0,0 +1,140 @@
+# benchmarks/inpainting.py
+"""
+Inpainting profillerinin (generator.INPAINTING_PROFILES) CPU karşılaştırması. Her profil ayrı bir
+alt süreçte çalıştırılır ki tepe bellek (ru_maxrss) profiller arasında karışmasın. Paketteki
+fotoğraflarda sentetik mobilya maskeleri kullanılır; süre, tepe bellek, modelin işlediği boyut,
+çıktı boyutu ve maske dışında değişen piksel oranı raporlanır. Bir profil çalıştırılamazsa ya da
+bölge modunda maske dışındaki pikseller / çıktı boyutu değişirse komut 1 ile çıkar.
+
+--stub ile rastgele ağırlıklı küçük UNet/VAE/CLIP'ten oluşan yedek pipeline kullanılır (ağırlık ve
+internet gerekmez); süreler gerçek modele göre çok kısa olsa da profiller arasındaki oran
+(adım sayısı, çözünürlük) aynı kod yolundan ölçülür.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.inpainting --stub
+    python -m benchmarks.inpainting --stub --profiles quality fast --steps 10 --upscale 2
+    python -m benchmarks.inpainting                                  # gerçek SD inpainting modeli
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGE = os.path.join(REPO_ROOT, "test_oda_fotografi2.jpg")
+PROMPT = "modern minimalist koltuklar"
+
+
+def furniture_objects(height, width):
+    """Görüntünün alt yarısında bir koltuk ve bir masa maskesi (get_segmentation_masks biçiminde)."""
+    from compact_mask import CompactMask
+
+    objects = []
+    for label, (cx, cy, rx, ry) in (('koltuk', (0.35, 0.7, 0.16, 0.12)), ('masa', (0.62, 0.78, 0.08, 0.06))):
+        dense = np.zeros((height, width), dtype=np.uint8)
+        cv2.ellipse(dense, (int(cx * width), int(cy * height)), (int(rx * width), int(ry * height)),
+                    0, 0, 360, 1, -1)
+        mask = CompactMask.from_dense(dense.astype(bool))
+        objects.append({'mask': mask, 'bbox': mask.bbox, 'label': label})
+    return objects
+
+
+def run_profile(args):
+    """Alt süreçte tek profili çalıştırır; sonucu JSON olarak stdout'un son satırına yazar."""
+    import generator
+    import profiling
+    from utils import read_image
+
+    if args.stub:
+        from benchmarks.stubs import install_stub_inpainting
+        install_stub_inpainting()
+
+    image = read_image(args.image)
+    if args.upscale != 1.0:
+        image = cv2.resize(image, None, fx=args.upscale, fy=args.upscale, interpolation=cv2.INTER_CUBIC)
+    objects = furniture_objects(*image.shape[:2])
+    if generator.load_generator_pipeline() is None:
+        sys.exit(1)
+    load_mb = profiling.peak_rss_mb()
+
+    stats = {}
+    result = generator.generate_redesign_image(image, objects, PROMPT, profile=args.profile, steps=args.steps,
+                                               stats=stats)
+    result = np.asarray(result)
+
+    outside = None
+    if result.shape == image.shape:
+        union = np.zeros(image.shape[:2], dtype=bool)
+        for obj in objects:
+            obj['mask'].paint(union)
+        dilated = cv2.dilate(union.astype(np.uint8), np.ones((2 * generator.REGION_FEATHER + 1,) * 2, np.uint8))
+        changed = np.any(result != image, axis=2)
+        outside = float(changed[dilated == 0].mean())
+    stats.update({'profile': args.profile, 'input_size': [image.shape[1], image.shape[0]],
+                  'load_peak_rss_mb': load_mb, 'changed_outside_mask': outside})
+    print(json.dumps(stats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inpainting profilleri süre/bellek karşılaştırması")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--stub", action="store_true", help="Ağırlıksız küçük yedek pipeline kullan")
+    parser.add_argument("--profiles", nargs="+", default=None, help="Karşılaştırılacak profiller (varsayılan: hepsi)")
+    parser.add_argument("--steps", type=int, help="Tüm profillerde kullanılacak adım sayısı")
+    parser.add_argument("--upscale", type=float, default=1.0, help="Görüntüyü ölçümden önce büyütme katsayısı")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--profile", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args)
+        return
+
+    from generator import INPAINTING_PROFILES
+    env = dict(os.environ, HF_HUB_OFFLINE=os.environ.get("HF_HUB_OFFLINE", "1" if args.stub else "0"))
+    results, failed = [], False
+    for profile in args.profiles or list(INPAINTING_PROFILES):
+        command = [sys.executable, "-m", "benchmarks.inpainting", "--profile", profile, "--image", args.image,
+                   "--upscale", str(args.upscale)]
+        command += ["--stub"] if args.stub else []
+        command += ["--steps", str(args.steps)] if args.steps else []
+        completed = subprocess.run(command, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"HATA: '{profile}' profili çalıştırılamadı:\n{completed.stderr[-2000:]}")
+            failed = True
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(f"\n{'Profil':<10}{'girdi':>11}{'model':>10}{'çıktı':>11}{'adım':>6}{'zamanlayıcı':>13}"
+          f"{'süre (s)':>10}{'tepe bellek (MB)':>18}{'maske dışı değişim':>20}")
+    for r in results:
+        outside = "-" if r['changed_outside_mask'] is None else f"%{r['changed_outside_mask'] * 100:.2f}"
+        print(f"{r['profile']:<10}{'x'.join(map(str, r['input_size'])):>11}{'x'.join(map(str, r['model_size'])):>10}"
+              f"{'x'.join(map(str, r['output_size'])):>11}{r['steps']:>6}{r['scheduler']:>13}{r['seconds']:>10.2f}"
+              f"{r['peak_rss_mb']:>18.0f}{outside:>20}")
+    if len(results) > 1:
+        base = results[0]
+        for r in results[1:]:
+            print(f"{r['profile']} / {base['profile']}: {base['seconds'] / r['seconds']:.1f}x hızlı, "
+                  f"tepe bellek farkı {r['peak_rss_mb'] - base['peak_rss_mb']:+.0f} MB")
+
+    # Bölge modunda çıktı girişle aynı boyutta olmalı ve maske çevresi dışında hiçbir piksel değişmemeli
+    for r in results:
+        if r['region'] is not None and (r['output_size'] != r['input_size'] or r['changed_outside_mask']):
+            print(f"HATA: '{r['profile']}' profili maske dışındaki pikselleri ya da çıktı boyutunu değiştirdi.")
+            failed = True
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/mask_composition.py
+"""
+Yeniden tasarım maskesi oluşturma karşılaştırması (büyük görüntü, 100+ maske):
+  legacy   : ilk sürümdeki yol; her maske için tam kare np.logical_or, yapısal maske başına yeni
+             çekirdek ve tam kare cv2.dilate, bool <-> uint8 dönüşümleri
+  paint    : bool tampona CompactMask.paint + maske başına yeni çekirdekle bbox içi dilasyon
+  compose  : mask_composition (etiket indeksi, tek uint8 tamponda bbox içi yerinde VEYA,
+             önbellekteki çekirdekle tek dilasyon)
+Üç yolun birleşik maskesinin ve yapısal maske seçiminin aynı olduğu da kontrol edilir (farklıysa
+komut 1 ile çıkar; birim testleri tests/test_mask_composition.py). Maskeler sentetik olarak
+üretilir; model gerekmez.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.mask_composition
+    python -m benchmarks.mask_composition --size 6000x4000 --objects 300 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+OTHER_LABELS = ['perde', 'pencere', 'bitki', 'raf', 'ayna']
+
+
+def synthetic_scene(height, width, count, seed=0):
+    """get_segmentation_masks çıktısına benzeyen nesneler; en büyük maske etiketsiz (yapısal aday) olur."""
+    from benchmarks.crop_preprocessing import synthetic_objects
+    from generator import CHANGEABLE_OBJECTS, UNRELIABLE_LABELS
+
+    rng = np.random.default_rng(seed)
+    names = CHANGEABLE_OBJECTS + UNRELIABLE_LABELS + ['duvar', 'zemin', 'tavan'] + OTHER_LABELS
+    objects = [{'mask': mask, 'bbox': mask.bbox, 'area': area, 'label': names[int(rng.integers(len(names)))]}
+               for _, mask, area in synthetic_objects(height, width, count, seed)]
+    max(objects, key=lambda obj: obj['area'])['label'] = 'Sınıflandırılamadı'
+    return objects
+
+
+def legacy_compose(shape, objects, wall, floor, size):
+    """İlk sürümdeki generate_redesign_image maske bölümü (alan maskeden sayılır)."""
+    from generator import CHANGEABLE_OBJECTS, structural_candidate_labels
+
+    H, W = shape
+    combined = np.zeros((H, W), dtype=bool)
+    candidates = [(obj['mask'].area, obj['mask'], obj) for obj in objects
+                  if obj['label'] in structural_candidate_labels()]
+    candidates.sort(key=lambda x: x[0], reverse=True)
+    for _, mask, obj in candidates[:3]:
+        label = obj['label']
+        if (wall and label in ['duvar', 'Sınıflandırılamadı', 'boş alan']) or \
+                (floor and label in ['zemin', 'Sınıflandırılamadı', 'boş alan']):
+            kernel = np.ones((size, size), np.uint8)
+            dilated = cv2.dilate(np.asarray(mask).astype(np.uint8) * 255, kernel, iterations=1)
+            combined = np.logical_or(combined, dilated.astype(bool))
+            break
+    for obj in objects:
+        if obj['label'] in CHANGEABLE_OBJECTS:
+            combined = np.logical_or(combined, obj['mask'])
+    return combined.astype(np.uint8)
+
+
+def paint_compose(shape, objects, wall, floor, size):
+    """Bir önceki sürüm: bool tampona paint, maske başına yeni çekirdekle bbox içi dilasyon."""
+    from generator import CHANGEABLE_OBJECTS, find_largest_structural_mask
+
+    combined = np.zeros(shape, dtype=bool)
+    for _, mask, obj in find_largest_structural_mask(objects):
+        label = obj['label']
+        if (wall and label in ['duvar', 'Sınıflandırılamadı', 'boş alan']) or \
+                (floor and label in ['zemin', 'Sınıflandırılamadı', 'boş alan']):
+            mask.dilate(size).paint(combined)
+            break
+    for obj in objects:
+        if obj['label'] in CHANGEABLE_OBJECTS:
+            obj['mask'].paint(combined)
+    return combined.astype(np.uint8)
+
+
+def new_compose(shape, objects, wall, floor, size):
+    """generate_redesign_image'daki mask_composition yolu."""
+    from generator import CHANGEABLE_OBJECTS, UNRELIABLE_LABELS, structural_candidate_labels
+    from mask_composition import LabelIndex, compose_mask
+
+    index = LabelIndex(objects)
+    accepted = set(UNRELIABLE_LABELS) | ({'duvar'} if wall else set()) | ({'zemin'} if floor else set())
+    structural = index.first_accepted(structural_candidate_labels(), accepted) if wall or floor else None
+    dilated = [index.objects[structural]['mask']] if structural is not None else []
+    return compose_mask(shape, [index.objects[i]['mask'] for i in index.indices(CHANGEABLE_OBJECTS)],
+                        dilated_masks=dilated, dilation_size=size)
+
+
+def _timed(fn, repeat):
+    """fn'i bir kez ısındırıp repeat kez çalıştırır; (son sonuç, ortalama süre) döndürür."""
+    result = fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    from generator import MASK_DILATION_SIZE
+
+    parser = argparse.ArgumentParser(description="Yeniden tasarım maskesi birleştirme karşılaştırması")
+    parser.add_argument("--size", default="4032x3024", help="Görüntü boyutu, GENİŞLİKxYÜKSEKLİK")
+    parser.add_argument("--objects", type=int, default=150, help="Maske sayısı")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    objects = synthetic_scene(height, width, args.objects)
+    results = []
+    for wall, floor, name in ((True, False, "duvar"), (False, True, "zemin"), (False, False, "mobilya")):
+        row = {'request': name}
+        outputs = {}
+        for method, fn in (('legacy', legacy_compose), ('paint', paint_compose), ('compose', new_compose)):
+            outputs[method], seconds = _timed(lambda: fn((height, width), objects, wall, floor, MASK_DILATION_SIZE),
+                                              args.repeat)
+            row[f'{method}_ms'] = seconds * 1000
+        row['identical'] = all(np.array_equal(outputs['legacy'], outputs[m]) for m in ('paint', 'compose'))
+        row['coverage'] = float(outputs['compose'].mean())
+        results.append(row)
+
+    print(f"{args.objects} maske, {width}x{height}, dilasyon {MASK_DILATION_SIZE}px")
+    print(f"{'İstek':<10}{'legacy (ms)':>13}{'paint (ms)':>12}{'compose (ms)':>14}{'hızlanma':>10}"
+          f"{'kaplama':>9}{'aynı':>6}")
+    for r in results:
+        print(f"{r['request']:<10}{r['legacy_ms']:>13.1f}{r['paint_ms']:>12.1f}{r['compose_ms']:>14.1f}"
+              f"{r['legacy_ms'] / r['compose_ms']:>9.1f}x{r['coverage'] * 100:>8.1f}%"
+              f"{'evet' if r['identical'] else 'HAYIR':>6}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+    if not all(r['identical'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
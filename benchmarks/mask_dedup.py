@@ -0,0 +1,120 @@
+# benchmarks/mask_dedup.py
+"""
+Sınıflandırma öncesi maske tekilleştirme (mask_dedup) karşılaştırması. Paketteki fotoğraflarda SAM
+bir kez çalıştırılır; aynı maske adayları her politika ("off", "suppress", "merge") ve bütçe ile
+sınıflandırılır. Raporlanan: ViT'e giden kırpıntı sayısı ve kazanılan sınıflandırma, tekilleştirme
+ve sınıflandırma süresi, elenen maskelerin etiket tutarlılığı (elenen maskenin "off" çalıştırmasındaki
+etiketi, onu en çok kapsayan tutulan maskenin etiketiyle aynı mı).
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.mask_dedup --stub
+    python -m benchmarks.mask_dedup --stub --points-per-side 16 --max-masks 24
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGES = os.path.join(REPO_ROOT, "test_oda_fotografi*.jpg")
+# Bütçeli satırlarda görüntü başına sınıflandırılacak en fazla maske (mask_dedup varsayılanı: sınırsız)
+DEFAULT_MAX_MASKS = 64
+
+
+def removed_label_agreement(reference, objects, kept):
+    """
+    Elenen her nesne için ("off" çalıştırmasındaki etiketi), onu en çok kapsayan tutulan nesnenin
+    etiketiyle uyumu. reference ve objects aynı sırayla üretilmiş nesne listeleridir.
+    """
+    from mask_composition import mask_intersection
+    from mask_dedup import _source_mask
+
+    kept_ids = {id(obj) for obj in kept}
+    agree = total = 0
+    for obj, reference_obj in zip(objects, reference):
+        if id(obj) in kept_ids:
+            continue
+        source = _source_mask(obj['mask'])
+        overlaps = [(mask_intersection(source, _source_mask(other['mask'])), other) for other in kept]
+        overlap, best = max(overlaps, key=lambda item: item[0], default=(0, None))
+        if overlap == 0:
+            continue  # bütçe dışı kalan, hiçbir tutulan maskeyle örtüşmeyen nesne
+        total += 1
+        agree += best['label'] == reference_obj['label']
+    return agree, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sınıflandırma öncesi maske tekilleştirme karşılaştırması")
+    parser.add_argument("--stub", action="store_true", help="Ağırlıksız yedek SAM/ViT kullan")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Ölçümde kullanılacak görüntüler (glob)")
+    parser.add_argument("--points-per-side", type=int, help="Izgara boyutu (varsayılan: SAM ayarı)")
+    parser.add_argument("--max-masks", type=int, default=DEFAULT_MAX_MASKS, help="Bütçeli satırların bütçesi")
+    parser.add_argument("--max-side", type=int, default=1024)
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    import model_loader
+    if args.stub:
+        from benchmarks.stubs import install_stub_models, STUB_SAM_SETTINGS
+        install_stub_models()
+        model_loader.SAM_GENERATOR_SETTINGS.update(STUB_SAM_SETTINGS)
+    from mask_dedup import deduplicate_objects
+    from model_loader import classify_objects, generate_masks, get_sam_model, prepare_objects
+    from utils import read_image
+
+    max_masks = args.max_masks
+    overrides = {'points_per_side': args.points_per_side} if args.points_per_side else {}
+    sam_model = get_sam_model()
+    samples = []
+    for path in sorted(glob.glob(args.images)):
+        image = read_image(path)
+        samples.append((os.path.basename(path), image,
+                        generate_masks(image, sam_model, max_side=args.max_side, **overrides)))
+
+    rows = []
+    for policy, budget in (("off", 0), ("suppress", 0), ("suppress", max_masks), ("merge", max_masks)):
+        row = {'policy': policy, 'max_masks': budget or None, 'masks': 0, 'classified': 0,
+               'dedup_s': 0.0, 'classify_s': 0.0, 'duplicate': 0, 'nested': 0, 'budget': 0,
+               'agree': 0, 'compared': 0}
+        for index, (name, image, results) in enumerate(samples):
+            objects = prepare_objects(image, results)
+            stats = {}
+            t0 = time.perf_counter()
+            kept = deduplicate_objects(objects, policy=policy, max_masks=budget, stats=stats)
+            row['dedup_s'] += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            classify_objects(image, kept)
+            row['classify_s'] += time.perf_counter() - t0
+            row['masks'] += stats['input']
+            row['classified'] += stats['kept']
+            for reason in ('duplicate', 'nested', 'budget'):
+                row[reason] += stats[reason]
+            if policy == "off":
+                row.setdefault('_reference', []).append(kept)
+            elif policy == "suppress":
+                agree, compared = removed_label_agreement(rows[0]['_reference'][index], objects, kept)
+                row['agree'] += agree
+                row['compared'] += compared
+        row['saved'] = row['masks'] - row['classified']
+        rows.append(row)
+
+    print(f"\n{len(samples)} görüntü, {rows[0]['masks']} maske adayı")
+    print(f"{'Politika':<10}{'bütçe':>7}{'ViT':>6}{'kazanç':>8}{'yinelenen':>11}{'iç içe':>8}{'bütçe d.':>10}"
+          f"{'tekil. (ms)':>13}{'sınıfl. (s)':>13}{'etiket uyumu':>14}")
+    for r in rows:
+        agreement = f"{r['agree'] / r['compared'] * 100:.1f}% ({r['compared']})" if r['compared'] else "-"
+        print(f"{r['policy']:<10}{str(r['max_masks'] or '-'):>7}{r['classified']:>6}"
+              f"{r['saved'] / max(r['masks'], 1) * 100:>7.0f}%{r['duplicate']:>11}{r['nested']:>8}{r['budget']:>10}"
+              f"{r['dedup_s'] * 1000:>13.1f}{r['classify_s']:>13.2f}{agreement:>14}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump([{k: v for k, v in r.items() if not k.startswith('_')} for r in rows], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/mask_memory.py
+"""
+Tam kare boolean maskeler ile CompactMask arasında tepe bellek (max RSS) ve süre karşılaştırması.
+Her temsil ayrı bir alt süreçte ölçülür; maskeler SAM çıktısına benzeyen sentetik elipslerdir.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.mask_memory
+    python -m benchmarks.mask_memory --width 4000 --height 3000 --masks 100
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_masks(height, width, count, seed=0):
+    """Farklı boyutlarda elips maskeleri (tam kare, uint8) tek tek üretir."""
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        mask = np.zeros((height, width), dtype=np.uint8)
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        axes = (int(rng.integers(20, width // 4)), int(rng.integers(20, height // 4)))
+        cv2.ellipse(mask, center, axes, float(rng.uniform(0, 180)), 0, 360, 1, -1)
+        yield mask.astype(bool)
+
+
+def run_mode(mode, height, width, count):
+    """Tek bir temsili ölçer (alt süreçte çalışır)."""
+    sys.path.insert(0, REPO_ROOT)
+    from compact_mask import CompactMask
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    t0 = time.perf_counter()
+    if mode == "dense":
+        masks = [mask for mask in synthetic_masks(height, width, count)]
+    else:
+        masks = [CompactMask.from_dense(mask) for mask in synthetic_masks(height, width, count)]
+    t1 = time.perf_counter()
+
+    # generate_redesign_image'daki birleşim adımının eşdeğeri
+    if mode == "dense":
+        combined = np.zeros((height, width), dtype=bool)
+        for mask in masks:
+            combined = np.logical_or(combined, mask)
+    else:
+        combined = np.zeros((height, width), dtype=bool)
+        for mask in masks:
+            mask.paint(combined)
+    t2 = time.perf_counter()
+
+    stored = sum(m.nbytes for m in masks)
+    return {
+        "build_s": t1 - t0,
+        "union_s": t2 - t1,
+        "stored_mb": stored / 2 ** 20,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_rss_delta_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) / 1024,
+        "union_area": int(combined.sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maske temsili bellek karşılaştırması")
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--masks", type=int, default=80)
+    parser.add_argument("--mode", choices=["dense", "compact"], help=argparse.SUPPRESS)
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.height, args.width, args.masks)))
+        return
+
+    results = {}
+    for mode in ("dense", "compact"):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.mask_memory", "--mode", mode, "--height", str(args.height),
+             "--width", str(args.width), "--masks", str(args.masks)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(f"{args.masks} maske, {args.width}x{args.height} görüntü")
+    print(f"{'Temsil':<10}{'saklanan (MB)':>15}{'tepe RSS (MB)':>15}{'oluşturma (s)':>15}{'birleşim (s)':>14}")
+    for mode, r in results.items():
+        print(f"{mode:<10}{r['stored_mb']:>15.1f}{r['peak_rss_mb']:>15.0f}{r['build_s']:>15.2f}{r['union_s']:>14.3f}")
+    if results["dense"]["union_area"] != results["compact"]["union_area"]:
+        print("UYARI: Birleşim sonuçları farklı!")
+    print(f"Tepe RSS azalması: {results['dense']['peak_rss_mb'] - results['compact']['peak_rss_mb']:.0f} MB")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# benchmarks/model_profiles.py
+"""
+Model profilleri karşılaştırması: her SAM profili (model_loader.SAM_PROFILES) ve her ViT profili
+(classifier.CLASSIFIER_PROFILES) varsayılan profille paketteki fotoğraflarda karşılaştırılır.
+
+  SAM : her profil aynı görüntüleri gömme önbelleği boşken segmentler; süre, ağırlık boyutu,
+        maske sayısı ve varsayılan profilin maskelerine göre ortalama en iyi IoU / recall@0.75
+  ViT : varsayılan SAM profilinin maskeleri her ViT profiliyle sınıflandırılır; süre, kırpıntı
+        başına gecikme, ağırlık boyutu ve varsayılan profille etiket uyumu
+
+Yükleyiciler:
+  (varsayılan)      gerçek ağırlıklar (models/ altındaki SAM dosyaları, Hugging Face ViT modelleri)
+  --stub            yedek modeller; nicemleme yedek ViT'in Linear katmanına uygulanır, SAM
+                    omurgaları aynıdır (yalnızca akışın doğrulanması için)
+  --random-weights  gerçek mimariler rastgele ağırlıklarla: gecikme ve boyut gerçektir; aynı tohumla
+                    kurulduğundan yalnızca fp32 <-> int8 uyumu (nicemleme hatası) anlamlıdır.
+                    Rastgele SAM'ın maskeleri kalite eşiklerini geçmediğinden eşikler
+                    --pred-iou-thresh / --stability-thresh ile gevşetilebilir
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.model_profiles
+    python -m benchmarks.model_profiles --stub
+    python -m benchmarks.model_profiles --random-weights --images test_oda_fotografi2.jpg \
+        --sam-profiles vit_b vit_b-int8 --baseline-sam vit_b --pred-iou-thresh 0 --stability-thresh 0
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGES = os.path.join(REPO_ROOT, "test_oda_fotografi*.jpg")
+MATCH_IOU = 0.75
+
+
+def _ordered(baseline, names):
+    """Varsayılan profil her zaman önce çalışır (diğerleri onunla karşılaştırılır)."""
+    return [baseline] + [name for name in names if name != baseline]
+
+
+def compare_sam_profiles(images, names, baseline, max_side, overrides):
+    """SAM profillerini çalıştırır; (satırlar, varsayılan profilin SAM sonuçları) döndürür."""
+    import numpy as np
+    import model_loader
+    from benchmarks.adaptive_prompts import best_ious
+    from compact_mask import CompactMask
+    from model_registry import registry
+    from quantization import serialized_size_mb
+
+    rows, reference, baseline_results = [], None, None
+    for name in _ordered(baseline, names):
+        model_loader.set_sam_profile(name)
+        t0 = time.perf_counter()
+        sam_model = model_loader.get_sam_model()
+        load_s = time.perf_counter() - t0
+        if sam_model is None:
+            rows.append({'profile': name, 'error': "yüklenemedi"})
+            continue
+        engine = model_loader.get_segmentation_engine(sam_model)
+
+        seconds, masks, results = 0.0, [], []
+        for image in images:
+            engine.embedding_cache.clear()
+            t0 = time.perf_counter()
+            image_results = engine.generate(image, max_side=max_side, **overrides)
+            seconds += time.perf_counter() - t0
+            results.append(image_results)
+            masks.append([CompactMask.from_rle(r['segmentation']) for r in image_results])
+
+        row = {'profile': name, 'load_s': load_s, 'seconds_per_image': seconds / len(images),
+               'encoder_mb': serialized_size_mb(sam_model.image_encoder),
+               'masks': sum(len(m) for m in masks)}
+        if reference is None:
+            reference, baseline_results = masks, results
+        else:
+            ious = np.concatenate([best_ious(ref, cur) for ref, cur in zip(reference, masks)])
+            row['mean_best_iou'] = float(ious.mean()) if ious.size else None
+            row[f'recall@{MATCH_IOU}'] = float((ious >= MATCH_IOU).mean()) if ious.size else None
+        rows.append(row)
+        registry.release("sam")
+    return rows, baseline_results
+
+
+def compare_vit_profiles(images, baseline_results, names, baseline):
+    """Aynı nesneleri her ViT profiliyle sınıflandırır."""
+    import classifier
+    from model_loader import classify_objects, prepare_objects
+    from model_registry import registry
+    from quantization import serialized_size_mb
+
+    rows, reference = [], None
+    for name in _ordered(baseline, names):
+        classifier.set_classifier_profile(name)
+        t0 = time.perf_counter()
+        _, classification_model = classifier.get_classifier()
+        load_s = time.perf_counter() - t0
+        if classification_model is None:
+            rows.append({'profile': name, 'error': "yüklenemedi"})
+            continue
+
+        seconds, labels = 0.0, []
+        for image, results in zip(images, baseline_results):
+            objects = prepare_objects(image, results)
+            t0 = time.perf_counter()
+            classify_objects(image, objects)
+            seconds += time.perf_counter() - t0
+            labels.extend(obj['label'] for obj in objects)
+
+        row = {'profile': name, 'load_s': load_s, 'seconds_per_image': seconds / len(images),
+               'ms_per_crop': seconds * 1000 / max(len(labels), 1),
+               'model_mb': serialized_size_mb(classification_model), 'crops': len(labels)}
+        if reference is None:
+            reference = labels
+        else:
+            row['label_agreement'] = (sum(a == b for a, b in zip(reference, labels)) / len(labels)
+                                      if labels else None)
+        rows.append(row)
+        registry.release("vit")
+    return rows
+
+
+def main():
+    import classifier
+    import model_loader
+
+    parser = argparse.ArgumentParser(description="SAM/ViT profilleri: doğruluk ve gecikme karşılaştırması")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--stub", action="store_true", help="Ağırlıksız yedek SAM/ViT kullan")
+    group.add_argument("--random-weights", action="store_true",
+                       help="Gerçek mimarileri rastgele ağırlıklarla kur (gecikme/boyut ölçümü)")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Ölçümde kullanılacak görüntüler (glob)")
+    parser.add_argument("--sam-profiles", nargs="*", default=list(model_loader.SAM_PROFILES),
+                        choices=list(model_loader.SAM_PROFILES))
+    parser.add_argument("--vit-profiles", nargs="*", default=list(classifier.CLASSIFIER_PROFILES),
+                        choices=list(classifier.CLASSIFIER_PROFILES))
+    parser.add_argument("--baseline-sam", default=model_loader.SAM_PROFILE, choices=list(model_loader.SAM_PROFILES))
+    parser.add_argument("--baseline-vit", default=classifier.CLASSIFIER_PROFILE,
+                        choices=list(classifier.CLASSIFIER_PROFILES))
+    parser.add_argument("--points-per-side", type=int, help="Izgara boyutu (varsayılan: SAM ayarı)")
+    parser.add_argument("--pred-iou-thresh", type=float, help="SAM pred_iou_thresh (varsayılan: SAM ayarı)")
+    parser.add_argument("--stability-thresh", type=float, help="SAM stability_score_thresh (varsayılan: SAM ayarı)")
+    parser.add_argument("--max-side", type=int, default=1024)
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    if args.stub:
+        from benchmarks.stubs import install_stub_models, STUB_SAM_SETTINGS
+        install_stub_models()
+        model_loader.SAM_GENERATOR_SETTINGS.update(STUB_SAM_SETTINGS)
+    elif args.random_weights:
+        from benchmarks.stubs import install_random_weight_models
+        install_random_weight_models()
+    from utils import read_image
+
+    images = [read_image(path) for path in sorted(glob.glob(args.images))]
+    overrides = {key: value for key, value in (('points_per_side', args.points_per_side),
+                                               ('pred_iou_thresh', args.pred_iou_thresh),
+                                               ('stability_score_thresh', args.stability_thresh))
+                 if value is not None}
+
+    sam_rows, baseline_results = compare_sam_profiles(images, args.sam_profiles, args.baseline_sam,
+                                                      args.max_side, overrides)
+    model_loader.set_sam_profile(args.baseline_sam)
+    vit_rows = compare_vit_profiles(images, baseline_results, args.vit_profiles, args.baseline_vit) \
+        if baseline_results is not None else []
+    classifier.set_classifier_profile(args.baseline_vit)
+
+    def ratio(value, percent=True):
+        if value is None:
+            return "-"
+        return f"{value * 100:.1f}%" if percent else f"{value:.3f}"
+
+    print(f"\n{len(images)} görüntü; varsayılan profiller: SAM {args.baseline_sam}, ViT {args.baseline_vit}")
+    print(f"{'SAM profili':<14}{'yükleme (s)':>12}{'s/görüntü':>11}{'kodlayıcı MB':>14}{'maske':>7}"
+          f"{'ort. IoU':>10}{'recall@' + str(MATCH_IOU):>13}")
+    for r in sam_rows:
+        if 'error' in r:
+            print(f"{r['profile']:<14}{r['error']:>12}")
+            continue
+        print(f"{r['profile']:<14}{r['load_s']:>12.1f}{r['seconds_per_image']:>11.2f}{r['encoder_mb']:>14.1f}"
+              f"{r['masks']:>7}{ratio(r.get('mean_best_iou', 1.0), percent=False):>10}"
+              f"{ratio(r.get(f'recall@{MATCH_IOU}', 1.0)):>13}")
+    print(f"\n{'ViT profili':<14}{'yükleme (s)':>12}{'s/görüntü':>11}{'ms/kırpıntı':>13}{'model MB':>10}"
+          f"{'kırpıntı':>10}{'etiket uyumu':>14}")
+    for r in vit_rows:
+        if 'error' in r:
+            print(f"{r['profile']:<14}{r['error']:>12}")
+            continue
+        print(f"{r['profile']:<14}{r['load_s']:>12.1f}{r['seconds_per_image']:>11.2f}{r['ms_per_crop']:>13.1f}"
+              f"{r['model_mb']:>10.1f}{r['crops']:>10}{ratio(r.get('label_agreement', 1.0)):>14}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({'sam': sam_rows, 'vit': vit_rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
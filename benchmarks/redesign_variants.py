@@ -0,0 +1,114 @@
+# benchmarks/redesign_variants.py
+"""
+Çoklu stil yeniden tasarımı: N varyantın generate_redesign_image ile tek tek üretilmesi ile
+generate_redesign_variants'ın tek batch'li çağrısı karşılaştırılır. Paketteki fotoğrafta sentetik
+mobilya maskeleri (benchmarks.inpainting) kullanılır. Üç çalıştırma ölçülür:
+
+  tek tek         her prompt × tohum için ayrı çağrı (önbellekler boş başlar)
+  batch (soğuk)   tek generate_redesign_variants çağrısı, önbellekler boş
+  batch (sıcak)   aynı görüntüyle ikinci çağrı: negatif prompt gömmesi ve maskeli latent önbellekten
+
+Raporlanan: toplam süre, difüzyon süresi, pipeline çağrısı, önbellek isabetleri ve batch varyantlarının
+tek tek üretilenlerle en büyük piksel farkı (aynı tohum aynı gürültüden başlar; fark yalnızca batch'li
+kayan nokta toplamlarından gelir). Fark MAX_PIXEL_DIFF'i aşarsa çıkış kodu 1'dir.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.redesign_variants --stub
+    python -m benchmarks.redesign_variants --stub --prompts modern boho endüstriyel --seeds 1 2 --steps 10
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGE = os.path.join(REPO_ROOT, "test_oda_fotografi2.jpg")
+# Batch varyantlarıyla tek tek üretilenler arasında izin verilen en büyük piksel farkı
+MAX_PIXEL_DIFF = 1
+DEFAULT_PROMPTS = ["modern minimalist koltuklar", "iskandinav tarzı ahşap mobilya", "endüstriyel deri koltuk"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çoklu stil yeniden tasarım: tek tek vs tek batch'li çağrı")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--stub", action="store_true", help="Ağırlıksız küçük yedek pipeline kullan")
+    parser.add_argument("--prompts", nargs="+", default=DEFAULT_PROMPTS, help="Stil prompt'ları")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[42], help="Tohumlar (prompt başına)")
+    parser.add_argument("--profile", default="fast", help="Inpainting profili")
+    parser.add_argument("--steps", type=int, help="Adım sayısı (varsayılan: profilin)")
+    parser.add_argument("--batch-size", type=int, help="Çağrı başına varyant (varsayılan: VARIANT_BATCH_SIZE)")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    if args.stub:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    import generator
+    from benchmarks.inpainting import furniture_objects
+    from utils import read_image
+
+    if args.stub:
+        from benchmarks.stubs import install_stub_inpainting
+        install_stub_inpainting()
+    image = read_image(args.image)
+    objects = furniture_objects(*image.shape[:2])
+    if generator.load_generator_pipeline() is None:
+        sys.exit(1)
+
+    rows = []
+    generator.clear_redesign_cache()
+    sequential = []
+    row = {'run': "tek tek", 'seconds': 0.0, 'diffusion_s': 0.0, 'batches': 0, 'masked_latent_cache_hits': 0,
+           'negative_embeds_cache_hits': 0}
+    t0 = time.perf_counter()
+    for prompt in args.prompts:
+        for seed in args.seeds:
+            stats = {}
+            sequential.append(np.asarray(generator.generate_redesign_image(
+                image, objects, prompt, profile=args.profile, steps=args.steps, seed=seed, stats=stats)))
+            row['diffusion_s'] += stats['seconds']
+            for key in ('batches', 'masked_latent_cache_hits', 'negative_embeds_cache_hits'):
+                row[key] += stats[key]
+    row['seconds'] = time.perf_counter() - t0
+    rows.append(row)
+
+    for run in ("batch (soğuk)", "batch (sıcak)"):
+        if run == "batch (soğuk)":
+            generator.clear_redesign_cache()
+        stats = {}
+        t0 = time.perf_counter()
+        variants = generator.generate_redesign_variants(image, objects, args.prompts, seeds=args.seeds,
+                                                        profile=args.profile, steps=args.steps,
+                                                        batch_size=args.batch_size, stats=stats)
+        seconds = time.perf_counter() - t0
+        diff = max(int(np.abs(np.asarray(v, dtype=np.int16) - s).max()) for v, s in zip(variants, sequential))
+        rows.append({'run': run, 'seconds': seconds, 'diffusion_s': stats['seconds'], 'batches': stats['batches'],
+                     'masked_latent_cache_hits': stats['masked_latent_cache_hits'],
+                     'negative_embeds_cache_hits': stats['negative_embeds_cache_hits'], 'max_pixel_diff': diff})
+
+    print(f"\n{len(args.prompts)} prompt × {len(args.seeds)} tohum = {len(sequential)} varyant, profil: {args.profile}")
+    print(f"{'Çalıştırma':<16}{'süre (s)':>10}{'difüzyon (s)':>14}{'çağrı':>7}{'latent isabet':>15}"
+          f"{'negatif isabet':>16}{'en büyük fark':>15}")
+    for r in rows:
+        diff = str(r['max_pixel_diff']) if 'max_pixel_diff' in r else "-"
+        print(f"{r['run']:<16}{r['seconds']:>10.2f}{r['diffusion_s']:>14.2f}{r['batches']:>7}"
+              f"{r['masked_latent_cache_hits']:>15}{r['negative_embeds_cache_hits']:>16}{diff:>15}")
+    base = rows[0]['seconds']
+    for r in rows[1:]:
+        print(f"{r['run']} / tek tek: {base / r['seconds']:.2f}x hızlı")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+
+    worst = max(r['max_pixel_diff'] for r in rows[1:])
+    if worst > MAX_PIXEL_DIFF:
+        print(f"HATA: batch varyantları tek tek üretilenlerden {worst} gri düzey farklı (izin: {MAX_PIXEL_DIFF}).")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
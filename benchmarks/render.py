@@ -0,0 +1,119 @@
+# benchmarks/render.py
+"""
+Sonuç görselleştirme karşılaştırması: eski matplotlib yolu (figür + maske başına imshow + ax.text,
+PNG'ye savefig) ile renderer.render_results (etiket indeks görüntüsü + renk tablosu + OpenCV metni,
+cv2 ile PNG/JPEG/WebP). Maskeler paketteki fotoğraflar üzerinde sentetik olarak üretilir; model gerekmez.
+Aynı girdinin iki kez çizilmesinin bayt bayt aynı çıktı verdiği de kontrol edilir.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.render
+    python -m benchmarks.render --objects 200 --upscale 3 --repeat 3
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGES = os.path.join(REPO_ROOT, "test_oda_fotografi*.jpg")
+
+
+def synthetic_classified_objects(height, width, count, seed=0):
+    """get_segmentation_masks çıktısına benzeyen (mask, bbox, label) kayıtları üretir."""
+    from benchmarks.crop_preprocessing import synthetic_objects
+    from labels import TRANSLATION_DICT
+
+    names = sorted(set(TRANSLATION_DICT.values()))
+    rng = np.random.default_rng(seed)
+    return [{'mask': mask, 'bbox': mask.bbox, 'label': names[int(rng.integers(len(names)))]}
+            for _, mask, _ in synthetic_objects(height, width, count, seed)]
+
+
+def matplotlib_render(image, classified_objects, title):
+    """Eski display_results yolu; plt.show() yerine PNG tamponuna savefig ile ölçülür."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from utils import show_mask
+
+    np.random.seed(0)
+    plt.figure(figsize=(10, 10))
+    plt.imshow(image)
+    ax = plt.gca()
+    for obj in classified_objects:
+        x, y, w, h = obj['bbox']
+        show_mask(obj['mask'], ax, random_color=True)
+        ax.text(int(x), int(y) - 10, obj['label'], color='white', fontsize=12, weight='bold',
+                bbox=dict(facecolor='black', alpha=0.5, edgecolor='none', pad=2))
+    plt.title(title)
+    plt.axis('off')
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format="png")
+    plt.close()
+    return buffer.getvalue()
+
+
+def _timed(fn, repeat):
+    """fn'i bir kez ısındırıp repeat kez çalıştırır; (son sonuç, ortalama süre) döndürür."""
+    result = fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def bench_image(path, count, repeat, upscale):
+    from renderer import render_results
+
+    image = cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB)
+    if upscale != 1.0:
+        image = cv2.resize(image, None, fx=upscale, fy=upscale, interpolation=cv2.INTER_CUBIC)
+    H, W = image.shape[:2]
+    objects = synthetic_classified_objects(H, W, count)
+    title = "Tespit Edilen Nesneler ve Etiketler"
+
+    result = {'image': os.path.basename(path), 'size': f"{W}x{H}", 'objects': count}
+    _, result['matplotlib_ms'] = _timed(lambda: matplotlib_render(image, objects, title), repeat)
+    for fmt in (".png", ".jpg", ".webp"):
+        encoded, seconds = _timed(lambda: render_results(image, objects, fmt=fmt, title=title), repeat)
+        result[f'{fmt[1:]}_ms'] = seconds
+        result[f'{fmt[1:]}_kb'] = len(encoded) / 1024
+        if fmt == ".png":
+            result['deterministic'] = encoded == render_results(image, objects, fmt=fmt, title=title)
+    for key in ('matplotlib_ms', 'png_ms', 'jpg_ms', 'webp_ms'):
+        result[key] *= 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="matplotlib ve OpenCV sonuç görselleştirme karşılaştırması")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Ölçümde kullanılacak görüntüler (glob)")
+    parser.add_argument("--objects", type=int, default=100, help="Görüntü başına maske sayısı")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--upscale", type=float, default=1.0, help="Görüntüleri ölçümden önce büyütme katsayısı")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    results = [bench_image(path, args.objects, args.repeat, args.upscale) for path in sorted(glob.glob(args.images))]
+
+    print(f"{'Görüntü':<26}{'boyut':>11}{'maske':>7}{'matplotlib (ms)':>17}{'png':>8}{'jpg':>8}{'webp':>8}"
+          f"{'hızlanma':>10}{'belirleyici':>13}")
+    for r in results:
+        print(f"{r['image']:<26}{r['size']:>11}{r['objects']:>7}{r['matplotlib_ms']:>17.0f}{r['png_ms']:>8.1f}"
+              f"{r['jpg_ms']:>8.1f}{r['webp_ms']:>8.1f}{r['matplotlib_ms'] / r['png_ms']:>9.0f}x"
+              f"{'evet' if r['deterministic'] else 'HAYIR':>13}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/segmentation_resolution.py
+"""
+Küçültülmüş (max_side) segmentasyon ile tam çözünürlüklü segmentasyonun süre ve maske IoU
+karşılaştırması. Her tam çözünürlüklü maske, küçültülmüş çalıştırmadaki en iyi eşleşen maskeyle
+karşılaştırılır ("eşleşme": IoU >= MATCH_IOU olan referans maske oranı). Küçültülmüş maskeler
+IoU için tam çözünürlüğe büyütülür; tüketicinin ödeyeceği bu maliyet "büyütme" sütunundadır.
+
+Paketteki fotoğraflar küçük olduğundan --upscale ile telefon fotoğrafı boyutları taklit edilebilir.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.segmentation_resolution
+    python -m benchmarks.segmentation_resolution --upscale 3 --max-side 1024 768
+    python -m benchmarks.segmentation_resolution --stub      # ağırlıksız yedek SAM ile
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGES = os.path.join(REPO_ROOT, "test_oda_fotografi*.jpg")
+
+# Bir tam çözünürlüklü maskenin "bulundu" sayılması için gereken en düşük IoU
+MATCH_IOU = 0.75
+
+
+def mask_iou(a, b):
+    """İki (Compact/LazyUpsampled) maskenin IoU'su; yalnızca bbox'ların birleşim bölgesinde hesaplanır."""
+    ax, ay, aw, ah = a.bbox
+    bx, by, bw, bh = b.bbox
+    if ax >= bx + bw or bx >= ax + aw or ay >= by + bh or by >= ay + ah:
+        return 0.0
+    x0, y0 = min(ax, bx), min(ay, by)
+    x1, y1 = max(ax + aw, bx + bw), max(ay + ah, by + bh)
+    local_a = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+    local_b = np.zeros_like(local_a)
+    local_a[ay - y0:ay - y0 + ah, ax - x0:ax - x0 + aw] = a.crop()
+    local_b[by - y0:by - y0 + bh, bx - x0:bx - x0 + bw] = b.crop()
+    union = np.count_nonzero(local_a | local_b)
+    return np.count_nonzero(local_a & local_b) / union if union else 0.0
+
+
+def run_once(image, sam_model, max_side):
+    """Yeni bir motorla (önbelleksiz) segmentasyon yapar; (maskeler, segmentasyon s, büyütme s) döndürür."""
+    import model_loader
+    from compact_mask import CompactMask, LazyUpsampledMask
+    from segmentation_engine import SegmentationEngine
+
+    H, W = image.shape[:2]
+    engine = SegmentationEngine(sam_model, **model_loader.SAM_GENERATOR_SETTINGS)
+    t0 = time.perf_counter()
+    results = engine.generate(image, max_side=max_side)
+    masks = []
+    for result in results:
+        mask = CompactMask.from_rle(result['segmentation'])
+        masks.append(mask if mask.shape == (H, W) else LazyUpsampledMask(mask, (H, W)))
+    t1 = time.perf_counter()
+    for mask in masks:
+        if isinstance(mask, LazyUpsampledMask):
+            mask.full()
+    t2 = time.perf_counter()
+    return masks, t1 - t0, t2 - t1
+
+
+def compare(reference, candidate):
+    """Her referans maske için adaylar arasındaki en yüksek IoU'yu döndürür."""
+    return [max((mask_iou(ref, cand) for cand in candidate), default=0.0) for ref in reference]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Küçültülmüş ve tam çözünürlüklü segmentasyon karşılaştırması")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Ölçümde kullanılacak görüntüler (glob)")
+    parser.add_argument("--max-side", type=int, nargs="+", default=[1024, 512])
+    parser.add_argument("--upscale", type=float, default=1.0, help="Görüntüleri ölçümden önce büyütme katsayısı")
+    parser.add_argument("--stub", action="store_true", help="Ağırlıksız yedek SAM kullan")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    import model_loader
+    if args.stub:
+        from benchmarks.stubs import install_stub_models, STUB_SAM_SETTINGS
+        install_stub_models()
+        model_loader.SAM_GENERATOR_SETTINGS.update(STUB_SAM_SETTINGS)
+    sam_model = model_loader.get_sam_model()
+    if sam_model is None:
+        print("SAM modeli yüklenemedi (ağırlıklar olmadan --stub kullanın).")
+        return
+
+    results = []
+    for path in sorted(glob.glob(args.images)):
+        image = cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB)
+        if args.upscale != 1.0:
+            image = cv2.resize(image, None, fx=args.upscale, fy=args.upscale, interpolation=cv2.INTER_CUBIC)
+        H, W = image.shape[:2]
+
+        reference, full_s, _ = run_once(image, sam_model, max_side=None)
+        rows = [{'image': os.path.basename(path), 'size': f"{W}x{H}", 'max_side': None,
+                 'masks': len(reference), 'segment_s': full_s, 'upsample_s': 0.0, 'mean_iou': 1.0,
+                 'min_iou': 1.0, 'recall': 1.0}]
+        for max_side in args.max_side:
+            if max_side >= max(H, W):
+                continue
+            masks, segment_s, upsample_s = run_once(image, sam_model, max_side=max_side)
+            ious = compare(reference, masks)
+            rows.append({'image': os.path.basename(path), 'size': f"{W}x{H}", 'max_side': max_side,
+                         'masks': len(masks), 'segment_s': segment_s, 'upsample_s': upsample_s,
+                         'mean_iou': float(np.mean(ious)) if ious else 1.0,
+                         'min_iou': float(np.min(ious)) if ious else 1.0,
+                         'recall': float(np.mean([iou >= MATCH_IOU for iou in ious])) if ious else 1.0})
+        results.extend(rows)
+
+    print(f"{'Görüntü':<26}{'boyut':>11}{'max_side':>10}{'maske':>7}{'segment (s)':>13}{'büyütme (s)':>13}"
+          f"{'ort. IoU':>10}{'min IoU':>9}{'eşleşme':>9}")
+    for r in results:
+        print(f"{r['image']:<26}{r['size']:>11}{r['max_side'] or 'tam':>10}{r['masks']:>7}{r['segment_s']:>13.2f}"
+              f"{r['upsample_s']:>13.2f}{r['mean_iou']:>10.3f}{r['min_iou']:>9.3f}{r['recall']:>9.2f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
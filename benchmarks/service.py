@@ -0,0 +1,168 @@
+# benchmarks/service.py
+"""
+HTTP çıkarım servisi (server.py) için yerel istemci. --url verilmezse servis aynı süreçte boş bir
+portta başlatılır (--stub ile ağırlıksız yedek modellerle). Eşzamanlı istemciler paketteki
+fotoğrafları /segment'e gönderir; gecikme yüzdelikleri, 503 (geri basınç) sayısı, ViT batch'leyici
+istatistikleri ve etiketlerin batch'leyicisiz doğrudan çağrıyla uyumu raporlanır. 503 dışı hata
+ya da etiket uyumsuzluğu olursa komut 1 ile çıkar.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.service --stub
+    python -m benchmarks.service --stub --clients 8 --max-inflight 2     # geri basıncı gözlemle
+    python -m benchmarks.service --url http://127.0.0.1:8080              # çalışan servise bağlan
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGES = os.path.join(REPO_ROOT, "test_oda_fotografi*.jpg")
+
+
+def request(url, body=None, timeout=600):
+    """(durum kodu, yanıt gövdesi, süre s) döndürür; HTTP hataları da sonuç olarak döner."""
+    req = urllib.request.Request(url, data=body, method="POST" if body is not None else "GET",
+                                 headers={"Content-Type": "application/octet-stream"} if body else {})
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, response.read(), time.perf_counter() - t0
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(), time.perf_counter() - t0
+
+
+def start_local_server(args):
+    """Servisi bu süreçte, arka plan thread'inde başlatır; (sunucu, taban URL) döndürür."""
+    if args.stub:
+        from benchmarks.stubs import install_stub_models, STUB_SAM_SETTINGS
+        install_stub_models()
+        import model_loader
+        model_loader.SAM_GENERATOR_SETTINGS.update(STUB_SAM_SETTINGS)
+    import server
+    from vit_batcher import DynamicBatcher
+    from classifier import vit_forward
+
+    batcher = DynamicBatcher(vit_forward, max_batch_size=args.max_batch, max_latency_ms=args.window_ms,
+                             max_queue_depth=args.max_queue)
+    service = server.InferenceService(batcher, max_inflight=args.max_inflight)
+    service.warmup()
+    httpd = server.make_server(service, "127.0.0.1", 0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+def direct_labels(paths, max_side):
+    """Aynı görüntülerin batch'leyicisiz, doğrudan get_segmentation_masks etiketleri."""
+    import classifier
+    from model_loader import get_sam_model, get_segmentation_masks
+    from utils import read_image
+
+    batcher = classifier.get_vit_batcher()
+    classifier.set_vit_batcher(None)
+    try:
+        return {path: [obj['label'] for obj in get_segmentation_masks(read_image(path), get_sam_model(),
+                                                                      max_side=max_side)]
+                for path in paths}
+    finally:
+        classifier.set_vit_batcher(batcher)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP çıkarım servisi yük istemcisi")
+    parser.add_argument("--url", help="Çalışan servisin adresi (verilmezse yerel servis başlatılır)")
+    parser.add_argument("--stub", action="store_true", help="Yerel serviste ağırlıksız yedek modelleri kullan")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Gönderilecek görüntüler (glob)")
+    parser.add_argument("--clients", type=int, default=4, help="Eşzamanlı istemci sayısı")
+    parser.add_argument("--requests", type=int, default=2, help="İstemci başına istek sayısı")
+    parser.add_argument("--max-side", type=int, default=512, help="İsteklerde gönderilen max_side")
+    parser.add_argument("--window-ms", type=float, default=10)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-queue", type=int, default=256)
+    parser.add_argument("--max-inflight", type=int, default=8)
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    httpd = None
+    base_url = args.url
+    if base_url is None:
+        httpd, base_url = start_local_server(args)
+
+    status, body, _ = request(f"{base_url}/health")
+    print(f"/health: {status} {body.decode()}")
+
+    paths = sorted(glob.glob(args.images))
+    payloads = {path: open(path, "rb").read() for path in paths}
+    results = []
+    lock = threading.Lock()
+
+    def client(index):
+        for r in range(args.requests):
+            path = paths[(index + r) % len(paths)]
+            status, body, seconds = request(f"{base_url}/segment?max_side={args.max_side}&masks=0", payloads[path])
+            labels = [obj['label'] for obj in json.loads(body)['objects']] if status == 200 else None
+            with lock:
+                results.append({'image': path, 'status': status, 'seconds': seconds, 'labels': labels})
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - t0
+
+    ok = [r for r in results if r['status'] == 200]
+    latencies = np.array([r['seconds'] for r in ok]) * 1000
+    report = {
+        'requests': len(results),
+        'ok': len(ok),
+        'rejected_503': sum(r['status'] == 503 for r in results),
+        'errors': sum(r['status'] not in (200, 503) for r in results),
+        'wall_s': round(wall, 2),
+        'requests_per_s': round(len(ok) / wall, 3),
+    }
+    if latencies.size:
+        report.update({f'p{q}_ms': round(float(np.percentile(latencies, q)), 1) for q in (50, 95, 99)})
+    status, body, _ = request(f"{base_url}/metrics")
+    report['metrics'] = json.loads(body)
+
+    if httpd is not None:
+        # Etiketler batch'leyicisiz doğrudan yolla karşılaştırılır (aynı süreçteki modellerle)
+        reference = direct_labels(paths, args.max_side)
+        matched = sum(r['labels'] == reference[r['image']] for r in ok)
+        report['label_agreement'] = matched / len(ok) if ok else None
+        httpd.shutdown()
+
+    print(f"\n{report['requests']} istek ({args.clients} istemci): {report['ok']} başarılı, "
+          f"{report['rejected_503']} reddedildi (503), {report['errors']} hata")
+    print(f"Toplam süre: {report['wall_s']} s  ({report['requests_per_s']} istek/s)")
+    if latencies.size:
+        print(f"Gecikme: p50 {report['p50_ms']} ms  p95 {report['p95_ms']} ms  p99 {report['p99_ms']} ms")
+    batcher = report['metrics'].get('vit_batcher')
+    if batcher:
+        print(f"ViT batch'leyici: {batcher['crops']} kırpıntı, {batcher['batches']} ileri geçiş "
+              f"(ort. {batcher['mean_batch_size']} kırpıntı/batch), ort. bekleme {batcher['mean_wait_ms']} ms, "
+              f"{batcher['rejected']} red")
+    if report.get('label_agreement') is not None:
+        print(f"Etiket uyumu (doğrudan çağrıyla): %{report['label_agreement'] * 100:.0f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    # 503 geri basınçtır, hata sayılmaz; diğer hata kodları ve etiket uyumsuzluğu başarısızlıktır
+    if report['errors'] or report.get('label_agreement') not in (None, 1.0):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
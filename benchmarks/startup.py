@@ -0,0 +1,87 @@
+# benchmarks/startup.py
+"""
+Soğuk başlangıç (cold start) ölçümü: her senaryo ayrı bir Python sürecinde çalıştırılır,
+import süresi, model yükleme süresi ve tepe bellek (max RSS) raporlanır.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --warmup --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Her senaryo: (ad, import edilecek modül, yüklenecek modeller)
+SCENARIOS = [
+    ("etiket tablosu", "labels", ()),
+    ("classifier import", "classifier", ()),
+    ("generator import", "generator", ()),
+    ("model_loader import", "model_loader", ()),
+    ("app import", "app", ()),
+    ("yalnızca segmentasyon", "app", ("sam", "vit")),
+    ("tüm modeller", "app", ("sam", "vit", "inpainting")),
+]
+
+_CHILD_CODE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+loaded = {{}}
+if {models!r}:
+    from model_registry import registry
+    loaded = registry.warmup(*{models!r})
+t2 = time.perf_counter()
+print(json.dumps({{
+    "import_s": t1 - t0,
+    "load_s": t2 - t1,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": loaded,
+    "heavy_modules": sorted(m for m in ("transformers", "diffusers") if m in sys.modules),
+}}))
+"""
+
+
+def run_scenario(module, models):
+    """Senaryoyu temiz bir alt süreçte çalıştırır ve ölçüm sözlüğünü döndürür."""
+    code = _CHILD_CODE.format(module=module, models=tuple(models))
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "bilinmeyen hata"}
+    # Modül yükleme logları da stdout'a yazıldığından son satır ölçümdür
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import ve model yükleme soğuk başlangıç ölçümü")
+    parser.add_argument("--warmup", action="store_true",
+                        help="Model yükleyen senaryoları da çalıştır (ağırlıklar gerekir)")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    results = {}
+    for name, module, models in SCENARIOS:
+        if models and not args.warmup:
+            continue
+        results[name] = run_scenario(module, models)
+
+    print(f"{'Senaryo':<24}{'import (s)':>12}{'yükleme (s)':>14}{'max RSS (MB)':>15}  ağır modüller")
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<24}  HATA: {r['error']}")
+            continue
+        print(f"{name:<24}{r['import_s']:>12.2f}{r['load_s']:>14.2f}{r['max_rss_mb']:>15.0f}  "
+              f"{', '.join(r['heavy_modules']) or '-'}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
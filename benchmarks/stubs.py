@@ -0,0 +1,254 @@
+# benchmarks/stubs.py
+"""
+Ölçümlerin ağırlık dosyası ve internet bağlantısı olmadan CPU'da çalışabilmesi için küçük,
+deterministik yedek (stand-in) modeller. Gerçek modellerle aynı arayüzü sağlarlar
+(SAM: segment_anything.Sam, ViT: config.id2label + logits döndüren model).
+"""
+import types
+import torch
+import torch.nn.functional as F
+from segment_anything.modeling import Sam
+from torchvision.models import ResNet18_Weights
+from transformers import ViTImageProcessor
+
+from model_registry import registry
+
+# Yedek SAM, gerçek SAM ile aynı eşik/NMS/küçük bölge ayarlarıyla çalışır; yalnızca nokta ızgarası
+# CPU'da hızlı ölçüm için seyreltilir
+STUB_SAM_SETTINGS = {'points_per_side': 8}
+
+EMBEDDING_GRID = 64
+STUB_MASK_THRESHOLDS = (0.25, 0.45, 0.7)
+STUB_IOU_PREDICTIONS = (0.86, 0.95, 0.88)
+
+
+class StubImageEncoder(torch.nn.Module):
+    """Görüntüyü 16x16'lık bloklarda ortalayıp yumuşatan 'kodlayıcı'; 3x64x64 renk gömmesi üretir."""
+
+    img_size = 1024
+
+    def forward(self, x):
+        pooled = F.avg_pool2d(x, 16)
+        return F.avg_pool2d(pooled, 3, stride=1, padding=1, count_include_pad=False)
+
+
+class StubPromptEncoder(torch.nn.Module):
+    """Nokta istemlerini olduğu gibi (giriş çerçevesi koordinatları) çözücüye iletir."""
+
+    def forward(self, points, boxes, masks):
+        coords, _ = points
+        return coords.float(), torch.zeros(coords.shape[0], 1, EMBEDDING_GRID, EMBEDDING_GRID)
+
+    def get_dense_pe(self):
+        return torch.zeros(1, 1, EMBEDDING_GRID, EMBEDDING_GRID)
+
+
+class StubMaskDecoder(torch.nn.Module):
+    """
+    Her nokta için, noktadaki renge benzerlik ve noktaya uzaklıktan oluşan bir mesafe haritasını
+    üç farklı eşikle keserek (dar/orta/geniş) SAM'e benzer çoklu maske logit'leri üretir.
+    """
+
+    def forward(self, image_embeddings, image_pe, sparse_prompt_embeddings, dense_prompt_embeddings,
+                multimask_output):
+        grid = EMBEDDING_GRID
+        embedding = image_embeddings[0]
+        cells = (sparse_prompt_embeddings[:, 0, :] / (StubImageEncoder.img_size / grid)).long().clamp(0, grid - 1)
+        seed_colors = embedding[:, cells[:, 1], cells[:, 0]].T
+
+        color_distance = (embedding[None] - seed_colors[:, :, None, None]).norm(dim=1)
+        ys, xs = torch.meshgrid(torch.arange(grid), torch.arange(grid), indexing="ij")
+        spatial_distance = torch.sqrt((xs[None] - cells[:, 0, None, None]) ** 2 +
+                                      (ys[None] - cells[:, 1, None, None]) ** 2) / grid
+        distance = color_distance + spatial_distance
+
+        thresholds = torch.tensor(STUB_MASK_THRESHOLDS)
+        iou_predictions = torch.tensor(STUB_IOU_PREDICTIONS)
+        if not multimask_output:
+            thresholds, iou_predictions = thresholds[1:2], iou_predictions[1:2]
+
+        logits = 500.0 * (thresholds[None, :, None, None] - distance[:, None])
+        low_res_masks = F.interpolate(logits, (4 * grid, 4 * grid), mode="bilinear", align_corners=False)
+        return low_res_masks, iou_predictions.expand(len(cells), -1).clone()
+
+
+def build_stub_sam(seed=0):
+    """
+    Gerçek Sam sınıfı üzerine kurulu, ağırlıksız ve deterministik yedek SAM. SamPredictor ve
+    SamAutomaticMaskGenerator ile olduğu gibi çalışır; maskeler renk bölgelerini takip eder.
+    """
+    sam = Sam(
+        image_encoder=StubImageEncoder(),
+        prompt_encoder=StubPromptEncoder(),
+        mask_decoder=StubMaskDecoder(),
+        pixel_mean=[123.675, 116.28, 103.53],
+        pixel_std=[58.395, 57.12, 57.375],
+    )
+    return sam.eval()
+
+
+class StubViTClassifier(torch.nn.Module):
+    """
+    ImageNet-1k etiket uzayında logit üreten küçük sınıflandırıcı. Görüntü 8x8'e havuzlanır ve
+    sabit tohumlu bir doğrusal katmandan geçirilir; iç mekân sınıflarına hafif bir ön yargı eklenir.
+    """
+
+    def __init__(self, seed=0):
+        super().__init__()
+        categories = ResNet18_Weights.IMAGENET1K_V1.meta["categories"]
+        self.config = types.SimpleNamespace(name_or_path="stub-vit", id2label=dict(enumerate(categories)))
+        generator = torch.Generator().manual_seed(seed)
+        self.proj = torch.nn.Linear(3 * 8 * 8, len(categories))
+        with torch.no_grad():
+            self.proj.weight.copy_(torch.randn(self.proj.weight.shape, generator=generator) * 0.6)
+            self.proj.bias.zero_()
+            interior = [i for i, name in enumerate(categories)
+                        if any(word in name.lower() for word in ('couch', 'lamp', 'table', 'chair', 'wall',
+                                                                 'window', 'bed', 'shade', 'vase', 'tile'))]
+            self.proj.bias[interior] = 3.0
+
+    def forward(self, pixel_values):
+        pooled = F.adaptive_avg_pool2d(pixel_values, 8).flatten(1)
+        return types.SimpleNamespace(logits=self.proj(pooled))
+
+
+def _stub_processor():
+    return ViTImageProcessor(do_resize=True, size={"height": 224, "width": 224},
+                             image_mean=[0.5, 0.5, 0.5], image_std=[0.5, 0.5, 0.5])
+
+
+def _quantize_for_profile(model, sam=False):
+    """Etkin profil nicemleme istiyorsa gerçek yükleyicilerle aynı şekilde Linear katmanlarını nicemler."""
+    import classifier
+    import model_loader
+    from quantization import quantize_linear_layers
+
+    if sam:
+        if model_loader.SAM_PROFILES[model_loader.SAM_PROFILE]['quantize_encoder']:
+            model.image_encoder = quantize_linear_layers(model.image_encoder)
+        return model
+    if classifier.CLASSIFIER_PROFILES[classifier.CLASSIFIER_PROFILE]['quantize']:
+        return quantize_linear_layers(model)
+    return model
+
+
+def build_stub_classifier(seed=0):
+    """
+    (feature_extractor, model) ikilisini gerçek ViT yükleyicisiyle aynı biçimde döndürür.
+    Nicemlenmiş ViT profillerinde yedek modelin Linear katmanı da nicemlenir.
+    """
+    return _stub_processor(), _quantize_for_profile(StubViTClassifier(seed).eval())
+
+
+# Rastgele ağırlıklı gerçek mimariler için ViT yapılandırmaları (ağ bağlantısı olmadan kurulur)
+RANDOM_VIT_CONFIGS = {
+    "google/vit-large-patch16-224": {'hidden_size': 1024, 'num_hidden_layers': 24, 'num_attention_heads': 16,
+                                     'intermediate_size': 4096},
+    "google/vit-base-patch16-224": {'hidden_size': 768, 'num_hidden_layers': 12, 'num_attention_heads': 12,
+                                    'intermediate_size': 3072},
+}
+
+
+def build_random_sam(seed=0):
+    """
+    Etkin SAM profilinin gerçek mimarisi (ör. vit_l/vit_b), rastgele ağırlıklarla. Maskeler
+    anlamsızdır; kodlayıcı/çözücü gecikmesi, bellek ve nicemleme davranışı gerçek modelle aynıdır.
+    """
+    import model_loader
+    from segment_anything import sam_model_registry
+
+    torch.manual_seed(seed)
+    return _quantize_for_profile(sam_model_registry[model_loader.MODEL_TYPE](checkpoint=None).eval(), sam=True)
+
+
+def build_random_classifier(seed=0):
+    """Etkin ViT profilinin gerçek mimarisi (ViTForImageClassification), rastgele ağırlıklarla."""
+    import classifier
+    from transformers import ViTConfig, ViTForImageClassification
+
+    torch.manual_seed(seed)
+    categories = ResNet18_Weights.IMAGENET1K_V1.meta["categories"]
+    config = ViTConfig(**RANDOM_VIT_CONFIGS[classifier.MODEL_NAME], image_size=224, patch_size=16,
+                       id2label=dict(enumerate(categories)), label2id={c: i for i, c in enumerate(categories)})
+    config.name_or_path = f"random:{classifier.MODEL_NAME}"
+    return _stub_processor(), _quantize_for_profile(ViTForImageClassification(config).eval())
+
+
+def install_random_weight_models():
+    """Kayıt defterindeki 'sam' ve 'vit' yükleyicilerini rastgele ağırlıklı gerçek mimarilerle değiştirir."""
+    import classifier  # noqa: F401
+    import model_loader  # noqa: F401
+
+    registry.register("sam", build_random_sam)
+    registry.register("vit", build_random_classifier)
+
+
+def install_stub_models():
+    """Kayıt defterindeki 'sam' ve 'vit' yükleyicilerini yedek modellerle değiştirir."""
+    # Gerçek yükleyicilerin kaydı önce yapılsın ki üzerine yazılabilsin
+    import classifier  # noqa: F401
+    import model_loader  # noqa: F401
+
+    registry.register("sam", build_stub_sam)
+    registry.register("vit", build_stub_classifier)
+
+
+# Yedek inpainting pipeline'ının tokenizer sözlüğü: harfler, rakamlar ve birkaç noktalama işareti
+_STUB_TOKENS = [chr(c) for c in range(ord("a"), ord("z") + 1)] + [str(d) for d in range(10)] + [".", ",", "-"]
+
+
+def build_stub_inpainting_pipeline(seed=0):
+    """
+    Gerçek StableDiffusionInpaintPipeline sınıfı üzerine kurulu, rastgele ağırlıklı çok küçük
+    UNet/VAE/CLIP ile yedek pipeline. Görüntü kalitesi anlamsızdır; zamanlayıcı, adım sayısı,
+    çözünürlük ve bellek davranışı gerçek pipeline'la aynı kod yolundan geçer.
+    """
+    import json
+    import os
+    import tempfile
+    from diffusers import AutoencoderKL, PNDMScheduler, StableDiffusionInpaintPipeline, UNet2DConditionModel
+    from transformers import CLIPTextConfig, CLIPTextModel, CLIPTokenizer
+
+    torch.manual_seed(seed)
+    unet = UNet2DConditionModel(
+        block_out_channels=(32, 64), layers_per_block=1, sample_size=64, in_channels=9, out_channels=4,
+        down_block_types=("DownBlock2D", "CrossAttnDownBlock2D"),
+        up_block_types=("CrossAttnUpBlock2D", "UpBlock2D"),
+        cross_attention_dim=32, norm_num_groups=8, attention_head_dim=4,
+    )
+    vae = AutoencoderKL(
+        block_out_channels=[8, 16, 16, 16], in_channels=3, out_channels=3,
+        down_block_types=["DownEncoderBlock2D"] * 4, up_block_types=["UpDecoderBlock2D"] * 4,
+        latent_channels=4, norm_num_groups=8, layers_per_block=1,
+    )
+
+    vocab = {"<|startoftext|>": 0, "<|endoftext|>": 1}
+    for token in _STUB_TOKENS:
+        vocab[token] = len(vocab)
+        vocab[token + "</w>"] = len(vocab)
+    with tempfile.TemporaryDirectory() as directory:
+        vocab_path, merges_path = os.path.join(directory, "vocab.json"), os.path.join(directory, "merges.txt")
+        with open(vocab_path, "w") as f:
+            json.dump(vocab, f)
+        with open(merges_path, "w") as f:
+            f.write("#version: 0.2\n")
+        tokenizer = CLIPTokenizer(vocab_path, merges_path, pad_token="<|endoftext|>", model_max_length=77)
+    text_encoder = CLIPTextModel(CLIPTextConfig(
+        bos_token_id=0, eos_token_id=1, pad_token_id=1, hidden_size=32, intermediate_size=37,
+        num_attention_heads=4, num_hidden_layers=2, vocab_size=len(vocab), max_position_embeddings=77,
+    ))
+
+    pipeline = StableDiffusionInpaintPipeline(
+        vae=vae.eval(), text_encoder=text_encoder.eval(), tokenizer=tokenizer, unet=unet.eval(),
+        scheduler=PNDMScheduler(skip_prk_steps=True, steps_offset=1),
+        safety_checker=None, feature_extractor=None, requires_safety_checker=False,
+    )
+    pipeline.set_progress_bar_config(disable=True)
+    return pipeline
+
+
+def install_stub_inpainting():
+    """Kayıt defterindeki 'inpainting' yükleyicisini yedek pipeline ile değiştirir."""
+    import generator  # noqa: F401
+
+    registry.register("inpainting", build_stub_inpainting_pipeline)
@@ -0,0 +1,139 @@
+# benchmarks/video.py
+"""
+Video modu karşılaştırması: her kareyi baştan işleyen yol (kare başına get_segmentation_masks) ile
+video_segmentation.VideoSegmenter (algısal farkla kare atlama, bbox/IoU izleme, yalnızca değişen
+maskelerin yeniden sınıflandırılması). Paketteki fotoğraftan sentetik bir oda turu üretilir:
+kamera görüntü üzerinde kayar ve ara ara durur (duran karelere hafif sensör gürültüsü eklenir).
+
+Raporlanan: toplam süre, SAM çalıştırma ve ViT sınıflandırma sayısı, anahtar karelerde izlenen
+etiketlerin baştan sınıflandırmayla uyumu ve iz sayısı.
+
+Kullanım (depo kök dizininden):
+    python -m benchmarks.video --stub
+    python -m benchmarks.video --stub --frames 120 --video tur.mp4     # sentetik turu dosyaya da yaz
+    python -m benchmarks.video --source oda_turu.mp4                   # gerçek video, gerçek modeller
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+DEFAULT_IMAGE = os.path.join(REPO_ROOT, "test_oda_fotografi2.jpg")
+
+
+def synthetic_walkthrough(path, frame_count, size=(640, 480), seed=0):
+    """Görüntü üzerinde kayan ve 8 karede bir 6 kare duran kamera; RGB kare listesi döndürür."""
+    from utils import read_image
+
+    image = read_image(path)
+    width, height = size
+    scale = max(width * 1.5 / image.shape[1], height * 1.2 / image.shape[0], 1.0)
+    image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    rng = np.random.default_rng(seed)
+
+    moving = [i % 14 < 8 for i in range(frame_count)]
+    steps = np.cumsum(moving)
+    max_x, max_y = image.shape[1] - width, image.shape[0] - height
+    frames = []
+    for i in range(frame_count):
+        t = steps[i] / max(steps[-1], 1)
+        x = int(round(t * max_x))
+        y = int(round(max_y / 2 * (1 + np.sin(2 * np.pi * t)) / 2))
+        frame = image[y:y + height, x:x + width].astype(np.int16)
+        frame += rng.integers(-2, 3, size=frame.shape, dtype=np.int16)
+        frames.append(np.clip(frame, 0, 255).astype(np.uint8))
+    return frames
+
+
+def write_video(path, frames, fps=15):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for frame in frames:
+        writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    writer.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Video modu: baştan işleme vs zamansal yeniden kullanım")
+    parser.add_argument("--stub", action="store_true", help="Ağırlıksız yedek SAM/ViT kullan")
+    parser.add_argument("--source", help="Gerçek video/kare dizisi (verilmezse sentetik tur üretilir)")
+    parser.add_argument("--image", default=DEFAULT_IMAGE, help="Sentetik tur için kaynak fotoğraf")
+    parser.add_argument("--frames", type=int, default=60, help="Sentetik turdaki / okunacak kare sayısı")
+    parser.add_argument("--video", help="Sentetik turu bu dosyaya da yaz (mp4)")
+    parser.add_argument("--max-side", type=int, default=512)
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    if args.stub:
+        from benchmarks.stubs import install_stub_models, STUB_SAM_SETTINGS
+        install_stub_models()
+        import model_loader
+        model_loader.SAM_GENERATOR_SETTINGS.update(STUB_SAM_SETTINGS)
+    from model_loader import get_sam_model, get_segmentation_masks, get_segmentation_engine
+    from video_segmentation import VideoSegmenter, read_frames
+
+    if args.source:
+        frames = [frame for _, _, frame in read_frames(args.source, max_frames=args.frames)]
+    else:
+        frames = synthetic_walkthrough(args.image, args.frames)
+        if args.video:
+            write_video(args.video, frames)
+    sam_model = get_sam_model()
+    engine = get_segmentation_engine(sam_model)
+
+    # Baştan işleme: her kare için SAM + tüm maskelerin sınıflandırılması
+    t0 = time.perf_counter()
+    scratch = [get_segmentation_masks(frame, sam_model, max_side=args.max_side) for frame in frames]
+    scratch_seconds = time.perf_counter() - t0
+    engine.embedding_cache.clear()
+
+    segmenter = VideoSegmenter(sam_model, max_side=args.max_side)
+    t0 = time.perf_counter()
+    tracked = [segmenter.process(i, frame) for i, frame in enumerate(frames)]
+    video_seconds = time.perf_counter() - t0
+
+    # Anahtar karelerde SAM çıktısı aynıdır; nesneler sırayla karşılaştırılabilir
+    compared = matched = 0
+    for objects, reference in zip(tracked, scratch):
+        if objects is None:
+            continue
+        compared += len(objects)
+        matched += sum(a['label'] == b['label'] for a, b in zip(objects, reference))
+
+    summary = segmenter.summary()
+    tracks = segmenter.tracks()
+    report = {
+        'frames': len(frames),
+        'scratch_s': round(scratch_seconds, 2),
+        'video_s': round(video_seconds, 2),
+        'speedup': round(scratch_seconds / video_seconds, 2),
+        'scratch_sam_runs': len(frames),
+        'scratch_classified': sum(len(objects) for objects in scratch),
+        'keyframe_label_agreement': matched / compared if compared else None,
+        'tracks_with_conflicting_votes': sum(len(track.votes) > 1 for track in tracks),
+        **{f'video_{key}': value for key, value in summary.items()},
+    }
+
+    print(f"\n{report['frames']} kare")
+    print(f"Baştan işleme : {report['scratch_s']:>7.2f} s  SAM {report['scratch_sam_runs']:>4}  "
+          f"ViT {report['scratch_classified']:>5} kırpıntı")
+    print(f"Video modu    : {report['video_s']:>7.2f} s  SAM {summary['keyframes']:>4}  "
+          f"ViT {summary['classified']:>5} kırpıntı  ({summary['skipped']} kare atlandı, "
+          f"{summary['labels_reused']} etiket izden alındı)")
+    print(f"Hızlanma: {report['speedup']}x   iz sayısı: {summary['tracks']}   "
+          f"anahtar karelerde baştan sınıflandırmayla etiket uyumu: "
+          f"%{report['keyframe_label_agreement'] * 100:.1f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# benchmarks/workers.py
+"""
+Toplu modda süreç sayısına göre verim (görüntü/s) ve toplam bellek karşılaştırması.
+Her süreç sayısı temiz bir alt süreçte ölçülür. Bellek, ebeveyn + çocuk süreçlerin
+/proc/<pid>/smaps_rollup değerlerinden örneklenir: RSS paylaşılan sayfaları her süreçte
+tekrar sayar, PSS ise paylaşılan sayfaları süreçler arasında böler (gerçek toplam maliyet).
+
+Kullanım (depo kök dizininden, yalnızca Linux):
+    python -m benchmarks.workers --max-workers 4
+    python -m benchmarks.workers --stub --repeat 2     # ağırlıksız yedek modellerle
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_IMAGES = os.path.join(REPO_ROOT, "test_oda_fotografi*.jpg")
+
+
+def _process_tree(pid):
+    """Sürecin kendisini ve tüm alt süreçlerini döndürür."""
+    pids = [pid]
+    for task in glob.glob(f"/proc/{pid}/task/*/children"):
+        try:
+            with open(task) as f:
+                for child in f.read().split():
+                    pids.extend(_process_tree(int(child)))
+        except OSError:
+            continue
+    return pids
+
+
+def _memory_kb(pid):
+    """Sürecin (Rss, Pss) değerlerini kB olarak döndürür."""
+    values = {'Rss': 0, 'Pss': 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key = line.split(':')[0]
+                if key in values:
+                    values[key] = int(line.split()[1])
+    except OSError:
+        pass
+    return values['Rss'], values['Pss']
+
+
+class MemorySampler(threading.Thread):
+    """Süreç ağacının toplam RSS/PSS değerlerini periyodik olarak örnekleyip tepe değeri tutar."""
+
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_rss_kb = 0
+        self.peak_pss_kb = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            totals = [_memory_kb(pid) for pid in _process_tree(os.getpid())]
+            self.peak_rss_kb = max(self.peak_rss_kb, sum(r for r, _ in totals))
+            self.peak_pss_kb = max(self.peak_pss_kb, sum(p for _, p in totals))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def run_child(args):
+    """Tek bir süreç sayısı için ölçümü yapar (alt süreçte çalışır)."""
+    sys.path.insert(0, REPO_ROOT)
+    import model_loader
+    from batch_processing import run_batch
+
+    if args.stub:
+        from benchmarks.stubs import install_stub_models, STUB_SAM_SETTINGS
+        install_stub_models()
+        model_loader.SAM_GENERATOR_SETTINGS.update(STUB_SAM_SETTINGS)
+
+    sampler = MemorySampler()
+    sampler.start()
+    output_dir = tempfile.mkdtemp(prefix="bench_workers_out_")
+    try:
+        report = run_batch(args.input_dir, output_dir, workers=args.child,
+                           images_per_worker=args.images_per_worker)
+    finally:
+        sampler.stop()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    print(json.dumps({
+        'workers': args.child,
+        'images': report['processed'],
+        'images_per_s': report['images_per_s'],
+        'wall_s': report['wall_s'],
+        'peak_total_rss_mb': sampler.peak_rss_kb / 1024,
+        'peak_total_pss_mb': sampler.peak_pss_kb / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Süreç sayısına göre verim ve bellek ölçümü")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="Ölçümde kullanılacak görüntüler (glob)")
+    parser.add_argument("--repeat", type=int, default=4, help="Her görüntünün kaç kopya işleneceği")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--images-per-worker", type=int, default=1)
+    parser.add_argument("--stub", action="store_true", help="Ağırlıksız yedek modelleri kullan")
+    parser.add_argument("--json", dest="json_path", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--input-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    input_dir = tempfile.mkdtemp(prefix="bench_workers_in_")
+    try:
+        for path in sorted(glob.glob(args.images)):
+            name, ext = os.path.splitext(os.path.basename(path))
+            for i in range(args.repeat):
+                shutil.copy(path, os.path.join(input_dir, f"{name}_{i}{ext}"))
+
+        results = []
+        for workers in range(1, args.max_workers + 1):
+            command = [sys.executable, "-m", "benchmarks.workers", "--child", str(workers),
+                       "--input-dir", input_dir, "--images-per-worker", str(args.images_per_worker)]
+            if args.stub:
+                command.append("--stub")
+            proc = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{workers} süreç: HATA\n{proc.stderr.strip()}")
+                continue
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(input_dir, ignore_errors=True)
+
+    print(f"{'Süreç':>6}{'görüntü':>9}{'görüntü/s':>11}{'toplam RSS (MB)':>17}{'toplam PSS (MB)':>17}")
+    for r in results:
+        print(f"{r['workers']:>6}{r['images']:>9}{r['images_per_s'] or 0:>11.2f}"
+              f"{r['peak_total_rss_mb']:>17.0f}{r['peak_total_pss_mb']:>17.0f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
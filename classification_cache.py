@@ -0,0 +1,165 @@
+# classification_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Önbellek dosyasının izin verilen en büyük boyutu (yalnızca top-k verisi sayılır)
+CLASSIFICATION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Bütçe aşıldığında önbellek bu orana kadar boşaltılır (her eklemede silme yapılmasın diye)
+EVICTION_TARGET_RATIO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crop_topk (
+    key BLOB PRIMARY KEY,
+    indices BLOB NOT NULL,
+    probs BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+
+def crop_cache_key(cropped_np_image, model_name, top_k, mask=None):
+    """
+    Kırpıntının piksel içeriği, model adı ve top-k değerinden önbellek anahtarı üretir.
+    Maske dışı pikseller değiştirilerek sınıflandırılıyorsa kırpıntıya ait maske de anahtara girer.
+    """
+    crop = np.ascontiguousarray(cropped_np_image)
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f"{model_name}|{top_k}|{crop.shape}|{crop.dtype.str}".encode())
+    hasher.update(crop.data)
+    if mask is not None:
+        hasher.update(np.packbits(mask, axis=None).tobytes())
+    return hasher.digest()
+
+
+# --------------------------------------------------------------------------
+# DİSK ÜZERİ SINIFLANDIRMA ÖNBELLEĞİ
+# --------------------------------------------------------------------------
+
+class ClassificationCache:
+    """
+    Kırpıntı başına ViT top-k indeks ve olasılıklarını sqlite BLOB sütunlarında saklayan kalıcı önbellek.
+    İndeksler int16, olasılıklar float32 olarak saklanır (etiket kararları bit bit aynı kalır).
+    Boyut bütçesi aşıldığında en uzun süredir kullanılmayan kayıtlar silinir.
+    """
+
+    def __init__(self, path, max_bytes=CLASSIFICATION_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._total_bytes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        """Bağlantıyı açar; fork edilmiş çocuk süreçte ebeveynin bağlantısı kullanılmaz, yenisi açılır."""
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(_SCHEMA)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS crop_topk_access ON crop_topk (last_access)")
+        self._connection.commit()
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM crop_topk").fetchone()[0]
+        self._pid = os.getpid()
+
+    def _db(self):
+        if self._pid != os.getpid():
+            self._connect()
+        return self._connection
+
+    def get_many(self, keys):
+        """Anahtarlar için {anahtar: (olasılık listesi, indeks listesi)} döndürür; bulunamayanlar yer almaz."""
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            db = self._db()
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = db.execute(f"SELECT key, indices, probs FROM crop_topk WHERE key IN ({placeholders})",
+                                  chunk).fetchall()
+                for key, indices, probs in rows:
+                    found[bytes(key)] = (np.frombuffer(probs, dtype=np.float32).tolist(),
+                                         np.frombuffer(indices, dtype=np.int16).tolist())
+            if found:
+                now = time.time()
+                db.executemany("UPDATE crop_topk SET last_access = ? WHERE key = ?",
+                               [(now, key) for key in found])
+                db.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, entries):
+        """[(anahtar, olasılıklar, indeksler), ...] kayıtlarını ekler ve gerekirse eski kayıtları siler."""
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for key, probs, indices in entries:
+            indices_blob = np.asarray(indices, dtype=np.int16).tobytes()
+            probs_blob = np.asarray(probs, dtype=np.float32).tobytes()
+            rows.append((key, indices_blob, probs_blob, len(indices_blob) + len(probs_blob), now))
+
+        with self._lock:
+            db = self._db()
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO crop_topk (key, indices, probs, size, last_access) "
+                           "VALUES (?, ?, ?, ?, ?)", rows)
+            # Yalnızca gerçekten eklenen satırlar bütçeye yazılır (aynı kırpıntı tekrar gelmiş olabilir)
+            if db.total_changes - before == len(rows):
+                self._total_bytes += sum(row[3] for row in rows)
+            else:
+                self._total_bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM crop_topk").fetchone()[0]
+            if self._total_bytes > self.max_bytes:
+                self._evict(db)
+            db.commit()
+
+    def _evict(self, db):
+        """En eski erişimli kayıtları bütçenin EVICTION_TARGET_RATIO oranına inene kadar siler."""
+        target = self.max_bytes * EVICTION_TARGET_RATIO
+        excess = self._total_bytes - target
+        removed = 0
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM crop_topk ORDER BY last_access"):
+            if removed >= excess:
+                break
+            doomed.append((key,))
+            removed += size
+        db.executemany("DELETE FROM crop_topk WHERE key = ?", doomed)
+        self._total_bytes -= removed
+
+    def stats(self):
+        """İsabet/ıska sayılarını ve önbellek boyutunu döndürür."""
+        with self._lock:
+            entries = self._db().execute("SELECT COUNT(*) FROM crop_topk").fetchone()[0]
+        return {
+            'entries': entries,
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+            self._pid = None
@@ -1,67 +1,141 @@
 # classifier.py
-from transformers import ViTImageProcessor, ViTForImageClassification
 from PIL import Image
 import torch
 import numpy as np
+# Etiket tabloları labels.py'dedir; eski kod için aynı nesneler buradan da erişilebilir. Karar
+# tablosu labels.* nesnelerini okur: yerinde değişiklik (append, update) iki yoldan da geçerlidir,
+# ancak yeni liste/sözlük atamak labels modülünde yapılmalıdır (classifier.X = [...] etkisizdir)
+from labels import INTERIOR_WHITELIST, TRANSLATION_DICT, STRUCTURAL_WHITELIST, NEGATIVE_FILTER_LIST  # noqa: F401
+from label_table import get_decision_table, clean_label, base_label
+from model_registry import registry
+from classification_cache import crop_cache_key
+import profiling
+from crop_preprocessing import prepare_crop_batch, image_to_tensor, local_mask
+from vit_batcher import QueueFullError
+from quantization import quantize_linear_layers
 
 # --------------------------------------------------------------------------
 # GLOBAL TANIMLAMALAR
 # --------------------------------------------------------------------------
 
-INTERIOR_WHITELIST = [
-    'bed', 'sofa', 'chair', 'table', 'lamp', 'wardrobe', 'closet',
-    'nightstand', 'mirror', 'rug', 'cabinet', 'shelf', 'ottoman',
-    'wall', 'ceiling', 'floor', 'tile', 'plaster', 'wallpaper', 'room', 'space',
-    'quilt', 'cushion', 'pillow', 'curtain', 'window', 'shade', 'frame', 'pouf',
-    'couch', 'sectional', 'daybed', 'dresser', 'comforter', 'press', 'console',
-    'art', 'picture', 'painting', 'basket', 'plant', 'vase', 'clock', 'sconce',
-    'stove', 'sink', 'washbasin', 'lavabo', 'desk'
-]
-
-TRANSLATION_DICT = {
-    'bed': 'yatak', 'sofa': 'koltuk', 'chair': 'sandalye', 'table': 'masa',
-    'lamp': 'lamba', 'wardrobe': 'gardırop', 'closet': 'dolap',
-    'nightstand': 'komodin', 'mirror': 'ayna', 'rug': 'halı',
-    'cabinet': 'dolap', 'shelf': 'raf', 'ottoman': 'puf', 'pouf': 'puf',
-    'couch': 'kanepe', 'desk': 'çalışma masası', 'window': 'pencere',
-    'wall': 'duvar', 'ceiling': 'tavan', 'floor': 'zemin', 'tile': 'fayans',
-    'curtain': 'perde', 'quilt': 'yorgan', 'cushion': 'yastık',
-    'pillow': 'yastık', 'frame': 'çerçeve', 'art': 'sanat eseri',
-    'picture': 'resim', 'painting': 'tablo', 'basket': 'sepet',
-    'plant': 'bitki', 'vase': 'vazo', 'stove': 'ocak', 'sink': 'lavabo',
-    'space': 'boş alan', 'windsor': 'yastık',
-    'tobacco': 'dolap', 'shop': 'dolap', 'vest': 'yastık', 'tie': 'yastık',
-    'abaya': 'örtü', 'daybed': 'yatak', 'plate': 'raf', 'rack': 'raf'
-}
-
-# Yüzdelik Alan Eşiği ve Listesi
+# Yüzdelik Alan Eşiği
 LARGE_AREA_PERCENT_THRESHOLD = 0.05
-STRUCTURAL_WHITELIST = ['wall', 'floor', 'ceiling', 'room', 'space', 'plaster', 'tile']
-NEGATIVE_FILTER_LIST = ['tobacco', 'bulletproof', 'abaya', 'bula', 'bola', 'tie', 'windsor',
-                        'terrier', 'retriever', 'bulldog', 'schnauzer', 'beagle', 'swab', 'mop']
 
 # SINIFLANDIRMA İÇİN MİNİMUM GÜVEN EŞİĞİ (ADE20K tarzı optimizasyon)
 MIN_CONFIDENCE_THRESHOLD = 0.15
 
-# Kullanılacak ViT modelinin adı (Strateji 1)
-MODEL_NAME = "google/vit-large-patch16-224"
+# Toplu sınıflandırmada tek ileri geçişte işlenecek kırpıntı sayısı
+CLASSIFICATION_BATCH_SIZE = 16
+
+# Seçilebilir ViT profilleri: Hugging Face model adı ve Linear katmanlarının dinamik int8'e
+# nicemlenip nicemlenmeyeceği (yalnızca CPU). "large" ilk sürümdeki modeldir.
+CLASSIFIER_PROFILES = {
+    'large': {'model_name': "google/vit-large-patch16-224", 'quantize': False},
+    'large-int8': {'model_name': "google/vit-large-patch16-224", 'quantize': True},
+    'base': {'model_name': "google/vit-base-patch16-224", 'quantize': False},
+    'base-int8': {'model_name': "google/vit-base-patch16-224", 'quantize': True},
+}
+CLASSIFIER_PROFILE = "large"
+
+# Kullanılacak ViT modelinin adı (Strateji 1); set_classifier_profile ile güncellenir
+MODEL_NAME = CLASSIFIER_PROFILES[CLASSIFIER_PROFILE]['model_name']
+
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def load_classifier_model():
+    """ViT işlemcisini ve sınıflandırma modelini yükler; hata durumunda None döndürür."""
+    # transformers import'u da maliyetli olduğundan yalnızca model gerçekten istendiğinde yapılır
+    from transformers import ViTImageProcessor, ViTForImageClassification
+
+    profile = CLASSIFIER_PROFILES[CLASSIFIER_PROFILE]
+    try:
+        print(f"ViT Sınıflandırma modeli yükleniyor... ({MODEL_NAME}, profil: {CLASSIFIER_PROFILE})")
+        feature_extractor = ViTImageProcessor.from_pretrained(MODEL_NAME)
+        classification_model = ViTForImageClassification.from_pretrained(MODEL_NAME)
+        classification_model.to(DEVICE)
+        classification_model.eval()
+        if profile['quantize']:
+            classification_model = quantize_linear_layers(classification_model)
+        # id2label uzayı etiket karar tablosuna bir kez derlenir
+        get_decision_table(classification_model.config.id2label)
+        print("ViT modeli başarıyla yüklendi.")
+        return feature_extractor, classification_model
+    except Exception as e:
+        print(f"ViT modeli yüklenirken hata oluştu: {e}")
+        return None
+
+
+# Model import sırasında değil, ilk sınıflandırmada yüklenir
+registry.register("vit", load_classifier_model)
+
+# İsteğe bağlı kalıcı kırpıntı önbelleği (classification_cache.ClassificationCache)
+_classification_cache = None
+
+# İsteğe bağlı dinamik batch'leyici (vit_batcher.DynamicBatcher); ayarlıysa eşzamanlı isteklerin
+# kırpıntıları ortak ileri geçişlerde işlenir
+_vit_batcher = None
+
+
+def set_classifier_profile(name):
+    """
+    ViT profilini (CLASSIFIER_PROFILES) seçer. Yüklü model bırakılır; yeni profil ilk
+    sınıflandırmada yüklenir.
+    """
+    global CLASSIFIER_PROFILE, MODEL_NAME
+    if name not in CLASSIFIER_PROFILES:
+        raise ValueError(f"Bilinmeyen ViT profili: {name} (seçenekler: {', '.join(CLASSIFIER_PROFILES)})")
+    CLASSIFIER_PROFILE = name
+    MODEL_NAME = CLASSIFIER_PROFILES[name]['model_name']
+    registry.release("vit")
+
+
+def classifier_model_id():
+    """Sonuç deposu ve önbellek anahtarlarına giren model kimliği (nicemlenmiş profiller ayrışır)."""
+    return f"{MODEL_NAME}|int8" if CLASSIFIER_PROFILES[CLASSIFIER_PROFILE]['quantize'] else MODEL_NAME
+
+
+def get_classifier():
+    """(feature_extractor, classification_model) ikilisini döndürür; model yüklenemediyse (None, None)."""
+    loaded = registry.get("vit")
+    if loaded is None:
+        return None, None
+    return loaded
+
+
+def set_classification_cache(cache):
+    """Toplu sınıflandırmada kullanılacak kalıcı kırpıntı önbelleğini ayarlar (None: kapalı)."""
+    global _classification_cache
+    _classification_cache = cache
+
+
+def get_classification_cache():
+    """Etkin kırpıntı önbelleğini döndürür (yoksa None)."""
+    return _classification_cache
+
+
+def set_vit_batcher(batcher):
+    """Toplu sınıflandırmada ViT ileri geçişlerini yürütecek batch'leyiciyi ayarlar (None: kapalı)."""
+    global _vit_batcher
+    _vit_batcher = batcher
+
+
+def get_vit_batcher():
+    """Etkin batch'leyiciyi döndürür (yoksa None)."""
+    return _vit_batcher
 
-# Modeli ve işlemciyi global olarak tanımla
-feature_extractor = None
-classification_model = None
-DEVICE = "cpu"
 
-try:
-    print(f"ViT Sınıflandırma modeli yükleniyor... ({MODEL_NAME})")
-    feature_extractor = ViTImageProcessor.from_pretrained(MODEL_NAME)
-    classification_model = ViTForImageClassification.from_pretrained(MODEL_NAME)
-    DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-    classification_model.to(DEVICE)
-    print("ViT modeli başarıyla yüklendi.")
-except Exception as e:
-    print(f"ViT modeli yüklenirken hata oluştu: {e}")
-    feature_extractor = None
-    classification_model = None
+def vit_forward(pixel_values):
+    """(N, 3, 224, 224) giriş için ViT logit'lerini döndürür (batch'leyicinin ileri geçiş fonksiyonu)."""
+    _, classification_model = get_classifier()
+    with torch.inference_mode():
+        return classification_model(pixel_values=pixel_values.to(DEVICE)).logits
+
+
+def _model_identifier(classification_model):
+    """Önbellek anahtarına giren model kimliği (yüklü modelin adı/yolu, nicemlenmişse |int8 ekiyle)."""
+    name = getattr(classification_model.config, "name_or_path", None) or MODEL_NAME
+    return f"{name}|int8" if CLASSIFIER_PROFILES[CLASSIFIER_PROFILE]['quantize'] else name
 
 
 # --------------------------------------------------------------------------
@@ -70,19 +144,28 @@ except Exception as e:
 
 def get_label_from_id(idx):
     """Sınıf ID'sini temiz etikete dönüştürür."""
-    label = classification_model.config.id2label[idx]
-    if ":" in label:
-        return label.split(":")[-1].strip().lower()
-    return label.lower()
+    _, classification_model = get_classifier()
+    return clean_label(classification_model.config.id2label[idx])
 
 
 def get_base_label(full_label):
     """Çok kelimeli bir etiketten Whitelist'e uyan ilk temel nesne adını döndürür."""
-    parts = full_label.replace(',', ' ').replace('-', ' ').split()
-    for part in parts:
-        if part in INTERIOR_WHITELIST:
-            return part
-    return full_label
+    return base_label(full_label)
+
+
+def _is_too_small(cropped_np_image):
+    """Kırpılmış görüntünün sınıflandırma için çok küçük olup olmadığını kontrol eder."""
+    return cropped_np_image.size == 0 or cropped_np_image.shape[0] < 16 or cropped_np_image.shape[1] < 16
+
+
+def _decide_labels(top_k_probs, top_k_indices, areas, required_area_pixels):
+    """
+    Nesnelerin (N, k) top-k olasılık/indekslerinden güven eşiği, yapısal alan kontrolü,
+    blacklist ve whitelist kurallarıyla nihai Türkçe etiketleri seçer (label_table.LabelDecisionTable).
+    """
+    _, classification_model = get_classifier()
+    table = get_decision_table(classification_model.config.id2label)
+    return table.decide(top_k_probs, top_k_indices, areas, required_area_pixels, MIN_CONFIDENCE_THRESHOLD)
 
 
 def classify_cropped_object(cropped_np_image, area_size, total_image_area, top_k=5):
@@ -90,66 +173,174 @@ def classify_cropped_object(cropped_np_image, area_size, total_image_area, top_k
     Kırpılmış nesneyi sınıflandırır, alan yüzdesine dayalı yapısal kontrol yapar
     ve Whitelist kullanarak en uygun etiketi seçer.
     """
+    feature_extractor, classification_model = get_classifier()
     if classification_model is None:
         return "Model Hatası"
-    if cropped_np_image.size == 0 or cropped_np_image.shape[0] < 16 or cropped_np_image.shape[1] < 16:
+    if _is_too_small(cropped_np_image):
         return "Çok Küçük Nesne"
 
     # Yüzdelik eşiği piksel cinsine çevirme
     required_area_pixels = total_image_area * LARGE_AREA_PERCENT_THRESHOLD
 
     try:
-        image = Image.fromarray(cropped_np_image)
-        inputs = feature_extractor(images=image, return_tensors="pt")
-        with torch.no_grad():
-            inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
-            outputs = classification_model(**inputs)
-            logits = outputs.logits
+        with profiling.stage("vit_forward"):
+            image = Image.fromarray(cropped_np_image)
+            inputs = feature_extractor(images=image, return_tensors="pt")
+            with torch.no_grad():
+                inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
+                outputs = classification_model(**inputs)
+                logits = outputs.logits
 
         probabilities = torch.softmax(logits, dim=1)
         top_k_probs, top_k_indices = torch.topk(probabilities, top_k)
 
-        top_1_confidence = top_k_probs.squeeze()[0].item()
-        top_1_label = get_label_from_id(top_k_indices.squeeze()[0].item())
+        return _decide_labels(top_k_probs, top_k_indices, [area_size], required_area_pixels)[0]
 
-        final_english_label = None
+    except Exception as e:
+        return "Sınıflandırma Hatası"
 
-        # GÜVEN KONTROLÜ
-        if top_1_confidence < MIN_CONFIDENCE_THRESHOLD:
-            # Yapısal nesneler (duvar/zemin) büyükse, düşük güvene rağmen devam et
-            if not (area_size > required_area_pixels):
-                return "Sınıflandırılamadı"
 
-        # 1. BÜYÜK ALAN KONTROLÜ (Yüzdelik Eşiğe Göre Kontrol)
-        if area_size > required_area_pixels:
-            base_label = get_base_label(top_1_label)
-            if base_label in STRUCTURAL_WHITELIST:
-                final_english_label = base_label
+def _classify_valid(valid_indices, cache_keys, pixel_values_for, areas, required_area_pixels, labels,
+                    top_k, batch_size):
+    """
+    Toplu sınıflandırmanın ortak gövdesi: önbellekte bulunanları doğrudan karar aşamasına
+    gönderir, kalanları batch'ler halinde ViT'den geçirir ve labels listesini yerinde doldurur.
+    pixel_values_for(chunk) verilen indeksler için (N, 3, 224, 224) tensörünü üretir.
+    """
+    _, classification_model = get_classifier()
 
-        # 2. NORMAL AKIŞ (Negatif Filtre ve Whitelist Eşleşmesi)
-        if final_english_label is None:
-            for idx in top_k_indices.squeeze().tolist():
-                label = get_label_from_id(idx)
+    # Önbellekte top-k sonucu bulunan kırpıntılar doğrudan karar aşamasına gider
+    cache = _classification_cache if cache_keys else None
+    pending_indices = valid_indices
+    if cache is not None:
+        with profiling.stage("classification_cache"):
+            cached = cache.get_many(list(cache_keys.values()))
+        pending_indices = [i for i in valid_indices if cache_keys[i] not in cached]
+        hit_indices = [i for i in valid_indices if cache_keys[i] in cached]
+        if hit_indices:
+            decided = _decide_labels([cached[cache_keys[i]][0] for i in hit_indices],
+                                     [cached[cache_keys[i]][1] for i in hit_indices],
+                                     [areas[i] for i in hit_indices], required_area_pixels)
+            for i, label in zip(hit_indices, decided):
+                labels[i] = label
+        profiling.count("classification_cache_hits", len(hit_indices))
 
-                # Blacklist Kontrolü
-                if any(neg_word in label for neg_word in NEGATIVE_FILTER_LIST):
-                    continue
+    # Batch'leyici varsa kırpıntıların tamamı tek istekte gönderilir; batch'lere o ayırır
+    batcher = _vit_batcher
+    if batcher is not None:
+        batch_size = max(len(pending_indices), 1)
 
-                base_label = get_base_label(label)
+    for start in range(0, len(pending_indices), batch_size):
+        chunk = pending_indices[start:start + batch_size]
+        try:
+            with torch.inference_mode():
+                with profiling.stage("vit_preprocess"):
+                    pixel_values = pixel_values_for(chunk).to(DEVICE)
+                with profiling.stage("vit_forward"):
+                    if batcher is not None:
+                        logits = batcher(pixel_values)
+                    else:
+                        logits = classification_model(pixel_values=pixel_values).logits
+                    probabilities = torch.softmax(logits, dim=1)
+                    top_k_probs, top_k_indices = torch.topk(probabilities, top_k)
+            profiling.count("vit_crops", len(chunk))
 
-                if base_label in INTERIOR_WHITELIST:
-                    final_english_label = base_label
-                    break
+            if cache is not None:
+                probs_rows = top_k_probs.tolist()
+                indices_rows = top_k_indices.tolist()
+                cache.put_many([(cache_keys[i], probs_rows[row], indices_rows[row])
+                                for row, i in enumerate(chunk)])
+            with profiling.stage("label_decision"):
+                decided = _decide_labels(top_k_probs, top_k_indices, [areas[i] for i in chunk],
+                                         required_area_pixels)
+            for i, label in zip(chunk, decided):
+                labels[i] = label
 
-        # 3. FİLTRESİZ SON ÇARE (Blacklist'e takılmamışsa Top-1'i al)
-        if final_english_label is None:
-            if any(neg_word in top_1_label for neg_word in NEGATIVE_FILTER_LIST):
-                return "Sınıflandırılamadı"
+        except QueueFullError:
+            # Geri basınç çağırana (ör. HTTP servisi) iletilir
+            raise
+        except Exception as e:
+            for i in chunk:
+                labels[i] = "Sınıflandırma Hatası"
 
-            final_english_label = get_base_label(top_1_label)
+    return labels
 
-        # 4. TÜRKÇELEŞTİRME
-        return TRANSLATION_DICT.get(final_english_label, final_english_label)
 
-    except Exception as e:
-        return "Sınıflandırma Hatası"
\ No newline at end of file
+def classify_cropped_objects_batch(crops, areas, total_area, top_k=5, batch_size=CLASSIFICATION_BATCH_SIZE):
+    """
+    Kırpılmış nesnelerin tamamını sabit boyutlu batch'ler halinde tek ViT ileri geçişiyle
+    sınıflandırır. Her nesne için classify_cropped_object ile aynı etiketi döndürür.
+    Kırpıntı önbelleği etkinse daha önce görülmüş kırpıntılar için ViT çalıştırılmaz.
+    """
+    labels = [None] * len(crops)
+    feature_extractor, classification_model = get_classifier()
+    if classification_model is None:
+        return ["Model Hatası"] * len(crops)
+
+    required_area_pixels = total_area * LARGE_AREA_PERCENT_THRESHOLD
+
+    # Çok küçük kırpıntılar modele hiç gönderilmez
+    valid_indices = []
+    for i, crop in enumerate(crops):
+        if _is_too_small(crop):
+            labels[i] = "Çok Küçük Nesne"
+        else:
+            valid_indices.append(i)
+
+    cache_keys = {}
+    if _classification_cache is not None:
+        model_name = _model_identifier(classification_model)
+        cache_keys = {i: crop_cache_key(crops[i], model_name, top_k) for i in valid_indices}
+
+    def pixel_values_for(chunk):
+        # İşlemci listeyi tek seferde işleyip (N, 3, 224, 224) tensörü üretir
+        return feature_extractor(images=[crops[i] for i in chunk], return_tensors="pt")["pixel_values"]
+
+    return _classify_valid(valid_indices, cache_keys, pixel_values_for, areas, required_area_pixels,
+                           labels, top_k, batch_size)
+
+
+def classify_regions_batch(image, boxes, areas, total_area, masks=None, background="keep", top_k=5,
+                           batch_size=CLASSIFICATION_BATCH_SIZE):
+    """
+    Kutuları (x0, y0, x1, y1) PIL'e dönüştürmeden doğrudan görüntü tensöründen kırpıp sınıflandırır
+    (crop_preprocessing.prepare_crop_batch). background="zero"/"blur" ile maske dışındaki pikseller
+    sıfırlanır ya da bulanıklaştırılır; bu modlarda masks (CompactMask listesi) gereklidir.
+    """
+    labels = [None] * len(boxes)
+    feature_extractor, classification_model = get_classifier()
+    if classification_model is None:
+        return ["Model Hatası"] * len(boxes)
+    if background != "keep" and masks is None:
+        raise ValueError(f"'{background}' arka plan modu için maskeler verilmelidir.")
+
+    required_area_pixels = total_area * LARGE_AREA_PERCENT_THRESHOLD
+
+    # Çok küçük kırpıntılar modele hiç gönderilmez (classify_cropped_objects_batch ile aynı kural)
+    valid_indices = []
+    for i, (x0, y0, x1, y1) in enumerate(boxes):
+        if (y1 - y0) < 16 or (x1 - x0) < 16:
+            labels[i] = "Çok Küçük Nesne"
+        else:
+            valid_indices.append(i)
+
+    cache_keys = {}
+    if _classification_cache is not None:
+        # Ön işleme farklı olduğundan PIL yolunun kayıtlarıyla karışmaması için anahtar ayrıştırılır
+        model_name = f"{_model_identifier(classification_model)}|tensor|{background}"
+        for i in valid_indices:
+            x0, y0, x1, y1 = boxes[i]
+            mask = local_mask(masks[i], boxes[i]) if background != "keep" else None
+            cache_keys[i] = crop_cache_key(image[y0:y1, x0:x1], model_name, top_k, mask=mask)
+
+    # Görüntü tensörü bir kez oluşturulur, tüm batch'lerde paylaşılır
+    image_tensor = image_to_tensor(image, DEVICE)
+
+    def pixel_values_for(chunk):
+        return prepare_crop_batch(image, [boxes[i] for i in chunk],
+                                  masks=[masks[i] for i in chunk] if masks is not None else None,
+                                  background=background, feature_extractor=feature_extractor,
+                                  image_tensor=image_tensor)
+
+    return _classify_valid(valid_indices, cache_keys, pixel_values_for, areas, required_area_pixels,
+                           labels, top_k, batch_size)
@@ -0,0 +1,321 @@
+# compact_mask.py
+import numpy as np
+import cv2
+
+import profiling
+
+# --------------------------------------------------------------------------
+# KOMPAKT MASKE TEMSİLİ
+# --------------------------------------------------------------------------
+
+
+class CompactMask:
+    """
+    Segmentasyon maskesini tam kare (H×W) boolean dizi yerine yalnızca sınırlayıcı kutu (bbox)
+    içinde, bit-paketli olarak saklar. Tam kare maske yalnızca decode() çağrıldığında oluşturulur.
+    """
+
+    __slots__ = ('shape', 'offset', 'crop_shape', 'area', '_bits')
+
+    def __init__(self, crop, offset, shape):
+        """
+        crop: bbox içindeki boolean maske (h, w), offset: (x0, y0), shape: tam kare (H, W).
+        """
+        crop = np.asarray(crop, dtype=bool)
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.offset = (int(offset[0]), int(offset[1]))
+        self.crop_shape = crop.shape
+        self.area = int(np.count_nonzero(crop))
+        self._bits = np.packbits(crop, axis=None)
+
+    # ----------------------------------------------------------------------
+    # Oluşturucular
+    # ----------------------------------------------------------------------
+
+    @classmethod
+    def empty(cls, shape):
+        """Hiç piksel içermeyen maske."""
+        return cls(np.zeros((0, 0), dtype=bool), (0, 0), shape)
+
+    @classmethod
+    def from_dense(cls, mask):
+        """Tam kare boolean maskeden kompakt maske oluşturur (boş satır/sütunlar atılır)."""
+        mask = np.asarray(mask, dtype=bool)
+        rows = np.flatnonzero(mask.any(axis=1))
+        if rows.size == 0:
+            return cls.empty(mask.shape)
+        cols = np.flatnonzero(mask.any(axis=0))
+        y0, y1 = rows[0], rows[-1] + 1
+        x0, x1 = cols[0], cols[-1] + 1
+        return cls(mask[y0:y1, x0:x1], (x0, y0), mask.shape)
+
+    @classmethod
+    def from_rle(cls, rle):
+        """
+        SAM/COCO tarzı sıkıştırılmamış RLE'den ({'size': [H, W], 'counts': [...]}, sütun öncelikli,
+        arka planla başlayan) kompakt maske oluşturur.
+        """
+        h, w = rle['size']
+        counts = np.asarray(rle['counts'], dtype=np.int64)
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        # Tek indeksli koşular ön plan (maske) pikselleridir
+        fg_starts, fg_ends = starts[1::2], ends[1::2]
+        if fg_starts.size == 0:
+            return cls.empty((h, w))
+
+        # Yalnızca ön plan koşularının kapsadığı sütun aralığı açılır (tam kare maske oluşturulmaz)
+        x0 = int(fg_starts[0] // h)
+        x1 = int((fg_ends[-1] - 1) // h) + 1
+        column_major = np.zeros((x1 - x0) * h, dtype=np.int8)
+        base = x0 * h
+        column_major[fg_starts - base] = 1
+        end_positions = fg_ends - base
+        column_major[end_positions[end_positions < column_major.size]] = -1
+        band = np.cumsum(column_major, dtype=np.int8).astype(bool).reshape(x1 - x0, h).T
+
+        rows = np.flatnonzero(band.any(axis=1))
+        y0, y1 = rows[0], rows[-1] + 1
+        return cls(band[y0:y1], (x0, y0), (h, w))
+
+    @classmethod
+    def from_packed(cls, bits, crop_shape, offset, shape, area=None):
+        """
+        np.packbits ile paketlenmiş bbox içi maskeden (ör. diskten okunan) kompakt maske oluşturur.
+        Bitler açılmaz; area verilmezse paketli veriden sayılır.
+        """
+        mask = cls.__new__(cls)
+        mask.shape = (int(shape[0]), int(shape[1]))
+        mask.offset = (int(offset[0]), int(offset[1]))
+        mask.crop_shape = (int(crop_shape[0]), int(crop_shape[1]))
+        mask._bits = np.frombuffer(bits, dtype=np.uint8) if not isinstance(bits, np.ndarray) else bits
+        if area is None:
+            # packbits son baytı sıfırla doldurur; dolgu bitleri sayıma girmez
+            area = int(np.unpackbits(mask._bits).sum())
+        mask.area = int(area)
+        return mask
+
+    # ----------------------------------------------------------------------
+    # Erişim ve dönüştürme
+    # ----------------------------------------------------------------------
+
+    @property
+    def bbox(self):
+        """Maskenin sıkı sınırlayıcı kutusu, XYWH formatında."""
+        return [self.offset[0], self.offset[1], self.crop_shape[1], self.crop_shape[0]]
+
+    def crop(self):
+        """bbox içindeki boolean maskeyi döndürür."""
+        h, w = self.crop_shape
+        return np.unpackbits(self._bits, count=h * w).reshape(h, w).view(bool)
+
+    def decode(self):
+        """Tam kare (H×W) boolean maskeyi oluşturur."""
+        full = np.zeros(self.shape, dtype=bool)
+        self.paint(full)
+        return full
+
+    def paint(self, buffer, value=True):
+        """Maskeyi tam kare tampon üzerine yerinde (yalnızca bbox bölgesinde) işler."""
+        if self.area == 0:
+            return buffer
+        x0, y0 = self.offset
+        h, w = self.crop_shape
+        buffer[y0:y0 + h, x0:x0 + w][self.crop()] = value
+        return buffer
+
+    def to_rle(self):
+        """COCO tarzı sıkıştırılmamış RLE'ye (sütun öncelikli) dönüştürür."""
+        H, W = self.shape
+        if self.area == 0:
+            return {'size': [H, W], 'counts': [H * W]}
+        x0, _ = self.offset
+        w = self.crop_shape[1]
+        # Yalnızca bbox'ın sütun bandı açılır; band dışı tamamen arka plandır
+        band = np.zeros((H, w), dtype=bool)
+        band[self.offset[1]:self.offset[1] + self.crop_shape[0]] = self.crop()
+        flat = band.T.ravel()
+        change = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+        boundaries = np.concatenate(([0], change, [flat.size]))
+        counts = np.diff(boundaries)
+        if flat[0]:
+            counts = np.concatenate(([0], counts))
+        counts = counts.tolist()
+        counts[0] += x0 * H
+        trailing = (W - x0 - w) * H
+        if trailing:
+            # Tek sayıda koşu arka planla biter; bbox sağındaki sütunlar son koşuya eklenir
+            if len(counts) % 2 == 1:
+                counts[-1] += trailing
+            else:
+                counts.append(trailing)
+        return {'size': [H, W], 'counts': counts}
+
+    def __array__(self, dtype=None, copy=None):
+        # np.asarray(mask) ile eski (tam kare) kullanım biçimi çalışmaya devam eder
+        full = self.decode()
+        return full if dtype is None else full.astype(dtype)
+
+    @property
+    def packed(self):
+        """bbox içi maskenin np.packbits çıktısı (satır öncelikli, crop_shape boyutunda)."""
+        return self._bits
+
+    @property
+    def nbytes(self):
+        """Maskenin bellekte kapladığı (bit-paketli) bayt sayısı."""
+        return self._bits.nbytes
+
+    # ----------------------------------------------------------------------
+    # Maske işlemleri
+    # ----------------------------------------------------------------------
+
+    def union(self, other):
+        """İki maskenin birleşimini, yalnızca ortak bbox bölgesinde hesaplar."""
+        if self.area == 0:
+            return other
+        if other.area == 0:
+            return self
+        x0 = min(self.offset[0], other.offset[0])
+        y0 = min(self.offset[1], other.offset[1])
+        x1 = max(self.offset[0] + self.crop_shape[1], other.offset[0] + other.crop_shape[1])
+        y1 = max(self.offset[1] + self.crop_shape[0], other.offset[1] + other.crop_shape[0])
+        local = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+        for mask in (self, other):
+            mx, my = mask.offset
+            h, w = mask.crop_shape
+            local[my - y0:my - y0 + h, mx - x0:mx - x0 + w] |= mask.crop()
+        return CompactMask(local, (x0, y0), self.shape)
+
+    def dilate(self, kernel_size, kernel=None):
+        """
+        Maskeyi kare çekirdekle genişletir. İşlem, çekirdek yarıçapı kadar büyütülmüş bbox
+        bölgesinde yapılır; sonuç tam kare cv2.dilate ile aynıdır.
+        """
+        if self.area == 0 or kernel_size <= 1:
+            return self
+        if kernel is None:
+            kernel = np.ones((kernel_size, kernel_size), np.uint8)
+        H, W = self.shape
+        x0, y0 = self.offset
+        h, w = self.crop_shape
+        px0, py0 = max(x0 - kernel_size, 0), max(y0 - kernel_size, 0)
+        px1, py1 = min(x0 + w + kernel_size, W), min(y0 + h + kernel_size, H)
+
+        local = np.zeros((py1 - py0, px1 - px0), dtype=np.uint8)
+        local[y0 - py0:y0 - py0 + h, x0 - px0:x0 - px0 + w] = self.crop()
+        dilated = cv2.dilate(local, kernel, iterations=1).astype(bool)
+
+        result = CompactMask.from_dense(dilated)
+        result.shape = self.shape
+        result.offset = (result.offset[0] + px0, result.offset[1] + py0)
+        return result
+
+    def upsample(self, shape):
+        """
+        Düşük çözünürlükte üretilmiş maskeyi shape (H, W) boyutlu kareye büyütür. Yalnızca bbox'ın
+        karşılık geldiği bölge bilinear örneklenip 0.5 eşiğiyle ikili hale getirilir.
+        """
+        H, W = int(shape[0]), int(shape[1])
+        if self.area == 0:
+            return CompactMask.empty((H, W))
+        h, w = self.shape
+        # Düşük çözünürlükteki piksel / tam çözünürlükteki piksel oranı
+        sx, sy = w / W, h / H
+        x0, y0 = self.offset
+        ch, cw = self.crop_shape
+        # bbox'ın bir piksel dışına kadar olan bölge (bilinear ağırlığın sıfır olmadığı alan)
+        X0, X1 = max(int(np.floor((x0 - 1) / sx)), 0), min(int(np.ceil((x0 + cw + 1) / sx)), W)
+        Y0, Y1 = max(int(np.floor((y0 - 1) / sy)), 0), min(int(np.ceil((y0 + ch + 1) / sy)), H)
+
+        # Tam çözünürlükteki piksel merkezlerinin kırpıntı koordinatlarındaki karşılıkları
+        map_x = ((np.arange(X0, X1) + 0.5) * sx - 0.5 - x0).astype(np.float32)
+        map_y = ((np.arange(Y0, Y1) + 0.5) * sy - 0.5 - y0).astype(np.float32)
+        map_x, map_y = np.meshgrid(map_x, map_y)
+        source = self.crop().astype(np.uint8) * 255
+        region = cv2.remap(source, map_x, map_y, cv2.INTER_LINEAR,
+                           borderMode=cv2.BORDER_CONSTANT, borderValue=0) >= 128
+
+        result = CompactMask.from_dense(region)
+        result.shape = (H, W)
+        result.offset = (result.offset[0] + X0, result.offset[1] + Y0)
+        return result
+
+    def __repr__(self):
+        return f"CompactMask(shape={self.shape}, bbox={self.bbox}, area={self.area})"
+
+
+# --------------------------------------------------------------------------
+# TEMBEL BÜYÜTÜLEN MASKE
+# --------------------------------------------------------------------------
+
+
+class LazyUpsampledMask:
+    """
+    Küçültülmüş görüntüde üretilmiş maskeyi düşük çözünürlükte saklar; tam çözünürlüklü
+    CompactMask yalnızca bir tüketici pikselleri istediğinde (crop, paint, to_rle, ...) bir kez
+    oluşturulur. CompactMask ile aynı arayüzü sunar.
+    """
+
+    __slots__ = ('low_res', 'shape', '_full')
+
+    def __init__(self, low_res, shape):
+        self.low_res = low_res
+        self.shape = (int(shape[0]), int(shape[1]))
+        self._full = None
+
+    def full(self):
+        """Tam çözünürlüklü CompactMask'i (gerekirse oluşturup) döndürür."""
+        if self._full is None:
+            with profiling.stage("mask_upsample"):
+                self._full = self.low_res.upsample(self.shape)
+        return self._full
+
+    @property
+    def is_materialized(self):
+        return self._full is not None
+
+    @property
+    def offset(self):
+        return self.full().offset
+
+    @property
+    def crop_shape(self):
+        return self.full().crop_shape
+
+    @property
+    def area(self):
+        return self.full().area
+
+    @property
+    def bbox(self):
+        return self.full().bbox
+
+    def crop(self):
+        return self.full().crop()
+
+    def decode(self):
+        return self.full().decode()
+
+    def paint(self, buffer, value=True):
+        return self.full().paint(buffer, value)
+
+    def to_rle(self):
+        return self.full().to_rle()
+
+    def union(self, other):
+        return self.full().union(other.full() if isinstance(other, LazyUpsampledMask) else other)
+
+    def dilate(self, kernel_size, kernel=None):
+        return self.full().dilate(kernel_size, kernel)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.full().__array__(dtype)
+
+    @property
+    def nbytes(self):
+        """Şu anda bellekte tutulan (düşük ve varsa tam çözünürlüklü) bayt sayısı."""
+        return self.low_res.nbytes + (self._full.nbytes if self._full is not None else 0)
+
+    def __repr__(self):
+        return f"LazyUpsampledMask(shape={self.shape}, low_res={self.low_res!r})"
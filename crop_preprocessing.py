@@ -0,0 +1,143 @@
+# crop_preprocessing.py
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# ViT giriş boyutu (google/vit-large-patch16-224)
+CROP_SIZE = 224
+
+# Maske dışındaki piksellere uygulanacak işlem: olduğu gibi bırak / sıfırla / bulanıklaştır
+BACKGROUND_MODES = ("keep", "zero", "blur")
+
+# "blur" modunda 224×224 kırpıntı üzerinde uygulanan Gauss çekirdeği
+BLUR_KERNEL_SIZE = 21
+BLUR_SIGMA = 8.0
+# Bulanıklaştırma bu oranda küçültülmüş kırpıntı üzerinde yapılır
+BLUR_DOWNSCALE = 4
+
+# ViTImageProcessor varsayılanları (işlemci verilmezse kullanılır)
+DEFAULT_IMAGE_MEAN = (0.5, 0.5, 0.5)
+DEFAULT_IMAGE_STD = (0.5, 0.5, 0.5)
+DEFAULT_RESCALE_FACTOR = 1 / 255
+
+
+def normalization_from_processor(feature_extractor):
+    """ViTImageProcessor'dan hedef boyut, ölçek, ortalama ve standart sapma değerlerini okur."""
+    if feature_extractor is None:
+        return {'size': CROP_SIZE, 'rescale_factor': DEFAULT_RESCALE_FACTOR,
+                'mean': DEFAULT_IMAGE_MEAN, 'std': DEFAULT_IMAGE_STD}
+    size = getattr(feature_extractor, "size", None) or CROP_SIZE
+    # transformers sürümüne göre dict, SizeDict ya da tamsayı olabilir
+    size = size if isinstance(size, int) else size["height"]
+    return {
+        'size': int(size),
+        'rescale_factor': getattr(feature_extractor, "rescale_factor", DEFAULT_RESCALE_FACTOR),
+        'mean': tuple(getattr(feature_extractor, "image_mean", DEFAULT_IMAGE_MEAN)),
+        'std': tuple(getattr(feature_extractor, "image_std", DEFAULT_IMAGE_STD)),
+    }
+
+
+def image_to_tensor(image, device="cpu"):
+    """
+    H×W×3 uint8 görüntüyü kopyalamadan (1, 3, H, W) tensör görünümüne çevirir (channels_last düzen).
+    CPU'da uint8 kalır (antialias'lı uint8 küçültme PIL ile aynı sonucu verir); diğer cihazlarda
+    float32'ye çevrilir.
+    """
+    tensor = torch.from_numpy(np.ascontiguousarray(image)).to(device).permute(2, 0, 1).unsqueeze(0)
+    return tensor if tensor.device.type == "cpu" else tensor.float()
+
+
+def local_mask(mask, box):
+    """CompactMask'i verilen kutunun (x0, y0, x1, y1) koordinatlarına taşır; (h, w) boolean döndürür."""
+    x0, y0, x1, y1 = box
+    local = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+    if mask.area == 0:
+        return local
+    mx, my = mask.offset
+    mh, mw = mask.crop_shape
+    # Maske bbox'ı ile kırpma kutusunun kesişimi
+    ix0, iy0 = max(x0, mx), max(y0, my)
+    ix1, iy1 = min(x1, mx + mw), min(y1, my + mh)
+    if ix1 > ix0 and iy1 > iy0:
+        local[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0] = mask.crop()[iy0 - my:iy1 - my, ix0 - mx:ix1 - mx]
+    return local
+
+
+def _mask_weights(masks, boxes, size, device):
+    """Her maskeyi kendi kutusunda size×size boyutuna örnekler; (N, 1, size, size) [0, 1] ağırlık döndürür."""
+    weights = torch.empty((len(boxes), 1, size, size), dtype=torch.float32, device=device)
+    for i, (mask, box) in enumerate(zip(masks, boxes)):
+        local = torch.from_numpy(local_mask(mask, box)).to(device)
+        weights[i] = F.interpolate(local[None, None].float(), size=(size, size), mode="bilinear",
+                                   align_corners=False, antialias=True)[0]
+    return weights
+
+
+def _gaussian_kernel(kernel_size, sigma, device):
+    x = torch.arange(kernel_size, dtype=torch.float32, device=device) - (kernel_size - 1) / 2
+    kernel = torch.exp(-0.5 * (x / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def _background_blur(batch, kernel_size=BLUR_KERNEL_SIZE, sigma=BLUR_SIGMA, factor=BLUR_DOWNSCALE):
+    """
+    Gauss bulanıklaştırmayı 1/factor çözünürlükte, yatay ve dikey iki 1B konvolüsyonla yapıp
+    geri büyütür (tam çözünürlükte 2B çekirdekten çok daha ucuz; arka plan için yeterli).
+    """
+    size = batch.shape[-2:]
+    channels = batch.shape[1]
+    small = F.avg_pool2d(batch, factor)
+    kernel_size = max(kernel_size // factor, 1) | 1
+    kernel = _gaussian_kernel(kernel_size, sigma / factor, batch.device)
+    pad = kernel_size // 2
+    small = F.pad(small, (pad, pad, 0, 0), mode="reflect")
+    small = F.conv2d(small, kernel.view(1, 1, 1, -1).expand(channels, 1, 1, kernel_size), groups=channels)
+    small = F.pad(small, (0, 0, pad, pad), mode="reflect")
+    small = F.conv2d(small, kernel.view(1, 1, -1, 1).expand(channels, 1, kernel_size, 1), groups=channels)
+    return F.interpolate(small, size=size, mode="bilinear", align_corners=False)
+
+
+# --------------------------------------------------------------------------
+# TOPLU KIRPMA VE NORMALİZASYON
+# --------------------------------------------------------------------------
+
+def prepare_crop_batch(image, boxes, masks=None, background="keep", feature_extractor=None,
+                       image_tensor=None, device="cpu"):
+    """
+    Görüntüdeki tüm kutuları (x0, y0, x1, y1; x1/y1 hariç) PIL'e dönüştürmeden görüntü tensörünün
+    görünümleri üzerinden ViT giriş boyutuna örnekler, istenirse maske dışını sıfırlar/bulanıklaştırır
+    ve yerinde normalize eder. ViT'e doğrudan verilebilecek (N, 3, size, size) pixel_values döndürür.
+    image_tensor verilirse (image_to_tensor çıktısı) görüntü tekrar tensöre çevrilmez.
+    """
+    if background not in BACKGROUND_MODES:
+        raise ValueError(f"Bilinmeyen arka plan modu: {background} (seçenekler: {', '.join(BACKGROUND_MODES)})")
+    settings = normalization_from_processor(feature_extractor)
+    size = settings['size']
+
+    if image_tensor is None:
+        image_tensor = image_to_tensor(image, device)
+
+    # Sonuç tek seferde ayrılır; her kutu doğrudan kendi satırına yazılır
+    batch = torch.empty((len(boxes), 3, size, size), dtype=torch.float32, device=image_tensor.device)
+    for i, (x0, y0, x1, y1) in enumerate(boxes):
+        # Dilimleme kopya üretmez; antialias'lı bilinear küçültme ViTImageProcessor (PIL) ile eşdeğerdir
+        resized = F.interpolate(image_tensor[:, :, y0:y1, x0:x1], size=(size, size), mode="bilinear",
+                                align_corners=False, antialias=True)
+        batch[i] = resized[0]
+
+    if background != "keep" and masks is not None and len(boxes):
+        weights = _mask_weights(masks, boxes, size, batch.device)
+        if background == "zero":
+            batch.mul_(weights)
+        else:
+            blurred = _background_blur(batch)
+            batch.mul_(weights).add_(blurred.mul_(1 - weights))
+
+    mean = torch.as_tensor(settings['mean'], dtype=batch.dtype, device=batch.device).view(1, 3, 1, 1)
+    std = torch.as_tensor(settings['std'], dtype=batch.dtype, device=batch.device).view(1, 3, 1, 1)
+    batch.mul_(settings['rescale_factor']).sub_(mean).div_(std)
+    return batch
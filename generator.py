@@ -1,12 +1,19 @@
 # generator.py (OPTİMİZASYONLU VE DÜZELTİLMİŞ VERSİYON)
+import threading
+import time
+import weakref
+import cv2
 import torch
 import numpy as np
 from PIL import Image
-from diffusers import StableDiffusionInpaintPipeline
 import os
 import re
-from classifier import TRANSLATION_DICT
-import cv2
+from collections import OrderedDict
+from labels import TRANSLATION_DICT
+from model_registry import registry
+import profiling
+from mask_composition import LabelIndex, compose_mask, object_area, STRUCTURAL_CANDIDATE_COUNT
+from segmentation_engine import image_content_hash
 
 # --------------------------------------------------------------------------
 # GLOBAL TANIMLAMALAR
@@ -18,6 +25,54 @@ MODEL_ID = "runwayml/stable-diffusion-inpainting"
 CFG_SCALE = 9.5  # Prompt'a sadakat seviyesi (7-8'den 9.5'e yükseltildi)
 MASK_DILATION_SIZE = 15  # Yapısal maskeyi kaç piksel genişleteceğimiz (10-20 arası ideal)
 
+# Yeniden tasarımda maskesi doğrudan değiştirilecek mobilya etiketleri
+CHANGEABLE_OBJECTS = ['koltuk', 'kanepe', 'sandalye', 'masa', 'halı', 'lamba', 'dolap', 'puf', 'yatak', 'komodin']
+
+# Yapısal (duvar/zemin) maske adayı olabilecek etiketler; güvenilmeyen etiketler de aday sayılır
+UNRELIABLE_LABELS = ['Sınıflandırılamadı', 'boş alan']
+
+NEGATIVE_PROMPT = "bad quality, blurry, noise, distortions, disfigured, monochrome, cartoon, painting, changed perspective, changed furniture location"
+
+# Sabit tohum: aynı girdi aynı görseli üretir (None: her çağrıda rastgele)
+DEFAULT_SEED = 42
+
+# Inpainting profilleri:
+#   steps             : difüzyon adım sayısı
+#   scheduler         : SCHEDULERS anahtarı ("default": pipeline'ın kendi zamanlayıcısı)
+#   attention_slicing : dikkat hesabını dilimleyerek tepe belleği düşürür
+#   channels_last     : UNet/VAE ağırlıklarını channels_last düzenine alır (CPU konvolüsyonlarında hızlı)
+#   region            : yalnızca birleşik maskenin çevresindeki bölgeyi REGION_SIZE'da işleyip
+#                       tam çözünürlüklü orijinale geri yapıştırır
+INPAINTING_PROFILES = {
+    'quality': {'steps': 50, 'scheduler': 'default', 'attention_slicing': False, 'channels_last': False,
+                'region': False},
+    'fast': {'steps': 20, 'scheduler': 'dpm++', 'attention_slicing': True, 'channels_last': True,
+             'region': True},
+}
+INPAINTING_PROFILE = "quality"
+
+# Profillerde seçilebilecek zamanlayıcılar (diffusers sınıf adları)
+SCHEDULERS = {
+    'dpm++': "DPMSolverMultistepScheduler",
+    'euler_a': "EulerAncestralDiscreteScheduler",
+    'unipc': "UniPCMultistepScheduler",
+    'ddim': "DDIMScheduler",
+}
+
+# Bölge modu: modelin doğal çözünürlüğü, maske bbox'ına eklenen pay (kenar oranı ve en az piksel)
+# ve geri yapıştırmada maske kenarının yumuşatılacağı piksel
+REGION_SIZE = 512
+REGION_PADDING = 0.15
+REGION_MIN_PADDING = 32
+REGION_FEATHER = 8
+
+# Çoklu varyant üretiminde tek pipeline çağrısında işlenecek en fazla varyant (CFG ile UNet batch'i
+# bunun iki katıdır); None / 0: aynı maskeyi paylaşan tüm varyantlar tek çağrıda
+VARIANT_BATCH_SIZE = 4
+
+# Pipeline başına saklanan maskeli görüntü latent'i sayısı (512x512 girişte kayıt başına 64 KB)
+MASKED_LATENT_CACHE_SIZE = 16
+
 # Cihaz belirleme
 if torch.cuda.is_available():
     DEVICE = "cuda"
@@ -26,12 +81,12 @@ elif torch.backends.mps.is_available():
 else:
     DEVICE = "cpu"
 
-inpainting_pipeline = None
 
+def _load_inpainting_pipeline():
+    """Stable Diffusion Inpainting Pipeline'ını diskten/Hub'dan yükler."""
+    # diffusers import'u ağır olduğundan yalnızca yeniden tasarım istendiğinde yapılır
+    from diffusers import StableDiffusionInpaintPipeline
 
-def load_generator_pipeline():
-    """Stable Diffusion Inpainting Pipeline'ını yükler."""
-    global inpainting_pipeline
     print(f"\nGenerative AI (Inpainting) modeli yükleniyor... ({MODEL_ID})")
 
     try:
@@ -46,10 +101,152 @@ def load_generator_pipeline():
         return inpainting_pipeline
     except Exception as e:
         print(f"HATA: Generative AI modeli yüklenirken hata oluştu: {e}")
-        inpainting_pipeline = None
         return None
 
 
+registry.register("inpainting", _load_inpainting_pipeline)
+
+
+def load_generator_pipeline():
+    """Inpainting Pipeline'ını önceden yükler (warm-up); yüklü pipeline'ı döndürür."""
+    return registry.get("inpainting")
+
+
+# Pipeline başına özgün zamanlayıcı ve oluşturulmuş zamanlayıcılar ("default" profile dönebilmek için)
+_schedulers = weakref.WeakKeyDictionary()
+
+
+def configure_pipeline(pipeline, profile):
+    """Profilin zamanlayıcı, dikkat dilimleme ve bellek düzeni ayarlarını pipeline'a uygular."""
+    schedulers = _schedulers.setdefault(pipeline, {'default': pipeline.scheduler})
+    name = profile['scheduler']
+    if name not in schedulers:
+        if name not in SCHEDULERS:
+            raise ValueError(f"Bilinmeyen zamanlayıcı: {name} (seçenekler: default, {', '.join(SCHEDULERS)})")
+        import diffusers
+        scheduler_class = getattr(diffusers, SCHEDULERS[name])
+        schedulers[name] = scheduler_class.from_config(schedulers['default'].config)
+    pipeline.scheduler = schedulers[name]
+
+    if profile['attention_slicing']:
+        pipeline.enable_attention_slicing()
+    else:
+        pipeline.disable_attention_slicing()
+
+    memory_format = torch.channels_last if profile['channels_last'] else torch.contiguous_format
+    pipeline.unet.to(memory_format=memory_format)
+    pipeline.vae.to(memory_format=memory_format)
+
+
+# Pipeline başına negatif prompt gömmeleri ve maskeli görüntü latent'leri (LRU); aynı görüntüyle
+# gelen sonraki çağrılarda metin kodlayıcı ve VAE kodlayıcı yeniden çalıştırılmaz
+_negative_embeds = weakref.WeakKeyDictionary()
+_masked_latents = weakref.WeakKeyDictionary()
+_cache_lock = threading.Lock()
+
+
+def clear_redesign_cache():
+    """Negatif prompt gömmesi ve maskeli görüntü latent önbelleklerini boşaltır."""
+    with _cache_lock:
+        _negative_embeds.clear()
+        _masked_latents.clear()
+
+
+def _negative_prompt_embeds(pipeline):
+    """NEGATIVE_PROMPT'un metin gömmesi (1, dizi, boyut); (gömme, önbellekten mi) döndürür."""
+    with _cache_lock:
+        embeds = _negative_embeds.get(pipeline, {}).get(NEGATIVE_PROMPT)
+    if embeds is not None:
+        return embeds, True
+    embeds, _ = pipeline.encode_prompt(NEGATIVE_PROMPT, pipeline.device, 1, False)
+    with _cache_lock:
+        _negative_embeds.setdefault(pipeline, {})[NEGATIVE_PROMPT] = embeds
+    return embeds, False
+
+
+def _masked_image_latents(pipeline, key, image, mask_image, width, height):
+    """
+    Maskeli görüntünün VAE latent'i; (latent, önbellekten mi) döndürür. Pipeline'ın kendi ön işleme
+    adımları kullanılır, ancak latent dağılımından örnek yerine ortalaması alınır: sonuç tohumdan
+    bağımsızdır ve tüm varyantlar / çağrılar aynı latent'i paylaşabilir.
+    """
+    with _cache_lock:
+        entries = _masked_latents.setdefault(pipeline, OrderedDict())
+        latents = entries.get(key)
+        if latents is not None:
+            entries.move_to_end(key)
+            return latents, True
+
+    init_image = pipeline.image_processor.preprocess(image, height=height, width=width).to(dtype=torch.float32)
+    mask_condition = pipeline.mask_processor.preprocess(mask_image, height=height, width=width)
+    masked_image = (init_image * (mask_condition < 0.5)).to(device=pipeline.device, dtype=pipeline.vae.dtype)
+    latents = pipeline.vae.encode(masked_image).latent_dist.mode() * pipeline.vae.config.scaling_factor
+
+    with _cache_lock:
+        entries[key] = latents
+        while len(entries) > MASKED_LATENT_CACHE_SIZE:
+            entries.popitem(last=False)
+    return latents, False
+
+
+def _seeded_generator(seed):
+    """Tohumlanmış üreteç (None: rastgele tohum)."""
+    generator = torch.Generator(DEVICE)
+    if seed is not None:
+        generator.manual_seed(seed)
+    else:
+        generator.seed()
+    return generator
+
+
+def inpainting_region(mask, padding=REGION_PADDING, min_padding=REGION_MIN_PADDING):
+    """
+    Maskenin bbox'ını pay ekleyerek genişletir ve mümkünse kare yapar (model kare girişte en iyi
+    sonucu verir). Görüntü sınırları içinde (x0, y0, x1, y1) döndürür; maske boşsa None.
+    """
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    H, W = mask.shape
+    y0, y1 = rows[0], rows[-1] + 1
+    x0, x1 = cols[0], cols[-1] + 1
+    side = max(x1 - x0, y1 - y0)
+    side += 2 * max(int(side * padding), min_padding)
+    # Kare kenar her eksende görüntü boyutuyla sınırlanır; taşan kutu görüntü içine kaydırılır
+    x_side, y_side = min(side, W), min(side, H)
+    x0 = min(max((x0 + x1 - x_side) // 2, 0), W - x_side)
+    y0 = min(max((y0 + y1 - y_side) // 2, 0), H - y_side)
+    return int(x0), int(y0), int(x0 + x_side), int(y0 + y_side)
+
+
+def _region_size(width, height, target=REGION_SIZE):
+    """Uzun kenarı target olan ve iki kenarı da 8'in katı olan model giriş boyutu (genişlik, yükseklik)."""
+    scale = target / max(width, height)
+    return max(int(round(width * scale / 8)) * 8, 8), max(int(round(height * scale / 8)) * 8, 8)
+
+
+def _paste_region(original_image_np, generated, mask, box, feather=REGION_FEATHER):
+    """
+    Üretilen bölgeyi kutunun boyutuna getirip orijinale yapıştırır. Maske içi tamamen yeni
+    görüntüden alınır; kenarlar feather piksel boyunca yumuşak geçişle karıştırılır.
+    """
+    x0, y0, x1, y1 = box
+    generated = np.asarray(generated.resize((x1 - x0, y1 - y0), Image.LANCZOS), dtype=np.float32)
+    alpha = mask[y0:y1, x0:x1].astype(np.float32)
+    if feather > 1:
+        # Yarım feather genişletme + yarım feather yarıçaplı bulanıklık: geçiş maskeden en fazla feather taşar
+        kernel = 2 * (feather // 2) + 1
+        grown = cv2.dilate(alpha, np.ones((kernel, kernel), np.uint8))
+        alpha = np.maximum(alpha, cv2.GaussianBlur(grown, (kernel, kernel), 0))
+    alpha = alpha[..., None]
+
+    result = original_image_np.copy()
+    region = result[y0:y1, x0:x1].astype(np.float32)
+    result[y0:y1, x0:x1] = np.clip(generated * alpha + region * (1 - alpha) + 0.5, 0, 255).astype(np.uint8)
+    return Image.fromarray(result)
+
+
 def create_redesign_prompt(classified_objects, user_prompt):
     """
     Kullanıcı prompt'u ve tespit edilen nesneleri birleştirerek Stable Diffusion için
@@ -73,112 +270,224 @@ def create_redesign_prompt(classified_objects, user_prompt):
     return final_prompt
 
 
-def find_largest_structural_mask(classified_objects):
-    """
-    Duvar ve zemin etiketleri güvenilir değilse, en büyük iki maskeyi bulur.
-    """
-    structural_labels = set(TRANSLATION_DICT.values()).intersection({'duvar', 'zemin', 'tavan'})
-
-    large_masks = []
-    for obj in classified_objects:
-        if obj['label'] in ['Sınıflandırılamadı', 'boş alan'] or obj['label'] in structural_labels:
-            large_masks.append((obj['area'], obj['mask'], obj))
-
-    large_masks.sort(key=lambda x: x[0], reverse=True)
-
-    return large_masks[:3]
+def structural_candidate_labels():
+    """Yapısal maske adayı etiketler: güvenilmeyen etiketler + çeviri tablosundaki duvar/zemin/tavan."""
+    return set(UNRELIABLE_LABELS) | set(TRANSLATION_DICT.values()).intersection({'duvar', 'zemin', 'tavan'})
 
 
-def generate_redesign_image(original_image_np, classified_objects, user_prompt):
+def find_largest_structural_mask(classified_objects, index=None):
     """
-    Orijinal görüntüyü ve maskeyi kullanarak Stable Diffusion ile yeni görsel üretir.
+    Duvar ve zemin etiketleri güvenilir değilse, en büyük üç yapısal adayı (alan, maske, nesne)
+    olarak döndürür. Alanlar SAM çıktısından gelir (mask_composition.object_area).
     """
-    global inpainting_pipeline
-    if inpainting_pipeline is None:
-        return None
+    index = index or LabelIndex(classified_objects)
+    return [(object_area(index.objects[i]), index.objects[i]['mask'], index.objects[i])
+            for i in index.largest(structural_candidate_labels(), STRUCTURAL_CANDIDATE_COUNT)]
 
-    # --- 1. Maskeleri Birleştirme ve Kullanıcı İsteği Kontrolü ---
 
-    H, W, _ = original_image_np.shape
-    combined_mask_np = np.zeros((H, W), dtype=bool)
+def redesign_mask(image_shape, classified_objects, user_prompt):
+    """
+    Kullanıcı isteğine göre değiştirilecek nesnelerin maskelerini tek uint8 maskede birleştirir.
+    (maske, değiştirilecek etiketler kümesi) döndürür.
+    """
+    index = LabelIndex(classified_objects)
     objects_to_change = set()
-
-    CHANGEABLE_OBJECTS = ['koltuk', 'kanepe', 'sandalye', 'masa', 'halı', 'lamba', 'dolap', 'puf', 'yatak', 'komodin']
     prompt_lower = user_prompt.lower()
 
     is_wall_requested = any(
         word in prompt_lower for word in ['duvar', 'wall', 'siyah duvar', 'beyaz duvar', 'duvarları'])
     is_floor_requested = any(word in prompt_lower for word in ['zemin', 'floor', 'yer', 'fayans'])
 
-    # Eğer Duvar veya Zemin istenmişse, en büyük maskeleri bul ve maskele
+    # Eğer Duvar veya Zemin istenmişse, en büyük adaylardan uygun etiketli ilki genişletilerek maskelenir
+    structural_masks = []
     if is_wall_requested or is_floor_requested:
-        largest_masks_info = find_largest_structural_mask(classified_objects)
-
-        for area, mask, obj in largest_masks_info:
-            current_label = obj['label']
-
-            if (is_wall_requested and current_label in ['duvar', 'Sınıflandırılamadı', 'boş alan']) or \
-                    (is_floor_requested and current_label in ['zemin', 'Sınıflandırılamadı', 'boş alan']):
-
-                # MASK DİLASYONU (Genişletme) UYGULANIYOR!
-                kernel = np.ones((MASK_DILATION_SIZE, MASK_DILATION_SIZE), np.uint8)
-                # bool maskeyi uint8'e çevir
-                mask_uint8 = mask.astype(np.uint8) * 255
-                dilated_mask = cv2.dilate(mask_uint8, kernel, iterations=1)
-                dilated_mask_bool = dilated_mask.astype(bool)
-
-                # 1. Maskeyi birleştir (genişletilmiş maske ile)
-                combined_mask_np = np.logical_or(combined_mask_np, dilated_mask_bool)
-
-                # 2. Etiketi objects_to_change setine ekle
-                if is_wall_requested and 'duvar' not in objects_to_change:
-                    objects_to_change.add('duvar')
-                if is_floor_requested and 'zemin' not in objects_to_change:
-                    objects_to_change.add('zemin')
-
-                # Sadece en büyük maskeyi aldıktan sonra diğer yapısal maskeleri almayı durdur
-                if is_wall_requested or is_floor_requested:
-                    break  # En büyük (muhtemelen duvar) maskeyi aldıktan sonra döngüden çık
-
-    # Mobilya maskelerini birleştirme (genişletme yapılmaz)
-    for obj in classified_objects:
-        if obj['label'] in CHANGEABLE_OBJECTS:
-            combined_mask_np = np.logical_or(combined_mask_np, obj['mask'])
-            objects_to_change.add(obj['label'])
-
-    if not objects_to_change:
-        print("UYARI: Yeniden tasarlanacak anlamlı nesne (mobilya, duvar, zemin) bulunamadı.")
-        return Image.fromarray(original_image_np)
-
-    # NumPy dizilerini PIL Image formatına dönüştürme
-    image = Image.fromarray(original_image_np).convert("RGB")
-    mask_image = Image.fromarray((combined_mask_np.astype(np.uint8) * 255)).convert("L")
-
-    # --- 2. Prompt'u Oluşturma ---
-    full_prompt = create_redesign_prompt(classified_objects, user_prompt)
-
-    # --- 3. Görüntü Oluşturma (Inpainting) ---
+        accepted = set(UNRELIABLE_LABELS)
+        if is_wall_requested:
+            accepted.add('duvar')
+        if is_floor_requested:
+            accepted.add('zemin')
+        structural = index.first_accepted(structural_candidate_labels(), accepted)
+        if structural is not None:
+            structural_masks.append(index.objects[structural]['mask'])
+            if is_wall_requested:
+                objects_to_change.add('duvar')
+            if is_floor_requested:
+                objects_to_change.add('zemin')
+
+    # Mobilya maskeleri genişletilmeden eklenir
+    furniture = [index.objects[i] for i in index.indices(CHANGEABLE_OBJECTS)]
+    objects_to_change.update(obj['label'] for obj in furniture)
+
+    # Tek uint8 tampon; maskeler yalnızca bbox bölgelerinde yerinde birleştirilir, dilasyon yalnızca
+    # seçilen yapısal maskeye önbellekteki çekirdekle uygulanır
+    combined_mask_np = compose_mask(image_shape, [obj['mask'] for obj in furniture],
+                                    dilated_masks=structural_masks, dilation_size=MASK_DILATION_SIZE)
+    return combined_mask_np, objects_to_change
+
+
+def _resolve_profile(profile=None):
+    """Profil adını ya da ayar sözlüğünü ayar sözlüğüne çevirir (None: INPAINTING_PROFILE)."""
+    if profile is None:
+        profile = INPAINTING_PROFILE
+    if isinstance(profile, str):
+        if profile not in INPAINTING_PROFILES:
+            raise ValueError(f"Bilinmeyen inpainting profili: {profile} "
+                             f"(seçenekler: {', '.join(INPAINTING_PROFILES)})")
+        profile = INPAINTING_PROFILES[profile]
+    return profile
+
+
+def _model_inputs(pipeline, original_image_np, combined_mask_np, region):
+    """Modele verilecek (görüntü, maske, genişlik, yükseklik); bölge modunda yalnızca maskenin çevresi."""
+    if region is not None:
+        x0, y0, x1, y1 = region
+        width, height = _region_size(x1 - x0, y1 - y0)
+        image = Image.fromarray(original_image_np[y0:y1, x0:x1]).resize((width, height), Image.LANCZOS)
+        mask_image = Image.fromarray(combined_mask_np[y0:y1, x0:x1] * 255).resize((width, height), Image.BILINEAR)
+        return image, mask_image, width, height
+    # uint8 RGB dizi doğrudan RGB görüntüdür; convert ikinci bir tam kare kopya oluştururdu.
+    # Boyut verilmezse pipeline'ın varsayılanı (UNet örnek boyutu) kullanılır
+    size = pipeline.unet.config.sample_size * pipeline.vae_scale_factor
+    return Image.fromarray(original_image_np), Image.fromarray(combined_mask_np * 255), size, size
+
+
+def generate_redesign_variants(original_image_np, classified_objects, user_prompts, seeds=None, profile=None,
+                               steps=None, batch_size=None, stats=None):
+    """
+    Birden çok stil prompt'u ve/veya tohum için yeniden tasarım varyantları üretir; prompt × tohum
+    sırasıyla (önce prompt) PIL görüntüleri listesi döndürür (hata olursa None). seeds verilmezse
+    DEFAULT_SEED; listedeki None rastgele tohumdur.
+
+    Aynı maskeyi veren prompt'lar tek pipeline çağrısında (en fazla batch_size / VARIANT_BATCH_SIZE
+    varyant) işlenir: maske birleştirme, bölge kırpma, pipeline ayarı ve maskeli görüntünün VAE
+    kodlaması bir kez yapılır. Negatif prompt gömmesi ve maskeli görüntü latent'i aynı görüntüyle
+    gelen sonraki çağrılar için önbellekte tutulur. Her varyant kendi tohumlu üretecini kullandığından
+    tek başına üretimle aynı gürültüden başlar.
+    """
+    profile = _resolve_profile(profile)
+    steps = steps or profile['steps']
+    batch_size = VARIANT_BATCH_SIZE if batch_size is None else batch_size
+    prompts = [user_prompts] if isinstance(user_prompts, str) else list(user_prompts)
+    if seeds is None:
+        seeds = [DEFAULT_SEED]
+    elif isinstance(seeds, int):
+        seeds = [seeds]
+    else:
+        seeds = list(seeds)
+    if not prompts or not seeds:
+        return []
+
+    # Pipeline ilk yeniden tasarım isteğinde yüklenir
+    inpainting_pipeline = registry.get("inpainting")
+    if inpainting_pipeline is None:
+        return None
 
-    print(f"\n--- Generative AI İşlemi Başlatılıyor (CFG: {CFG_SCALE}, Dilasyon: {MASK_DILATION_SIZE}px) ---")
-    print(f"Maskelenenler: {', '.join(objects_to_change)}")
-    print(f"Nihai Prompt: {full_prompt[:120]}...")
+    # --- 1. Maskeleri Birleştirme; aynı maskeyi veren prompt'lar gruplanır ---
+    results = [None] * (len(prompts) * len(seeds))
+    groups = {}
+    for p, user_prompt in enumerate(prompts):
+        combined_mask_np, objects_to_change = redesign_mask(original_image_np.shape, classified_objects, user_prompt)
+        if not objects_to_change:
+            print(f"UYARI: '{user_prompt}' için yeniden tasarlanacak anlamlı nesne (mobilya, duvar, zemin) "
+                  f"bulunamadı.")
+            for s in range(len(seeds)):
+                results[p * len(seeds) + s] = Image.fromarray(original_image_np)
+            continue
+        group = groups.setdefault(image_content_hash(combined_mask_np),
+                                  {'mask': combined_mask_np, 'objects': set(), 'prompts': []})
+        group['objects'].update(objects_to_change)
+        group['prompts'].append(p)
+
+    run_stats = {'seconds': 0.0, 'steps': steps, 'scheduler': profile['scheduler'], 'variants': len(results),
+                 'batches': 0, 'masked_latent_cache_hits': 0, 'negative_embeds_cache_hits': 0}
+    if not groups:
+        if stats is not None:
+            stats.update(run_stats)
+        return results
+
+    print(f"\n--- Generative AI İşlemi Başlatılıyor (CFG: {CFG_SCALE}, Dilasyon: {MASK_DILATION_SIZE}px, "
+          f"Adım: {steps}, Zamanlayıcı: {profile['scheduler']}, Varyant: {len(results)}) ---")
 
     try:
-        generator = torch.Generator(DEVICE).manual_seed(42)
-
-        output = inpainting_pipeline(
-            prompt=full_prompt,
-            image=image,
-            mask_image=mask_image,
-            # CFG_SCALE Kullanılıyor
-            guidance_scale=CFG_SCALE,
-            negative_prompt="bad quality, blurry, noise, distortions, disfigured, monochrome, cartoon, painting, changed perspective, changed furniture location",
-            num_inference_steps=50,
-            generator=generator
-        )
-        print("Generative AI yeniden tasarımı tamamlandı.")
-        return output.images[0]
+        configure_pipeline(inpainting_pipeline, profile)
+        image_key = image_content_hash(original_image_np)
+        chunk = batch_size or len(results)
+
+        for mask_key, group in groups.items():
+            combined_mask_np = group['mask']
+            region = inpainting_region(combined_mask_np) if profile['region'] else None
+            image, mask_image, width, height = _model_inputs(inpainting_pipeline, original_image_np,
+                                                             combined_mask_np, region)
+            full_prompts = [create_redesign_prompt(classified_objects, prompts[p]) for p in group['prompts']]
+            print(f"Maskelenenler: {', '.join(group['objects'])}")
+            for full_prompt in full_prompts:
+                print(f"Nihai Prompt: {full_prompt[:120]}...")
+            if region is not None:
+                print(f"İşlenen bölge: {region} -> {width}x{height}")
+
+            # --- 2. Prompt ve Maskeli Görüntü Kodlama (önbellekli) ---
+            with torch.no_grad():
+                prompt_embeds, _ = inpainting_pipeline.encode_prompt(full_prompts, inpainting_pipeline.device, 1,
+                                                                     False)
+                negative_embeds, negative_hit = _negative_prompt_embeds(inpainting_pipeline)
+                masked_latents, latent_hit = _masked_image_latents(
+                    inpainting_pipeline, (image_key, mask_key, region, width, height), image, mask_image, width,
+                    height)
+            run_stats['negative_embeds_cache_hits'] += negative_hit
+            run_stats['masked_latent_cache_hits'] += latent_hit
+            profiling.count("masked_latent_cache_hits", int(latent_hit))
+
+            # --- 3. Görüntü Oluşturma (Inpainting): varyantlar batch halinde ---
+            variants = [(row, p, s) for row, p in enumerate(group['prompts']) for s in range(len(seeds))]
+            for start in range(0, len(variants), chunk):
+                batch = variants[start:start + chunk]
+                t0 = time.perf_counter()
+                with profiling.stage("diffusion"):
+                    output = inpainting_pipeline(
+                        prompt_embeds=prompt_embeds[[row for row, _, _ in batch]],
+                        negative_prompt_embeds=negative_embeds.repeat(len(batch), 1, 1),
+                        image=image,
+                        mask_image=mask_image,
+                        masked_image_latents=masked_latents,
+                        # CFG_SCALE Kullanılıyor
+                        guidance_scale=CFG_SCALE,
+                        num_inference_steps=steps,
+                        generator=[_seeded_generator(seeds[s]) for _, _, s in batch],
+                        width=width,
+                        height=height,
+                    )
+                run_stats['seconds'] += time.perf_counter() - t0
+                run_stats['batches'] += 1
+
+                for (_, p, s), generated in zip(batch, output.images):
+                    result = generated
+                    if region is not None:
+                        result = _paste_region(original_image_np, generated, combined_mask_np, region)
+                    results[p * len(seeds) + s] = result
+                    run_stats.setdefault('region', list(region) if region is not None else None)
+                    run_stats.setdefault('model_size', list(generated.size))
+                    run_stats.setdefault('output_size', list(result.size))
+
+        run_stats['peak_rss_mb'] = profiling.peak_rss_mb()
+        print(f"Generative AI yeniden tasarımı tamamlandı. (Süre: {run_stats['seconds']:.1f} s, "
+              f"{run_stats['batches']} çağrı, tepe bellek: {run_stats['peak_rss_mb']:.0f} MB)")
+        if stats is not None:
+            stats.update(run_stats)
+        return results
 
     except Exception as e:
         print(f"Generative AI üretimi sırasında hata oluştu: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def generate_redesign_image(original_image_np, classified_objects, user_prompt, profile=None, steps=None,
+                            seed=DEFAULT_SEED, stats=None):
+    """
+    Orijinal görüntüyü ve maskeyi kullanarak Stable Diffusion ile yeni görsel üretir.
+    profile: INPAINTING_PROFILES anahtarı ya da ayar sözlüğü (verilmezse INPAINTING_PROFILE);
+    steps profilin adım sayısını geçersiz kılar. stats sözlüğü verilirse süre, adım, bölge ve
+    tepe bellek bilgileriyle doldurulur. Tek varyantlı generate_redesign_variants çağrısıdır.
+    """
+    images = generate_redesign_variants(original_image_np, classified_objects, [user_prompt], seeds=[seed],
+                                        profile=profile, steps=steps, stats=stats)
+    return images[0] if images else None
@@ -0,0 +1,215 @@
+# image_io.py
+import mmap
+import os
+
+import cv2
+import numpy as np
+
+import profiling
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Verilirse JPEG'ler uzun kenarı bu değerin altına düşmeyecek en küçük ölçekte (1/2, 1/4, 1/8)
+# doğrudan küçültülerek çözülür (libjpeg DCT ölçekleme); tam çözünürlüklü kare hiç oluşmaz. 1600 ile
+# 12 MP bir telefon fotoğrafı (4032x3024) 2016x1512 olarak çözülür. Koordinatlar (bbox, maske) ve
+# yeniden tasarım çıktısı da bu boyutta olur; kayıtlardaki original_width/original_height ve
+# decode_scale alanları özgün boyutu verir. None / 0: her zaman tam çözünürlük (varsayılan).
+DECODE_MAX_SIDE = 0
+
+# Küçültme oranına karşılık gelen OpenCV bayrağı
+_REDUCED_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+# OpenCV >= 4.10: doğrudan RGB çözme ve önceden ayrılmış diziye okuma
+_IMREAD_COLOR_RGB = getattr(cv2, "IMREAD_COLOR_RGB", None)
+
+# Boyut bilgisini taşıyan JPEG SOF işaretçileri (DHT/JPG/DAC dışındaki C0-CF)
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+# --------------------------------------------------------------------------
+# BAŞLIK OKUMA
+# --------------------------------------------------------------------------
+
+def as_buffer(data):
+    """bytes / bytearray / memoryview / mmap verisini kopyalamadan uint8 diziye bağlar."""
+    try:
+        return np.frombuffer(data, dtype=np.uint8)
+    except (TypeError, ValueError):
+        # Bitişik olmayan memoryview'lar yalnızca kopyalanarak okunabilir
+        return np.frombuffer(memoryview(data).tobytes(), dtype=np.uint8)
+
+
+def jpeg_size(buffer):
+    """
+    JPEG başlığındaki (SOF) (genişlik, yükseklik); veri JPEG değilse ya da başlık eksikse (SOS
+    işaretçisine ulaşılamıyorsa) None. Yalnızca işaretçiler gezilir, piksel verisi çözülmez.
+    Boyut EXIF döndürmesi uygulanmadan önceki boyuttur.
+    """
+    data = memoryview(buffer)
+    n = len(data)
+    if n < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i, size = 2, None
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # dolgu baytı
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # uzunluğu olmayan işaretçiler
+            i += 2
+            continue
+        if marker == 0xDA:  # SOS: başlık tamam, sıkıştırılmış veri başlıyor
+            return size
+        if marker in _SOF_MARKERS and i + 9 <= n:
+            size = (data[i + 7] << 8) | data[i + 8], (data[i + 5] << 8) | data[i + 6]
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+
+def decoded_shape(buffer, max_side=None):
+    """
+    Verinin çözüleceği (yükseklik, genişlik) ve küçültme oranı; JPEG değilse None. max_side'ın
+    altına inmeyen en küçük ölçek seçilir (libjpeg çıktıyı yukarı yuvarlar). Boyut EXIF döndürmesi
+    uygulanmadan önceki boyuttur.
+    """
+    max_side = DECODE_MAX_SIDE if max_side is None else max_side
+    size = jpeg_size(buffer)
+    if size is None:
+        return None
+    width, height = size
+    factor = _reduction(width, height, max_side)
+    return (-(-height // factor), -(-width // factor)), factor
+
+
+def _reduction(width, height, max_side):
+    """Uzun kenarı max_side'ın altına indirmeyen en büyük küçültme oranı (8, 4, 2 ya da 1)."""
+    for factor in (8, 4, 2):
+        if max_side and max(width, height) // factor >= max_side:
+            return factor
+    return 1
+
+
+def _source_size(source):
+    """Yol ya da kodlanmış veri için JPEG başlığındaki (genişlik, yükseklik); JPEG değilse None."""
+    if isinstance(source, (str, os.PathLike)):
+        try:
+            with open(source, "rb") as f:
+                if not os.fstat(f.fileno()).st_size:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return jpeg_size(as_buffer(mapped))
+        except OSError:
+            return None
+    return jpeg_size(as_buffer(source))
+
+
+def decode_info(source, image, max_side=None):
+    """
+    Çözülen görüntünün kaynağa göre boyut bilgisi: {'original_width', 'original_height',
+    'decode_scale'}. decode_scale çözme sırasındaki küçültme oranıdır (1.0, 0.5, 0.25, 0.125);
+    koordinatlar 1 / decode_scale ile çarpılarak özgün boyuta taşınır. Küçültme kapalıysa
+    (max_side / DECODE_MAX_SIDE 0) ya da kaynak dizi veya JPEG dışı ise başlık okunmaz.
+    """
+    height, width = image.shape[:2]
+    info = {'original_width': width, 'original_height': height, 'decode_scale': 1.0}
+    max_side = DECODE_MAX_SIDE if max_side is None else max_side
+    if not max_side or isinstance(source, np.ndarray):
+        return info
+    size = _source_size(source)
+    factor = _reduction(*size, max_side) if size else 1
+    if factor == 1:
+        return info
+    src_width, src_height = size
+    # EXIF döndürmesi genişlik ve yüksekliği yer değiştirmiş olabilir
+    if (height, width) != (-(-src_height // factor), -(-src_width // factor)):
+        src_width, src_height = src_height, src_width
+    info.update(original_width=src_width, original_height=src_height, decode_scale=1.0 / factor)
+    return info
+
+
+def _flag(factor):
+    """Küçültme oranına karşılık gelen OpenCV bayrağı; destekleniyorsa doğrudan RGB çözülür."""
+    flag = _REDUCED_FLAGS.get(factor, cv2.IMREAD_COLOR)
+    if _IMREAD_COLOR_RGB is not None:
+        flag = (flag & ~cv2.IMREAD_COLOR) | _IMREAD_COLOR_RGB
+    return flag
+
+
+def _to_rgb(image):
+    """Doğrudan RGB çözemeyen OpenCV sürümlerinde BGR -> RGB dönüşümü aynı dizide yapılır."""
+    if image is None or _IMREAD_COLOR_RGB is not None:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+
+
+# --------------------------------------------------------------------------
+# ÇÖZME
+# --------------------------------------------------------------------------
+
+def decode_buffer(buffer, max_side=None):
+    """
+    Kodlanmış görüntüyü (uint8 dizi) RGB diziye çözer; çözülemezse None. EXIF yönü OpenCV
+    tarafından uygulanır; BGR ara kopyası oluşmaz.
+    """
+    shape = decoded_shape(buffer, max_side)
+    return _to_rgb(cv2.imdecode(buffer, _flag(shape[1] if shape else 1)))
+
+
+def read_file(path, max_side=None):
+    """
+    Dosyayı RGB diziye çözer. JPEG'lerde boyut, belleğe eşlenen dosyanın başlığından okunur ve
+    görüntü önceden ayrılan tek diziye doğrudan çözülür (imdecode'un ara kopyası oluşmaz). Dosya
+    yoksa FileNotFoundError, çözülemezse ValueError yükselir.
+    """
+    with profiling.stage("read_image"):
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+        except (FileNotFoundError, IsADirectoryError):
+            raise FileNotFoundError(f"Görüntü bulunamadı: {path}")
+        if mapped is None:
+            raise ValueError(f"Görüntü çözülemedi (boş dosya): {path}")
+        try:
+            # Geçici dizi çağrıdan sonra bırakılır; eşleme üzerinde dizi varken kapatılamaz
+            shape = decoded_shape(as_buffer(mapped), max_side)
+        finally:
+            mapped.close()
+        image = None
+        if shape is not None and _IMREAD_COLOR_RGB is not None:
+            # EXIF döndürmesi gereken görüntülerde OpenCV yeni bir dizi döndürür. Bu yolda çözme
+            # hatası bildirilmediğinden başlığı eksik dosyalar jpeg_size'da elenir; dizi sıfırla
+            # ayrılır (sayfalar yazılana kadar bellek tutmaz)
+            try:
+                image = cv2.imread(path, np.zeros((*shape[0], 3), dtype=np.uint8), _flag(shape[1]))
+            except cv2.error:
+                image = None  # başlık ile çözülen boyut uyuşmazsa dizisiz okunur
+        if image is None or image.size == 0:
+            image = _to_rgb(cv2.imread(path, _flag(shape[1] if shape else 1)))
+    if image is None or image.size == 0:
+        raise ValueError(f"Görüntü çözülemedi (desteklenmeyen ya da bozuk veri): {path}")
+    return image
+
+
+def decode_bytes(data, max_side=None):
+    """bytes / bytearray / memoryview / mmap içindeki kodlanmış görüntüyü kopyalamadan RGB diziye çözer."""
+    with profiling.stage("read_image"):
+        image = decode_buffer(as_buffer(data), max_side)
+    if image is None:
+        raise ValueError("Görüntü çözülemedi (desteklenmeyen ya da bozuk veri).")
+    return image
+
+
+def load_image(source, max_side=None):
+    """
+    Dosya yolu, kodlanmış veri (bytes, bytearray, memoryview, mmap) ya da RGB dizi kabul eder ve
+    tüm aşamaların paylaşacağı tek RGB diziyi döndürür (dizi verilirse kopyalanmaz).
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        return read_file(os.fspath(source), max_side)
+    return decode_bytes(source, max_side)
@@ -0,0 +1,112 @@
+# label_table.py
+import threading
+
+import torch
+
+import labels
+
+# --------------------------------------------------------------------------
+# ETİKET KARAR TABLOSU
+# --------------------------------------------------------------------------
+
+UNCLASSIFIED_LABEL = "Sınıflandırılamadı"
+
+
+def clean_label(raw_label):
+    """id2label girdisini temiz etikete dönüştürür ("n03201208: dining table" -> "dining table")."""
+    if ":" in raw_label:
+        return raw_label.split(":")[-1].strip().lower()
+    return raw_label.lower()
+
+
+def base_label(full_label, whitelist=None):
+    """Çok kelimeli bir etiketten Whitelist'e uyan ilk temel nesne adını döndürür."""
+    if whitelist is None:
+        whitelist = labels.INTERIOR_WHITELIST
+    parts = full_label.replace(',', ' ').replace('-', ' ').split()
+    for part in parts:
+        if part in whitelist:
+            return part
+    return full_label
+
+
+def labels_signature():
+    """
+    labels.py tablolarının o anki içeriği. Tablolar yerinde değiştirilse de (append, update)
+    yeniden atansa da imza değişir ve karar tablosu yeniden derlenir.
+    """
+    return (tuple(labels.INTERIOR_WHITELIST), tuple(labels.TRANSLATION_DICT.items()),
+            tuple(labels.STRUCTURAL_WHITELIST), tuple(labels.NEGATIVE_FILTER_LIST))
+
+
+class LabelDecisionTable:
+    """
+    ViT'in id2label uzayını bir kez derleyip sınıf başına temel etiketi, blacklist/whitelist/yapısal
+    bayraklarını ve Türkçe karşılığı tutar. Karar kuralları top-k sonuçlarının bir batch'i üzerinde
+    tensör işlemleriyle uygulanır; etiket başına string işlemi yapılmaz.
+    """
+
+    def __init__(self, id2label):
+        self.id2label = id2label
+        self.signature = labels_signature()
+        whitelist = set(labels.INTERIOR_WHITELIST)
+        structural = set(labels.STRUCTURAL_WHITELIST)
+
+        num_classes = max(int(i) for i in id2label) + 1
+        self.clean_labels = [""] * num_classes
+        for idx, raw in id2label.items():
+            self.clean_labels[int(idx)] = clean_label(raw)
+        self.base_labels = [base_label(label, whitelist) for label in self.clean_labels]
+
+        self.blacklisted = torch.tensor(
+            [any(neg_word in label for neg_word in labels.NEGATIVE_FILTER_LIST) for label in self.clean_labels])
+        self.whitelisted = torch.tensor([base in whitelist for base in self.base_labels])
+        self.structural = torch.tensor([base in structural for base in self.base_labels])
+
+        # Son indeks "Sınıflandırılamadı" için ayrılmıştır
+        self.translations = [labels.TRANSLATION_DICT.get(base, base) for base in self.base_labels]
+        self.translations.append(UNCLASSIFIED_LABEL)
+        self.unclassified_index = num_classes
+
+    def decide(self, top_k_probs, top_k_indices, areas, required_area_pixels, min_confidence):
+        """
+        (N, k) top-k olasılık/indeksleri ve N alan için nihai Türkçe etiket listesini döndürür.
+        Kurallar: güven eşiği, büyük alanda yapısal etiket, blacklist'e takılmayan ilk whitelist
+        adayı, son çare olarak top-1 (blacklist'teyse "Sınıflandırılamadı").
+        """
+        probs = torch.as_tensor(top_k_probs, dtype=torch.float64).cpu()
+        indices = torch.as_tensor(top_k_indices, dtype=torch.long).cpu()
+        if indices.numel() == 0:
+            return []
+        large = torch.as_tensor(areas, dtype=torch.float64) > required_area_pixels
+        top_1 = indices[:, 0]
+
+        # Whitelist taraması: her satırda blacklist dışı ilk whitelist adayı (argmax ilk True'yu verir)
+        candidates = self.whitelisted[indices] & ~self.blacklisted[indices]
+        first = candidates.to(torch.uint8).argmax(dim=1, keepdim=True)
+        choice = torch.where(candidates.any(dim=1), indices.gather(1, first).squeeze(1),
+                             torch.where(self.blacklisted[top_1], self.unclassified_index, top_1))
+
+        # Büyük alanda top-1 yapısal ise doğrudan o seçilir
+        choice = torch.where(large & self.structural[top_1], top_1, choice)
+
+        # Düşük güven yalnızca büyük olmayan alanlarda sınıflandırmayı durdurur
+        choice = torch.where((probs[:, 0] < min_confidence) & ~large, self.unclassified_index, choice)
+
+        return [self.translations[c] for c in choice.tolist()]
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_decision_table(id2label):
+    """Model ve etiket tabloları için derlenmiş karar tablosunu döndürür; değiştiyse yeniden derler."""
+    global _table
+    table = _table
+    if table is not None and table.id2label is id2label and table.signature == labels_signature():
+        return table
+    with _table_lock:
+        if _table is None or _table.id2label is not id2label or _table.signature != labels_signature():
+            _table = LabelDecisionTable(id2label)
+        return _table
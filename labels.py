@@ -0,0 +1,38 @@
+# labels.py
+# Etiket tabloları model yükleyen modüllerden ayrı tutulur; böylece bir etiket
+# araması ya da `import generator` ViT ağırlıklarını yüklemez.
+
+# --------------------------------------------------------------------------
+# ETİKET TABLOLARI
+# --------------------------------------------------------------------------
+
+INTERIOR_WHITELIST = [
+    'bed', 'sofa', 'chair', 'table', 'lamp', 'wardrobe', 'closet',
+    'nightstand', 'mirror', 'rug', 'cabinet', 'shelf', 'ottoman',
+    'wall', 'ceiling', 'floor', 'tile', 'plaster', 'wallpaper', 'room', 'space',
+    'quilt', 'cushion', 'pillow', 'curtain', 'window', 'shade', 'frame', 'pouf',
+    'couch', 'sectional', 'daybed', 'dresser', 'comforter', 'press', 'console',
+    'art', 'picture', 'painting', 'basket', 'plant', 'vase', 'clock', 'sconce',
+    'stove', 'sink', 'washbasin', 'lavabo', 'desk'
+]
+
+TRANSLATION_DICT = {
+    'bed': 'yatak', 'sofa': 'koltuk', 'chair': 'sandalye', 'table': 'masa',
+    'lamp': 'lamba', 'wardrobe': 'gardırop', 'closet': 'dolap',
+    'nightstand': 'komodin', 'mirror': 'ayna', 'rug': 'halı',
+    'cabinet': 'dolap', 'shelf': 'raf', 'ottoman': 'puf', 'pouf': 'puf',
+    'couch': 'kanepe', 'desk': 'çalışma masası', 'window': 'pencere',
+    'wall': 'duvar', 'ceiling': 'tavan', 'floor': 'zemin', 'tile': 'fayans',
+    'curtain': 'perde', 'quilt': 'yorgan', 'cushion': 'yastık',
+    'pillow': 'yastık', 'frame': 'çerçeve', 'art': 'sanat eseri',
+    'picture': 'resim', 'painting': 'tablo', 'basket': 'sepet',
+    'plant': 'bitki', 'vase': 'vazo', 'stove': 'ocak', 'sink': 'lavabo',
+    'space': 'boş alan', 'windsor': 'yastık',
+    'tobacco': 'dolap', 'shop': 'dolap', 'vest': 'yastık', 'tie': 'yastık',
+    'abaya': 'örtü', 'daybed': 'yatak', 'plate': 'raf', 'rack': 'raf'
+}
+
+# Yapısal (büyük alanlı) etiketler ve negatif filtre listesi
+STRUCTURAL_WHITELIST = ['wall', 'floor', 'ceiling', 'room', 'space', 'plaster', 'tile']
+NEGATIVE_FILTER_LIST = ['tobacco', 'bulletproof', 'abaya', 'bula', 'bola', 'tie', 'windsor',
+                        'terrier', 'retriever', 'bulldog', 'schnauzer', 'beagle', 'swab', 'mop']
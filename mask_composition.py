@@ -0,0 +1,156 @@
+# mask_composition.py
+import functools
+
+import numpy as np
+
+import profiling
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Duvar/zemin istendiğinde yapısal maske, alanı en büyük bu kadar aday arasından seçilir
+STRUCTURAL_CANDIDATE_COUNT = 3
+
+
+@functools.lru_cache(maxsize=8)
+def dilation_kernel(size):
+    """size×size kare dilasyon çekirdeği; boyut başına bir kez oluşturulur (salt okunur)."""
+    kernel = np.ones((size, size), np.uint8)
+    kernel.flags.writeable = False
+    return kernel
+
+
+def object_area(obj):
+    """Nesnenin piksel alanı: SAM çıktısındaki 'area' (eski kayıtlarda yoksa maskeden sayılır)."""
+    area = obj.get('area')
+    return int(area) if area is not None else obj['mask'].area
+
+
+# --------------------------------------------------------------------------
+# ETİKET İNDEKSİ
+# --------------------------------------------------------------------------
+
+class LabelIndex:
+    """
+    Sınıflandırılmış nesneler için etiket → nesne sırası indeksi. Her etiketin nesneleri alana göre
+    büyükten küçüğe (eşitlikte liste sırasıyla) tutulur; etiket seçimi listeyi yeniden taramaz.
+    """
+
+    def __init__(self, classified_objects):
+        self.objects = list(classified_objects)
+        self.areas = np.array([object_area(obj) for obj in self.objects], dtype=np.int64)
+        self._by_label = {}
+        for i in np.argsort(-self.areas, kind="stable"):
+            self._by_label.setdefault(self.objects[i]['label'], []).append(int(i))
+
+    def indices(self, labels):
+        """Etiketi labels içinde olan nesnelerin sıraları, alana göre büyükten küçüğe."""
+        selected = [i for label in set(labels) for i in self._by_label.get(label, ())]
+        selected.sort(key=lambda i: (-self.areas[i], i))
+        return selected
+
+    def largest(self, labels, count):
+        """Etiketi labels içinde olan en büyük count nesnenin sıraları."""
+        return self.indices(labels)[:count]
+
+    def first_accepted(self, candidate_labels, accepted_labels, count=STRUCTURAL_CANDIDATE_COUNT):
+        """
+        candidate_labels içindeki en büyük count nesneden, etiketi accepted_labels içinde olan
+        ilkinin sırası; yoksa None.
+        """
+        for i in self.largest(candidate_labels, count):
+            if self.objects[i]['label'] in accepted_labels:
+                return i
+        return None
+
+
+# --------------------------------------------------------------------------
+# BİRLEŞTİRME VE DİLASYON
+# --------------------------------------------------------------------------
+
+def union_into(buffer, masks):
+    """
+    Maskeleri (CompactMask, LazyUpsampledMask, StoredMask) H×W uint8 tamponuna yerinde, yalnızca
+    her maskenin bbox bölgesinde bit düzeyinde VEYA ile ekler (maske pikselleri 1 olur).
+    """
+    for mask in masks:
+        x0, y0 = mask.offset
+        h, w = mask.crop_shape
+        region = buffer[y0:y0 + h, x0:x0 + w]
+        np.bitwise_or(region, mask.crop().view(np.uint8), out=region)
+    return buffer
+
+
+def dilate_mask(mask, size):
+    """Maskeyi önbellekteki size×size çekirdekle, yalnızca bbox çevresinde genişletir."""
+    if size <= 1:
+        return mask
+    return mask.dilate(size, dilation_kernel(size))
+
+
+def compose_mask(shape, masks, dilated_masks=(), dilation_size=0, buffer=None):
+    """
+    masks ile dilation_size kadar genişletilmiş dilated_masks'in birleşimini H×W uint8 (0/1)
+    tamponunda döndürür. buffer verilirse sıfırlanıp yeniden kullanılır.
+    """
+    if buffer is None:
+        buffer = np.zeros(shape[:2], dtype=np.uint8)
+    else:
+        buffer.fill(0)
+    with profiling.stage("mask_dilate"):
+        dilated = [dilate_mask(mask, dilation_size) for mask in dilated_masks]
+    with profiling.stage("mask_union"):
+        return union_into(buffer, dilated + list(masks))
+
+
+# --------------------------------------------------------------------------
+# ÖRTÜŞME ÖLÇÜLERİ
+# --------------------------------------------------------------------------
+
+def bbox_intersection_matrix(boxes_a, boxes_b):
+    """XYWH kutu dizileri (N, 4) ve (M, 4) arasındaki kesişim alanları (N, M), tek seferde hesaplanır."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    ax1, ay1 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx1, by1 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    iw = np.minimum(ax1[:, None], bx1[None]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    ih = np.minimum(ay1[:, None], by1[None]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    return np.clip(iw, 0, None) * np.clip(ih, 0, None)
+
+
+def bbox_iou_matrix(boxes_a, boxes_b):
+    """XYWH kutu dizileri (N, 4) ve (M, 4) arasındaki IoU matrisi (N, M), tek seferde hesaplanır."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    inter = bbox_intersection_matrix(a, b)
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def mask_intersection(a, b, shift=(0, 0)):
+    """
+    İki maskenin ortak piksel sayısı; yalnızca bbox'ların kesişim bölgesi açılır. shift (dx, dy)
+    verilirse a maskesi o kadar kaydırılmış kabul edilir.
+    """
+    if a.area == 0 or b.area == 0:
+        return 0
+    (ax, ay), (ah, aw) = (a.offset[0] + int(round(shift[0])), a.offset[1] + int(round(shift[1]))), a.crop_shape
+    (bx, by), (bh, bw) = b.offset, b.crop_shape
+    x0, y0 = max(ax, bx), max(ay, by)
+    x1, y1 = min(ax + aw, bx + bw), min(ay + ah, by + bh)
+    if x1 <= x0 or y1 <= y0:
+        return 0
+    return int(np.count_nonzero(a.crop()[y0 - ay:y1 - ay, x0 - ax:x1 - ax] &
+                                b.crop()[y0 - by:y1 - by, x0 - bx:x1 - bx]))
+
+
+def mask_iou(a, b, shift=(0, 0)):
+    """
+    İki maskenin IoU'su; yalnızca bbox'ların kesişim bölgesi açılır. shift (dx, dy) verilirse a
+    maskesi o kadar kaydırılmış kabul edilir (ör. kamera hareketi telafisi).
+    """
+    if a.area == 0 or b.area == 0:
+        return 0.0
+    inter = mask_intersection(a, b, shift)
+    return inter / (a.area + b.area - inter)
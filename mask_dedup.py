@@ -0,0 +1,241 @@
+# mask_dedup.py
+import threading
+
+import cv2
+import numpy as np
+
+import profiling
+from compact_mask import LazyUpsampledMask
+from mask_composition import bbox_intersection_matrix, mask_intersection
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Sınıflandırma öncesi tekilleştirme politikası (set_dedup_policy, --dedup-policy):
+#   "off"      : kapalı, tüm maskeler sınıflandırılır (varsayılan)
+#   "suppress" : neredeyse aynı ve büyük iç içe maskelerden düşük puanlı olan atılır
+#   "merge"    : aynı maskeler atılmaz, tutulan maskeyle birleştirilir (maske, bbox, alan güncellenir)
+# "suppress" ve "merge" çıktıdaki nesne sayısını değiştirir; bu yüzden isteğe bağlıdır.
+DEDUP_POLICY = "off"
+
+# Maske IoU'su bu değeri aşan iki maske neredeyse aynı sayılır
+DEDUP_IOU = 0.85
+
+# Küçük maskenin en az bu oranı büyüğün içindeyse ve alanı büyüğün en az DEDUP_NESTED_AREA_RATIO'su
+# kadarsa küçük maske büyüğün bir parçası sayılır (koltuğun yarısı). Daha küçük iç nesneler
+# (koltuktaki yastık) ayrı nesne olarak kalır.
+DEDUP_CONTAINMENT = 0.95
+DEDUP_NESTED_AREA_RATIO = 0.5
+
+# Görüntü başına en fazla sınıflandırılacak maske (predicted_iou × alan puanına göre; --max-masks);
+# None / 0: sınırsız (varsayılan)
+DEDUP_MAX_MASKS = None
+
+# Örtüşme matrisinin hesaplandığı küçültülmüş ızgaranın uzun kenarı ve ızgarada eşiğe bu kadar
+# yaklaşan çiftlerin tam çözünürlükte doğrulanma payı
+DEDUP_GRID_SIZE = 128
+DEDUP_VERIFY_MARGIN = 0.1
+
+DEDUP_POLICIES = ("off", "suppress", "merge")
+
+# deduplicate_objects'te bütçe verilmediğini belirten işaret (None "sınırsız" anlamına gelir)
+_DEFAULT = object()
+
+# Süreç başlangıcından beri toplam sayılar (/metrics); thread'ler arasında paylaşılır
+_totals_lock = threading.Lock()
+_totals = {'images': 0, 'input': 0, 'kept': 0, 'duplicate': 0, 'nested': 0, 'budget': 0}
+
+
+def set_dedup_policy(policy, max_masks=None):
+    """Tekilleştirme politikasını ve görüntü başına bütçeyi (None / 0: sınırsız) seçer."""
+    global DEDUP_POLICY, DEDUP_MAX_MASKS
+    if policy not in DEDUP_POLICIES:
+        raise ValueError(f"Bilinmeyen tekilleştirme politikası: {policy} (seçenekler: {', '.join(DEDUP_POLICIES)})")
+    if max_masks is not None and max_masks < 0:
+        raise ValueError(f"Geçersiz bütçe: {max_masks}")
+    DEDUP_POLICY, DEDUP_MAX_MASKS = policy, max_masks or None
+
+
+def dedup_stats():
+    """Geçerli ayarlar ve süreç başlangıcından beri elenen maske sayıları (neden başına)."""
+    with _totals_lock:
+        totals = dict(_totals)
+    totals['saved'] = totals['input'] - totals['kept']
+    return {'policy': DEDUP_POLICY, 'max_masks': DEDUP_MAX_MASKS, **totals}
+
+
+# --------------------------------------------------------------------------
+# ÖRTÜŞME MATRİSİ
+# --------------------------------------------------------------------------
+
+def _source_mask(mask):
+    """Tembel maskelerde düşük çözünürlüklü maske kullanılır (tam çözünürlüğe büyütülmez)."""
+    return mask.low_res if isinstance(mask, LazyUpsampledMask) else mask
+
+
+def grid_masks(masks, grid_size=DEDUP_GRID_SIZE):
+    """
+    Aynı boyutlu maskeleri uzun kenarı grid_size olan ızgaraya küçültür; (N, P) float32 matris
+    döndürür (satırlar düzleştirilmiş 0/1 ızgaralar). Her maskenin yalnızca bbox'ı yeniden örneklenir.
+    """
+    H, W = masks[0].shape
+    scale = min(grid_size / max(H, W), 1.0)
+    gh, gw = max(int(round(H * scale)), 1), max(int(round(W * scale)), 1)
+    grid = np.zeros((len(masks), gh, gw), dtype=np.float32)
+    for row, mask in zip(grid, masks):
+        if mask.area == 0:
+            continue
+        (x, y), (h, w) = mask.offset, mask.crop_shape
+        x0, y0 = min(int(x * scale), gw - 1), min(int(y * scale), gh - 1)
+        x1 = min(max(int(np.ceil((x + w) * scale)), x0 + 1), gw)
+        y1 = min(max(int(np.ceil((y + h) * scale)), y0 + 1), gh)
+        row[y0:y1, x0:x1] = cv2.resize(mask.crop().view(np.uint8), (x1 - x0, y1 - y0),
+                                       interpolation=cv2.INTER_AREA)
+    return grid.reshape(len(masks), -1)
+
+
+def _ratios(inter, areas):
+    """Kesişim matrisinden IoU ve kapsanma (satırdaki maskenin sütundakinin içinde kalan oranı)."""
+    union = areas[:, None] + areas[None] - inter
+    iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    containment = np.divide(inter, areas[:, None], out=np.zeros_like(inter), where=areas[:, None] > 0)
+    return iou, containment
+
+
+def redundant_pairs(masks, iou_thresh=DEDUP_IOU, containment_thresh=DEDUP_CONTAINMENT,
+                    nested_area_ratio=DEDUP_NESTED_AREA_RATIO):
+    """
+    Birbirinin yinelemesi olan maske çiftleri: {(i, j): "duplicate" | "nested"} (i < j).
+    Önce bbox kesişim matrisiyle olanaksız çiftler elenir, sonra küçültülmüş maskelerin kesişim
+    matrisi (tek matris çarpımı) ile adaylar bulunur; eşiğe yakın adaylar tam maskeyle doğrulanır.
+    """
+    sources = [_source_mask(mask) for mask in masks]
+    n = len(sources)
+    if n < 2:
+        return {}
+    areas = np.array([mask.area for mask in sources], dtype=np.float64)
+    smaller = np.minimum(areas[:, None], areas[None])
+    larger = np.maximum(areas[:, None], areas[None])
+
+    # 1. bbox: maskelerin kesişimi bbox kesişimini aşamaz
+    with profiling.stage("dedup_bbox"):
+        min_overlap = min(iou_thresh, containment_thresh) - DEDUP_VERIFY_MARGIN
+        candidates = bbox_intersection_matrix([m.bbox for m in sources], [m.bbox for m in sources]) \
+            >= min_overlap * smaller
+        candidates &= smaller >= nested_area_ratio * larger * (1 - DEDUP_VERIFY_MARGIN)
+        candidates = np.triu(candidates, k=1)
+    if not candidates.any():
+        return {}
+
+    # 2. küçültülmüş maskeler: tüm çiftlerin kesişimi tek matris çarpımıyla
+    with profiling.stage("dedup_grid"):
+        grid = grid_masks(sources)
+        inter = grid @ grid.T
+        grid_areas = np.diag(inter).copy()
+        iou, containment = _ratios(inter, grid_areas)
+        nested = np.maximum(containment, containment.T)  # küçük maskenin büyüğün içinde kalan oranı
+        # Izgarada kaybolan çok küçük maskeler doğrudan doğrulamaya gider
+        vanished = (grid_areas[:, None] == 0) | (grid_areas[None] == 0)
+        candidates &= vanished | (iou >= iou_thresh - DEDUP_VERIFY_MARGIN) | \
+            (nested >= containment_thresh - DEDUP_VERIFY_MARGIN)
+
+    # 3. tam (ya da SAM çözünürlüğündeki) maskelerle doğrulama
+    pairs = {}
+    with profiling.stage("dedup_verify"):
+        for i, j in zip(*np.nonzero(candidates)):
+            common = mask_intersection(sources[i], sources[j])
+            if common == 0:
+                continue
+            if common / (areas[i] + areas[j] - common) >= iou_thresh:
+                pairs[(int(i), int(j))] = "duplicate"
+            elif common / smaller[i, j] >= containment_thresh and smaller[i, j] >= nested_area_ratio * larger[i, j]:
+                pairs[(int(i), int(j))] = "nested"
+    return pairs
+
+
+# --------------------------------------------------------------------------
+# TEKİLLEŞTİRME
+# --------------------------------------------------------------------------
+
+def object_score(obj):
+    """Bütçe sıralaması: SAM'ın tahmini IoU'su × alan."""
+    return obj.get('predicted_iou', 1.0) * obj['area']
+
+
+def _merge(keeper, others):
+    """others maskelerini keeper'a birleştirir; tembel maskeler düşük çözünürlükte birleştirilir."""
+    mask = keeper['mask']
+    source = _source_mask(mask)
+    merged = source
+    for other in others:
+        merged = merged.union(_source_mask(other['mask']))
+    if merged.area == source.area:
+        return
+    # Tam çözünürlükteki alan düşük çözünürlükteki büyüme oranıyla güncellenir
+    keeper['area'] = int(round(keeper['area'] * merged.area / source.area))
+    keeper['mask'] = LazyUpsampledMask(merged, mask.shape) if isinstance(mask, LazyUpsampledMask) else merged
+    keeper['bbox'] = keeper['mask'].bbox if not isinstance(mask, LazyUpsampledMask) else \
+        _scaled_bbox(merged, mask.shape)
+
+
+def _scaled_bbox(low_res, shape):
+    sy, sx = shape[0] / low_res.shape[0], shape[1] / low_res.shape[1]
+    x, y, w, h = low_res.bbox
+    return [int(x * sx), int(y * sy), int(round(w * sx)), int(round(h * sy))]
+
+
+def deduplicate_objects(objects, policy=None, max_masks=_DEFAULT, stats=None):
+    """
+    prepare_objects çıktısındaki yinelenen / büyük iç içe maskeleri politikaya göre atar ya da
+    birleştirir ve görüntü başına bütçeyi (predicted_iou × alan sırasıyla ilk max_masks) uygular.
+    policy / max_masks verilmezse DEDUP_POLICY / DEDUP_MAX_MASKS; max_masks=None sınırsızdır.
+    Kalan nesneler özgün sırasıyla döndürülür. stats sözlüğü verilirse neden başına elenen maske
+    ve kazanılan ViT sınıflandırması sayılarıyla doldurulur; toplamlar dedup_stats'a eklenir.
+    """
+    policy = DEDUP_POLICY if policy is None else policy
+    max_masks = DEDUP_MAX_MASKS if max_masks is _DEFAULT else max_masks
+    if policy not in DEDUP_POLICIES:
+        raise ValueError(f"Bilinmeyen tekilleştirme politikası: {policy} (seçenekler: {', '.join(DEDUP_POLICIES)})")
+    counts = {'input': len(objects), 'duplicate': 0, 'nested': 0, 'budget': 0}
+
+    order = sorted(range(len(objects)), key=lambda i: object_score(objects[i]), reverse=True)
+    kept = order
+    if policy != "off" and len(objects) > 1:
+        pairs = redundant_pairs([obj['mask'] for obj in objects])
+        related = {}
+        for (i, j), reason in pairs.items():
+            related.setdefault(i, []).append((j, reason))
+            related.setdefault(j, []).append((i, reason))
+
+        # NMS gibi: puanı yüksek maske tutulur, onunla yinelenenler atılır
+        removed, kept, absorbed = set(), [], {}
+        for i in order:
+            if i in removed:
+                continue
+            kept.append(i)
+            removed.add(i)
+            for j, reason in related.get(i, ()):
+                if j not in removed:
+                    removed.add(j)
+                    counts[reason] += 1
+                    absorbed.setdefault(i, []).append(j)
+        if policy == "merge":
+            with profiling.stage("dedup_merge"):
+                for i, others in absorbed.items():
+                    _merge(objects[i], [objects[j] for j in others])
+
+    if max_masks and len(kept) > max_masks:
+        counts['budget'] = len(kept) - max_masks
+        kept = kept[:max_masks]
+
+    counts['kept'] = len(kept)
+    counts['saved'] = counts['input'] - counts['kept']
+    profiling.count("vit_crops_saved", counts['saved'])
+    with _totals_lock:
+        _totals['images'] += 1
+        for key in ('input', 'kept', 'duplicate', 'nested', 'budget'):
+            _totals[key] += counts[key]
+    if stats is not None:
+        stats.update(counts)
+    return [objects[i] for i in sorted(kept)]
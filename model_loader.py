@@ -1,24 +1,82 @@
 # model_loader.py
 import torch
-from segment_anything import sam_model_registry, SamAutomaticMaskGenerator
+from segment_anything import sam_model_registry
 import os
+import threading
+import hashlib
 import numpy as np
-from classifier import classify_cropped_object
+import classifier
+from classifier import classify_cropped_objects_batch, classify_regions_batch
+from model_registry import registry
+from segmentation_engine import SegmentationEngine, EMBEDDING_CACHE_MAX_BYTES, image_content_hash
+from compact_mask import CompactMask, LazyUpsampledMask
+from label_table import labels_signature
+from quantization import quantize_linear_layers
+import mask_dedup
+from mask_dedup import deduplicate_objects
+import profiling
 
 # --------------------------------------------------------------------------
 # SAM MODEL YÜKLEME AYARLARI
 # --------------------------------------------------------------------------
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "sam_vit_l_0b3195.pth")
-MODEL_TYPE = "vit_l"
+# Seçilebilir SAM profilleri: omurga, models/ altındaki ağırlık dosyası ve görüntü kodlayıcının
+# Linear katmanlarının dinamik int8'e nicemlenip nicemlenmeyeceği (yalnızca CPU)
+SAM_PROFILES = {
+    'vit_l': {'model_type': "vit_l", 'checkpoint': "sam_vit_l_0b3195.pth", 'quantize_encoder': False},
+    'vit_l-int8': {'model_type': "vit_l", 'checkpoint': "sam_vit_l_0b3195.pth", 'quantize_encoder': True},
+    'vit_b': {'model_type': "vit_b", 'checkpoint': "sam_vit_b_01ec64.pth", 'quantize_encoder': False},
+    'vit_b-int8': {'model_type': "vit_b", 'checkpoint': "sam_vit_b_01ec64.pth", 'quantize_encoder': True},
+}
+SAM_PROFILE = "vit_l"
+
+# Etkin profilin omurgası ve ağırlık dosyası; set_sam_profile ile güncellenir
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", SAM_PROFILES[SAM_PROFILE]['checkpoint'])
+MODEL_TYPE = SAM_PROFILES[SAM_PROFILE]['model_type']
+
+# SAM Parametreleri (Segmentasyon kalitesi için yüksek eşikler)
+SAM_GENERATOR_SETTINGS = {
+    'points_per_side': 16,
+    'pred_iou_thresh': 0.90,
+    'stability_score_thresh': 0.95,
+    'box_nms_thresh': 0.7,
+    'min_mask_region_area': 2000,
+    # True: iki geçişli nokta istemi (seyrek ızgara + yalnızca kapsanmayan / kenar yoğun noktalar),
+    # bkz. adaptive_prompts.py
+    'adaptive_prompts': False,
+    # Maskeler tam kare boolean dizi yerine RLE olarak alınır ve CompactMask'e çevrilir
+    'output_mode': 'uncompressed_rle',
+}
+
+# Kırpıntı ön işleme yolu: "tensor" kutuları görüntü tensörünün görünümlerinden (kutu başına
+# antialias'lı bilinear küçültme) tek batch tensörüne hazırlar, "pil" her kırpıntıyı
+# ViTImageProcessor'dan geçirir (eski yol)
+CROP_PREPROCESSING = "tensor"
+
+# "tensor" yolunda maske dışındaki pikseller: "keep" (olduğu gibi), "zero" (siyah), "blur" (bulanık)
+CROP_BACKGROUND = "keep"
+
+# SAM'ın çalıştırılacağı en büyük uzun kenar (piksel). Daha büyük görüntüler bu boyuta
+# küçültülerek segmentlenir, maskeler gerektiğinde tam çözünürlüğe büyütülür. None: kapalı.
+# SAM kodlayıcısı girdiyi zaten 1024'e indirdiğinden varsayılan değer kaliteyi az etkiler.
+SEGMENTATION_MAX_SIDE = 1024
+
+_segmentation_engine = None
+_segmentation_engine_lock = threading.Lock()
+
+# İsteğe bağlı kalıcı sonuç deposu (result_store.ResultStore)
+_result_store = None
 
 
 def load_sam_model():
     """SAM modelini yükler."""
-    print(f"SAM modeli yükleniyor... ({MODEL_TYPE})")
+    print(f"SAM modeli yükleniyor... ({MODEL_TYPE}, profil: {SAM_PROFILE})")
     try:
         sam = sam_model_registry[MODEL_TYPE](checkpoint=MODEL_PATH)
         device = "cuda" if torch.cuda.is_available() else "cpu"
         sam.to(device=device)
+        if SAM_PROFILES[SAM_PROFILE]['quantize_encoder']:
+            # İstem kodlayıcı ve maske çözücü küçüktür; maliyetin çoğu görüntü kodlayıcıdadır
+            sam.image_encoder = quantize_linear_layers(sam.image_encoder)
         print("SAM modeli başarıyla yüklendi.")
         return sam
     except FileNotFoundError:
@@ -29,63 +87,206 @@ def load_sam_model():
         return None
 
 
+# SAM ağırlıkları yalnızca ilk segmentasyon isteğinde yüklenir
+registry.register("sam", load_sam_model)
+
+
+def set_sam_profile(name):
+    """
+    SAM profilini (SAM_PROFILES) seçer. Yüklü model bırakılır; yeni profil ilk segmentasyon
+    isteğinde yüklenir (segmentasyon motoru ve gömme önbelleği de yeniden oluşturulur).
+    """
+    global SAM_PROFILE, MODEL_PATH, MODEL_TYPE
+    if name not in SAM_PROFILES:
+        raise ValueError(f"Bilinmeyen SAM profili: {name} (seçenekler: {', '.join(SAM_PROFILES)})")
+    profile = SAM_PROFILES[name]
+    SAM_PROFILE = name
+    MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", profile['checkpoint'])
+    MODEL_TYPE = profile['model_type']
+    registry.release("sam")
+
+
+def sam_model_id():
+    """Sonuç deposu anahtarına giren SAM kimliği (nicemlenmiş kodlayıcılı profiller ayrışır)."""
+    model_id = f"{MODEL_TYPE}:{os.path.basename(MODEL_PATH)}"
+    return f"{model_id}|int8" if SAM_PROFILES[SAM_PROFILE]['quantize_encoder'] else model_id
+
+
+def get_sam_model():
+    """Kayıt defterindeki SAM modelini döndürür (gerekirse ilk kullanımda yükler)."""
+    return registry.get("sam")
+
+
+def get_segmentation_engine(sam_model):
+    """
+    Verilen SAM modeli için tek bir SegmentationEngine döndürür. Motor (ve gömme önbelleği)
+    çağrılar arasında yeniden kullanılır; model değişirse yeniden oluşturulur.
+    """
+    global _segmentation_engine
+    with _segmentation_engine_lock:
+        if _segmentation_engine is None or _segmentation_engine.sam_model is not sam_model:
+            _segmentation_engine = SegmentationEngine(
+                sam_model, cache_max_bytes=EMBEDDING_CACHE_MAX_BYTES, **SAM_GENERATOR_SETTINGS)
+        return _segmentation_engine
+
+
 # --------------------------------------------------------------------------
-# SEGMENTASYON VE SINIFLANDIRMA İŞLEMİ
+# SONUÇ DEPOSU
 # --------------------------------------------------------------------------
 
-def get_segmentation_masks(image, sam_model):
+def set_result_store(store):
+    """Segmentasyon sonuçlarının saklanacağı/okunacağı kalıcı depoyu ayarlar (None: kapalı)."""
+    global _result_store
+    _result_store = store
+
+
+def get_result_store():
+    """Etkin sonuç deposunu döndürür (yoksa None)."""
+    return _result_store
+
+
+def result_settings(max_side=None, **sam_overrides):
     """
-    Görüntü için otomatik maske oluşturmayı başlatır ve nesneleri ViT ile sınıflandırır.
+    Sonucu belirleyen model kimlikleri, eşikler ve ayarlar. Sonuç deposunda anahtarın parçasıdır;
+    herhangi biri değişirse saklanan sonuç kullanılmaz.
     """
-    if sam_model is None:
-        print("SAM modeli yüklenemedi. Segmentasyon iptal edildi.")
-        return None
+    if max_side is None:
+        max_side = SEGMENTATION_MAX_SIDE
+    return {
+        'sam_model': sam_model_id(),
+        'sam_settings': dict(SAM_GENERATOR_SETTINGS, **sam_overrides),
+        'max_side': max_side,
+        'vit_model': classifier.classifier_model_id(),
+        'crop_preprocessing': CROP_PREPROCESSING,
+        'crop_background': CROP_BACKGROUND,
+        'dedup': (mask_dedup.DEDUP_POLICY, mask_dedup.DEDUP_IOU, mask_dedup.DEDUP_CONTAINMENT,
+                  mask_dedup.DEDUP_NESTED_AREA_RATIO, mask_dedup.DEDUP_MAX_MASKS),
+        'large_area_percent_threshold': classifier.LARGE_AREA_PERCENT_THRESHOLD,
+        'min_confidence_threshold': classifier.MIN_CONFIDENCE_THRESHOLD,
+        'labels': hashlib.blake2b(repr(labels_signature()).encode(), digest_size=8).hexdigest(),
+    }
 
-    # SAM Parametreleri (Segmentasyon kalitesi için yüksek eşikler)
-    mask_generator = SamAutomaticMaskGenerator(
-        sam_model,
-        points_per_side=16,
-        pred_iou_thresh=0.90,
-        stability_score_thresh=0.95,
-        box_nms_thresh=0.7,
-        min_mask_region_area=2000
-    )
+
+def load_stored_result(image, max_side=None, **sam_overrides):
+    """
+    Sonuç deposunda görüntü ve ayarlarla eşleşen kayıt arar. (anahtar, nesneler) döndürür; depo
+    kapalıysa anahtar, kayıt yoksa nesneler None'dır. Anahtar store_result'a verilir.
+    """
+    store = _result_store
+    if store is None:
+        return None, None
+    with profiling.stage("result_store"):
+        key = (image_content_hash(image), result_settings(max_side, **sam_overrides))
+        stored = store.load(*key)
+    if stored is None:
+        return key, None
+    print(f"Sonuç depodan okundu: {len(stored)} nesne (SAM ve ViT çalıştırılmadı).")
+    return key, stored.objects()
+
+
+def store_result(key, image_shape, classified_objects):
+    """load_stored_result'tan alınan anahtarla sonucu depoya yazar (depo kapalıysa bir şey yapmaz)."""
+    store = _result_store
+    if store is None or key is None:
+        return
+    with profiling.stage("result_store"):
+        store.save(*key, image_shape, classified_objects)
+
+
+# --------------------------------------------------------------------------
+# SEGMENTASYON VE SINIFLANDIRMA İŞLEMİ
+# --------------------------------------------------------------------------
+
+def generate_masks(image, sam_model, max_side=None, **sam_overrides):
+    """
+    Görüntü için SAM ile otomatik maske adaylarını üretir (sınıflandırma yapılmaz).
+    sam_overrides (ör. pred_iou_thresh=0.85) yalnızca bu çağrı için SAM ayarlarını değiştirir;
+    aynı görüntü tekrar işlendiğinde görüntü kodlayıcı yeniden çalışmaz.
+    max_side verilmezse SEGMENTATION_MAX_SIDE kullanılır (0: her zaman tam çözünürlük).
+    """
+    engine = get_segmentation_engine(sam_model)
+    if max_side is None:
+        max_side = SEGMENTATION_MAX_SIDE
 
     print("Otomatik segmentasyon başlatılıyor...")
-    results = mask_generator.generate(image)
+    results = engine.generate(image, max_side=max_side, **sam_overrides)
+    print(f"Toplam {len(results)} nesne adayı tespit edildi.")
+    return results
+
 
+def prepare_objects(image, results):
+    """
+    SAM maske adaylarından (sınıflandırılmamış) nesne kayıtları oluşturur: mask, bbox, area.
+    Görüntü dışına düşen kutular atılır.
+    """
+    H, W, _ = image.shape
+    objects = []
+    with profiling.stage("crop_prepare"):
+        for result in results:
+            x, y, w, h = (int(v) for v in result['bbox'])
+            if min(x + w, W) <= x or min(y + h, H) <= y:
+                continue
+            # Küçültülmüş görüntüde üretilen maskeler düşük çözünürlükte kalır, gerektiğinde büyütülür
+            mask = CompactMask.from_rle(result['segmentation'])
+            objects.append({
+                'mask': mask if mask.shape == (H, W) else LazyUpsampledMask(mask, (H, W)),
+                'bbox': result['bbox'],
+                # SAM'ın tam çözünürlükteki alanı; tembel maskeyi büyütmeden alan sıralaması yapılabilir
+                'area': int(result['area']),
+                # Tekilleştirme bütçesinin sıralamasında kullanılır (predicted_iou × alan)
+                'predicted_iou': float(result['predicted_iou']),
+            })
+    return objects
+
+
+def classify_objects(image, objects):
+    """Nesnelerin kırpıntılarını ViT ile batch halinde sınıflandırır; 'label' alanını yerinde yazar."""
     H, W, _ = image.shape
     TOTAL_IMAGE_AREA = H * W  # Toplam alan hesaplandı
 
-    print(f"Toplam {len(results)} nesne adayı tespit edildi.")
+    boxes = []
+    for obj in objects:
+        x, y, w, h = (int(v) for v in obj['bbox'])
+        boxes.append((x, y, min(x + w, W), min(y + h, H)))
+    areas = [obj['area'] for obj in objects]
 
-    classified_objects = []
+    # Tüm kırpıntılar tek seferde, batch'ler halinde sınıflandırılır
+    if CROP_PREPROCESSING == "tensor":
+        object_labels = classify_regions_batch(image, boxes, areas, TOTAL_IMAGE_AREA,
+                                               masks=[obj['mask'] for obj in objects], background=CROP_BACKGROUND)
+    else:
+        crops = [image[y:y_end, x:x_end] for x, y, x_end, y_end in boxes]
+        object_labels = classify_cropped_objects_batch(crops, areas, TOTAL_IMAGE_AREA)
 
-    for result in results:
-        mask = result['segmentation']
-        area = result['area']
-        x, y, w, h = result['bbox']
+    for obj, object_label in zip(objects, object_labels):
+        obj['label'] = object_label
+    return objects
 
-        x = int(x);
-        y = int(y);
-        w = int(w);
-        h = int(h)
-        x_max, y_max = image.shape[1], image.shape[0]
-        x_end = min(x + w, x_max);
-        y_end = min(y + h, y_max)
 
-        if x_end <= x or y_end <= y:
-            continue
+def classify_masks(image, results):
+    """
+    SAM maske adaylarını kırpar, yinelenen / iç içe maskeleri eler (mask_dedup), kalanları ViT ile
+    batch halinde sınıflandırır ve nesne listesini döndürür.
+    """
+    return classify_objects(image, deduplicate_objects(prepare_objects(image, results)))
 
-        cropped_image = image[y:y_end, x:x_end]
 
-        # total_image_area parametresi eklendi
-        object_label = classify_cropped_object(cropped_image, area, TOTAL_IMAGE_AREA)
+def get_segmentation_masks(image, sam_model, max_side=None, **sam_overrides):
+    """
+    Görüntü için otomatik maske oluşturmayı başlatır ve nesneleri ViT ile sınıflandırır.
+    sam_overrides (ör. pred_iou_thresh=0.85) yalnızca bu çağrı için SAM ayarlarını değiştirir.
+    max_side: SAM'ın çalışacağı en büyük uzun kenar (verilmezse SEGMENTATION_MAX_SIDE).
+    Sonuç deposu ayarlıysa (set_result_store) aynı görüntü ve ayarlar için saklanan sonuç döndürülür.
+    """
+    store_key, stored_objects = load_stored_result(image, max_side=max_side, **sam_overrides)
+    if stored_objects is not None:
+        return stored_objects
 
-        classified_objects.append({
-            'mask': mask,
-            'bbox': result['bbox'],
-            'label': object_label
-        })
+    if sam_model is None:
+        print("SAM modeli yüklenemedi. Segmentasyon iptal edildi.")
+        return None
 
-    return classified_objects
\ No newline at end of file
+    results = generate_masks(image, sam_model, max_side=max_side, **sam_overrides)
+    classified_objects = classify_masks(image, results)
+    store_result(store_key, image.shape, classified_objects)
+    return classified_objects
@@ -0,0 +1,75 @@
+# model_registry.py
+import gc
+import threading
+
+import torch
+
+
+# --------------------------------------------------------------------------
+# TEMBEL (LAZY) MODEL KAYIT DEFTERİ
+# --------------------------------------------------------------------------
+
+class ModelRegistry:
+    """
+    Modelleri isimle kaydeden ve ilk kullanımda yükleyen, thread-safe kayıt defteri.
+    Yükleyici fonksiyon modül import edilirken değil, model ilk istendiğinde çağrılır.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        """Bir model adı için yükleyici fonksiyon kaydeder (daha önce yüklenmiş model bırakılır)."""
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            self._models.pop(name, None)
+
+    def get(self, name):
+        """Modeli döndürür; henüz yüklenmemişse yükleyiciyi bir kez çalıştırır."""
+        # Hızlı yol: model zaten yüklüyse kilit alınmaz
+        if name in self._models:
+            return self._models[name]
+
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"Kayıtlı olmayan model: {name}")
+            loader = self._loaders[name]
+            name_lock = self._locks[name]
+
+        # Aynı model iki thread tarafından aynı anda yüklenmesin
+        with name_lock:
+            if name not in self._models:
+                # Yükleyici hata durumunda None döndürebilir; tekrar tekrar denenmemesi için
+                # bu sonuç da saklanır (release ile sıfırlanabilir)
+                self._models[name] = loader()
+            return self._models[name]
+
+    def is_loaded(self, name):
+        """Modelin belleğe yüklenip yüklenmediğini döndürür."""
+        return name in self._models
+
+    def warmup(self, *names):
+        """Verilen modelleri (isim verilmezse tüm kayıtlı modelleri) önceden yükler."""
+        with self._lock:
+            names = names or tuple(self._loaders)
+        return {name: self.get(name) is not None for name in names}
+
+    def release(self, *names):
+        """Verilen modelleri (isim verilmezse tümünü) bellekten bırakır."""
+        with self._lock:
+            names = names or tuple(self._models)
+            released = [name for name in names if self._models.pop(name, None) is not None]
+
+        if released:
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        return released
+
+
+# Uygulama genelinde kullanılan varsayılan kayıt defteri
+registry = ModelRegistry()
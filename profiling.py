@@ -0,0 +1,404 @@
+# profiling.py
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+
+# --------------------------------------------------------------------------
+# AŞAMA BAZLI ÖLÇÜM (ZAMANLAYICI, SAYAÇ, BELLEK)
+# --------------------------------------------------------------------------
+# Kapalıyken stage()/count()/image_scope() paylaşılan boş bir bağlam döndürür; ölçüm noktaları
+# koddan kaldırılmadan bırakılabilir. Açıkken her aşama çağrısının süresi, çağrı sonundaki RSS,
+# sürecin tepe RSS'i ve (CUDA varsa) aşama içindeki tepe GPU belleği o anki görüntünün izine yazılır.
+# CUDA tepe sayacı cihaz genelidir ve her aşama girişinde sıfırlanır; sıfırlamadan önce sayacın değeri
+# açık tüm aşamalara (iç içe ve diğer thread'lerdekiler) aktarılır. Böylece dış aşamanın tepesi iç
+# aşamalarınkini de kapsar; eşzamanlı thread'lerin ayırmaları birbirlerinin tepesine dahil olur.
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+
+# görüntü kimliği -> iz kaydı (ekleme sırasıyla)
+_traces = {}
+# aşama adı -> profil kancası
+_hooks = {}
+# CUDA tepe belleği izlenen açık aşamalar (tüm thread'ler); _lock altında kullanılır
+_open_cuda_stages = set()
+
+# Görüntü kapsamı dışında kalan ölçümlerin yazıldığı iz
+UNSCOPED_IMAGE = "-"
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+def enable():
+    """Ölçümü açar."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Ölçümü kapatır (toplanan izler silinmez)."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Toplanan tüm izleri siler."""
+    with _lock:
+        _traces.clear()
+
+
+def _current_image():
+    return getattr(_local, "image", UNSCOPED_IMAGE)
+
+
+def _trace_for(image):
+    """Görüntünün iz kaydını döndürür (yoksa oluşturur); _lock altında çağrılmalıdır."""
+    trace = _traces.get(image)
+    if trace is None:
+        trace = {'image': image, 'stages': {}, 'counters': {}}
+        _traces[image] = trace
+    return trace
+
+
+def _rss_mb():
+    """Sürecin o anki RSS değeri (MB); /proc yoksa tepe RSS kullanılır."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2 ** 20
+    except OSError:
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS bayt, Linux kB döndürür
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def peak_rss_mb():
+    """Sürecin başlangıçtan beri ulaştığı en yüksek RSS (MB); profil kapalıyken de kullanılabilir."""
+    return _peak_rss_mb()
+
+
+def _cuda():
+    """torch zaten yüklenmişse ve CUDA varsa torch.cuda'yı döndürür (ölçüm için torch yüklenmez)."""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        return torch.cuda
+    return None
+
+
+def _fold_cuda_peak(cuda):
+    """Cihazın sıfırlamadan beri tepe değerini açık aşamalara aktarır; _lock altında çağrılmalıdır."""
+    peak = cuda.max_memory_allocated()
+    for stage in _open_cuda_stages:
+        stage.cuda_peak = max(stage.cuda_peak, peak)
+
+
+class _Stage:
+    __slots__ = ('name', 'image', 'hook', 't0', 'cuda_peak')
+
+    def __init__(self, name):
+        self.name = name
+        self.image = _current_image()
+        self.hook = None
+        self.cuda_peak = None
+
+    def __enter__(self):
+        hook = _hooks.get(self.name)
+        if hook is not None and hook.start():
+            self.hook = hook
+        cuda = _cuda()
+        if cuda is not None:
+            with _lock:
+                _fold_cuda_peak(cuda)
+                cuda.reset_peak_memory_stats()
+                self.cuda_peak = 0
+                _open_cuda_stages.add(self)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        if self.hook is not None:
+            self.hook.stop()
+        rss = _rss_mb()
+        peak = _peak_rss_mb()
+        cuda_peak = None
+        if self.cuda_peak is not None:
+            with _lock:
+                _fold_cuda_peak(_cuda())
+                _open_cuda_stages.discard(self)
+            cuda_peak = self.cuda_peak / 2 ** 20
+
+        with _lock:
+            stages = _trace_for(self.image)['stages']
+            entry = stages.get(self.name)
+            if entry is None:
+                entry = stages[self.name] = {'calls': 0, 'seconds': 0.0, 'max_rss_mb': 0.0, 'peak_rss_mb': 0.0}
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['max_rss_mb'] = max(entry['max_rss_mb'], rss)
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'], peak)
+            if cuda_peak is not None:
+                entry['cuda_peak_mb'] = max(entry.get('cuda_peak_mb', 0.0), cuda_peak)
+        return False
+
+
+def stage(name):
+    """Bir aşamayı ölçen bağlam yöneticisi: `with profiling.stage("sam_generate"): ...`"""
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _Stage(name)
+
+
+def count(name, value=1):
+    """O anki görüntünün izinde bir sayacı artırır (ör. üretilen maske sayısı)."""
+    if not _enabled:
+        return
+    with _lock:
+        counters = _trace_for(_current_image())['counters']
+        counters[name] = counters.get(name, 0) + value
+
+
+class _ImageScope:
+    __slots__ = ('image', 'previous')
+
+    def __init__(self, image):
+        self.image = image
+
+    def __enter__(self):
+        self.previous = getattr(_local, "image", UNSCOPED_IMAGE)
+        _local.image = self.image
+        return self
+
+    def __exit__(self, *exc):
+        _local.image = self.previous
+        return False
+
+
+def image_scope(image):
+    """
+    Bu thread'de kapsam içinde ölçülen aşamaları verilen görüntünün izine yazar. Toplu modda her
+    aşama thread'i işlediği görüntü için kapsam açar; iç içe ölçümler doğru görüntüye düşer.
+    """
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _ImageScope(image)
+
+
+# --------------------------------------------------------------------------
+# İZLER VE ÖZET
+# --------------------------------------------------------------------------
+
+def traces():
+    """Görüntü başına iz kayıtlarının listesi."""
+    with _lock:
+        return [json.loads(json.dumps(trace)) for trace in _traces.values()]
+
+
+def pop_trace(image):
+    """Görüntünün izini döndürür ve siler (süreç havuzunda çocuktan ebeveyne taşımak için)."""
+    with _lock:
+        return _traces.pop(image, None)
+
+
+def trim(max_traces):
+    """En eski izleri en fazla max_traces iz kalacak şekilde siler (uzun çalışan servisler için)."""
+    with _lock:
+        while len(_traces) > max_traces:
+            del _traces[next(iter(_traces))]
+
+
+def merge_trace(trace):
+    """Başka bir süreçte toplanmış iz kaydını ekler."""
+    if not trace:
+        return
+    with _lock:
+        target = _trace_for(trace['image'])
+        for name, entry in trace['stages'].items():
+            existing = target['stages'].get(name)
+            if existing is None:
+                target['stages'][name] = dict(entry)
+                continue
+            existing['calls'] += entry['calls']
+            existing['seconds'] += entry['seconds']
+            for key in ('max_rss_mb', 'peak_rss_mb', 'cuda_peak_mb'):
+                if key in entry:
+                    existing[key] = max(existing.get(key, 0.0), entry[key])
+        for name, value in trace['counters'].items():
+            target['counters'][name] = target['counters'].get(name, 0) + value
+
+
+def summary():
+    """
+    Aşama başına toplam çağrı/süre ile görüntü başına sürelerin p50/p95/p99 değerleri (ms)
+    ve sayaç toplamları.
+    """
+    per_stage = {}
+    counters = {}
+    for trace in traces():
+        for name, entry in trace['stages'].items():
+            per_stage.setdefault(name, []).append(entry)
+        for name, value in trace['counters'].items():
+            counters[name] = counters.get(name, 0) + value
+
+    stages = {}
+    for name, entries in per_stage.items():
+        seconds = np.array([e['seconds'] for e in entries])
+        p50, p95, p99 = np.percentile(seconds * 1000, [50, 95, 99])
+        stages[name] = {
+            'images': len(entries),
+            'calls': sum(e['calls'] for e in entries),
+            'total_s': round(float(seconds.sum()), 4),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'max_ms': round(float(seconds.max() * 1000), 2),
+            'peak_rss_mb': round(max(e['peak_rss_mb'] for e in entries), 1),
+        }
+        cuda_peaks = [e['cuda_peak_mb'] for e in entries if 'cuda_peak_mb' in e]
+        if cuda_peaks:
+            stages[name]['cuda_peak_mb'] = round(max(cuda_peaks), 1)
+    return {'stages': stages, 'counters': counters}
+
+
+def write_trace(path):
+    """Görüntü başına izleri ve özeti JSON dosyasına yazar."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({'images': traces(), 'summary': summary()}, f, ensure_ascii=False, indent=2)
+    print(f"Profil izi yazıldı: {path}")
+
+
+def print_summary():
+    """Aşama bazında süre yüzdeliklerini yazdırır."""
+    result = summary()
+    print("\n--- Profil Özeti (görüntü başına süre) ---")
+    print(f"{'Aşama':<22}{'görüntü':>8}{'çağrı':>8}{'toplam (s)':>12}{'p50 (ms)':>10}{'p95 (ms)':>10}"
+          f"{'p99 (ms)':>10}{'tepe RSS (MB)':>15}")
+    for name, s in sorted(result['stages'].items(), key=lambda item: -item[1]['total_s']):
+        print(f"{name:<22}{s['images']:>8}{s['calls']:>8}{s['total_s']:>12.2f}{s['p50_ms']:>10.1f}"
+              f"{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['peak_rss_mb']:>15.0f}")
+    if result['counters']:
+        print("Sayaçlar: " + ", ".join(f"{name}={value}" for name, value in sorted(result['counters'].items())))
+    print("------------------------------------------\n")
+
+
+# --------------------------------------------------------------------------
+# PROFİLLEYİCİ KANCALARI (cProfile / torch.profiler)
+# --------------------------------------------------------------------------
+
+PROFILER_KINDS = ("cprofile", "torch")
+
+
+class _ProfilerHook:
+    """Tek bir aşamanın ilk max_calls çağrısını cProfile ya da torch.profiler ile profiller."""
+
+    def __init__(self, stage_name, kind, output_path, max_calls):
+        self.stage_name = stage_name
+        self.kind = kind
+        self.output_path = output_path
+        self.max_calls = max_calls
+        self.calls = 0
+        self._active = False
+        self._lock = threading.Lock()
+        self._profile = cProfile.Profile() if kind == "cprofile" else None
+        self._torch_profile = None
+        self._torch_tables = []
+
+    def start(self):
+        """Bu çağrı profillenecekse profilleyiciyi başlatıp True döndürür."""
+        with self._lock:
+            # Aynı aşama başka bir thread'de profilleniyorsa bu çağrı atlanır
+            if self._active or self.calls >= self.max_calls:
+                return False
+            self._active = True
+            self.calls += 1
+        if self.kind == "cprofile":
+            self._profile.enable()
+        else:
+            import torch
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self._torch_profile = torch.profiler.profile(activities=activities, record_shapes=True,
+                                                         profile_memory=True)
+            self._torch_profile.__enter__()
+        return True
+
+    def stop(self):
+        if self.kind == "cprofile":
+            self._profile.disable()
+        else:
+            self._torch_profile.__exit__(None, None, None)
+            base, ext = os.path.splitext(self.output_path)
+            self._torch_profile.export_chrome_trace(f"{base}_{self.calls}{ext or '.json'}")
+            self._torch_tables.append(self._torch_profile.key_averages().table(
+                sort_by="self_cpu_time_total", row_limit=15))
+            self._torch_profile = None
+        with self._lock:
+            self._active = False
+
+    def finish(self):
+        """Sonuçları dosyaya yazar ve kısa bir tablo yazdırır."""
+        if self.calls == 0:
+            print(f"Profil: '{self.stage_name}' aşaması hiç çalışmadı.")
+            return
+        print(f"\n--- Profil: {self.stage_name} ({self.kind}, {self.calls} çağrı) ---")
+        if self.kind == "cprofile":
+            self._profile.dump_stats(self.output_path)
+            stream = io.StringIO()
+            pstats.Stats(self._profile, stream=stream).sort_stats("cumulative").print_stats(20)
+            print(stream.getvalue())
+            print(f"cProfile çıktısı: {self.output_path} (ör. `python -m pstats {self.output_path}`)")
+        else:
+            print(self._torch_tables[0])
+            base, ext = os.path.splitext(self.output_path)
+            print(f"torch.profiler izleri: {base}_<n>{ext or '.json'} (chrome://tracing)")
+
+
+def attach_profiler(stage_name, kind="cprofile", output_path=None, max_calls=1):
+    """
+    Verilen aşamaya profilleyici bağlar ve ölçümü açar. Aşamanın ilk max_calls çağrısı profillenir;
+    sonuçlar detach_profilers() çağrısında yazılır.
+    """
+    if kind not in PROFILER_KINDS:
+        raise ValueError(f"Bilinmeyen profilleyici: {kind} (seçenekler: {', '.join(PROFILER_KINDS)})")
+    if output_path is None:
+        output_path = f"profile_{stage_name}.prof" if kind == "cprofile" else f"profile_{stage_name}.json"
+    _hooks[stage_name] = _ProfilerHook(stage_name, kind, output_path, max_calls)
+    enable()
+
+
+def detach_profilers():
+    """Bağlı profilleyicilerin sonuçlarını yazar ve kancaları kaldırır."""
+    for hook in list(_hooks.values()):
+        hook.finish()
+    _hooks.clear()
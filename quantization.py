@@ -0,0 +1,33 @@
+# quantization.py
+import io
+import warnings
+
+import torch
+
+
+# --------------------------------------------------------------------------
+# DİNAMİK INT8 NİCEMLEME
+# --------------------------------------------------------------------------
+
+def quantize_linear_layers(module):
+    """
+    Modüldeki Linear katmanlarını yerinde dinamik int8'e çevirir (ağırlıklar int8 saklanır,
+    aktivasyonlar çalışma anında nicemlenir) ve modülü döndürür. Dinamik nicemleme yalnızca
+    CPU'da desteklendiğinden CUDA'daki modüller olduğu gibi bırakılır.
+    """
+    parameter = next(module.parameters(), None)
+    if parameter is not None and parameter.is_cuda:
+        print("UYARI: Dinamik int8 nicemleme CUDA'da desteklenmiyor; model fp32 kullanılacak.")
+        return module
+    with warnings.catch_warnings():
+        # torch.ao.quantization'ın kullanımdan kalkma uyarıları her yüklemede tekrarlanmasın
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.simplefilter("ignore", UserWarning)
+        return torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def serialized_size_mb(module):
+    """state_dict'in diskteki boyutu (MB); nicemlenmiş (paketlenmiş) ağırlıkları da doğru sayar."""
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.tell() / 1024 ** 2
@@ -0,0 +1,141 @@
+# renderer.py
+import os
+
+import cv2
+import numpy as np
+
+import profiling
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Maske renkleri bu tohumla üretilir; aynı girdi her zaman aynı görüntüyü verir
+RENDER_SEED = 0
+
+# Maske katmanının saydamlığı (eski show_mask ile aynı)
+MASK_ALPHA = 0.6
+
+# Etiket kutusunun arka plan karartması (0: yok, 1: tam siyah)
+LABEL_BACKGROUND_ALPHA = 0.5
+
+# Desteklenen çıktı biçimleri ve cv2.imencode parametreleri
+OUTPUT_FORMATS = {
+    ".png": [cv2.IMWRITE_PNG_COMPRESSION, 3],
+    ".jpg": [cv2.IMWRITE_JPEG_QUALITY, 90],
+    ".jpeg": [cv2.IMWRITE_JPEG_QUALITY, 90],
+    ".webp": [cv2.IMWRITE_WEBP_QUALITY, 90],
+}
+
+# OpenCV'nin Hershey yazı tipleri yalnızca ASCII çizebildiğinden Türkçe harfler karşılıklarına çevrilir
+_ASCII_TABLE = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
+
+
+def palette(count, seed=RENDER_SEED):
+    """(count + 1, 3) uint8 renk tablosu; 0. satır arka plandır, i. nesne i + 1. satırın rengini alır."""
+    rng = np.random.default_rng(seed)
+    colors = np.zeros((count + 1, 3), dtype=np.uint8)
+    colors[1:] = rng.integers(0, 256, size=(count, 3), dtype=np.uint8)
+    return colors
+
+
+def label_index_image(shape, masks):
+    """
+    Maskeleri tek bir etiket indeks görüntüsünde birleştirir: piksel değeri, o pikseli kaplayan son
+    maskenin sırası + 1'dir (0: maske yok). Her maske yalnızca kendi bbox bölgesine yazılır.
+    255'ten fazla maske varsa uint16 kullanılır.
+    """
+    dtype = np.uint8 if len(masks) < 256 else np.uint16
+    index = np.zeros(shape[:2], dtype=dtype)
+    for i, mask in enumerate(masks):
+        mask.paint(index, i + 1)
+    return index
+
+
+def _draw_label(canvas, text, origin, font_scale, thickness):
+    """Metni yarı saydam siyah kutu üzerine beyaz olarak çizer (kutu görüntü içinde tutulur)."""
+    text = text.translate(_ASCII_TABLE).encode("ascii", "replace").decode()
+    (tw, th), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+    H, W = canvas.shape[:2]
+    pad = max(thickness, 2)
+    x = min(max(int(origin[0]), 0), max(W - tw - 2 * pad, 0))
+    y = min(max(int(origin[1]), th + pad), H - baseline - pad)
+    box = canvas[max(y - th - pad, 0):min(y + baseline + pad, H), x:min(x + tw + 2 * pad, W)]
+    box[:] = (box * (1 - LABEL_BACKGROUND_ALPHA)).astype(np.uint8)
+    cv2.putText(canvas, text, (x + pad, y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255),
+                thickness, cv2.LINE_AA)
+
+
+# --------------------------------------------------------------------------
+# ÇİZİM
+# --------------------------------------------------------------------------
+
+def render_overlay(image, classified_objects, title=None, alpha=MASK_ALPHA, seed=RENDER_SEED,
+                   draw_labels=True):
+    """
+    Maskeleri ve etiketleri RGB görüntü üzerine çizer; yeni bir H×W×3 uint8 görüntü döndürür.
+    Maskeler önce etiket indeks görüntüsünde birleştirilir, renk tablosu ve alfa karışımı tüm
+    görüntüye tek geçişte uygulanır. Etiketler OpenCV ile bbox'ın üstüne yazılır.
+    """
+    with profiling.stage("render"):
+        objects = classified_objects or []
+        index = label_index_image(image.shape, [obj['mask'] for obj in objects])
+        colors = palette(len(objects), seed)[index]
+        canvas = cv2.addWeighted(image, 1 - alpha, colors, alpha, 0)
+        # Maske dışındaki pikseller orijinal görüntüden alınır
+        np.copyto(canvas, image, where=(index == 0)[..., None])
+
+        H, W = image.shape[:2]
+        font_scale = max(max(H, W) / 1600, 0.4)
+        thickness = max(int(round(font_scale * 1.5)), 1)
+        if draw_labels:
+            for obj in objects:
+                x, y, _, _ = obj['bbox']
+                _draw_label(canvas, obj['label'], (x, int(y) - 10), font_scale, thickness)
+        if title:
+            _draw_label(canvas, title, (0, 0), font_scale * 1.2, thickness)
+    return canvas
+
+
+# --------------------------------------------------------------------------
+# KODLAMA VE YAZMA
+# --------------------------------------------------------------------------
+
+def encode_image(image, fmt=".png"):
+    """RGB görüntüyü verilen biçimde (png, jpg, jpeg, webp) kodlayıp bayt dizisi döndürür."""
+    fmt = fmt.lower() if fmt.startswith(".") else "." + fmt.lower()
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Desteklenmeyen çıktı biçimi: {fmt} (seçenekler: {', '.join(OUTPUT_FORMATS)})")
+    ok, encoded = cv2.imencode(fmt, cv2.cvtColor(image, cv2.COLOR_RGB2BGR), OUTPUT_FORMATS[fmt])
+    if not ok:
+        raise ValueError(f"Görüntü {fmt} biçiminde kodlanamadı")
+    return encoded.tobytes()
+
+
+def write_image(target, image, fmt=None):
+    """
+    RGB görüntüyü dosya yoluna ya da yazılabilir bir tampona (io.BytesIO, açık dosya) yazar.
+    Dosya yolunda biçim uzantıdan alınır; tamponlarda fmt verilmezse PNG kullanılır.
+    """
+    if isinstance(target, (str, os.PathLike)):
+        fmt = fmt or os.path.splitext(os.fspath(target))[1]
+        data = encode_image(image, fmt)
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+    else:
+        data = encode_image(image, fmt or ".png")
+        target.write(data)
+    return len(data)
+
+
+def render_results(image, classified_objects, target=None, fmt=None, title=None, **options):
+    """
+    Sonuçları çizip kodlar. target bir dosya yolu ya da tampon ise oraya yazar; verilmezse
+    kodlanmış baytları döndürür (fmt varsayılanı PNG).
+    """
+    canvas = render_overlay(image, classified_objects, title=title, **options)
+    if target is None:
+        return encode_image(canvas, fmt or ".png")
+    write_image(target, canvas, fmt)
+    return target
@@ -0,0 +1,356 @@
+# result_store.py
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from compact_mask import CompactMask, LazyUpsampledMask
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Dosya başlığı: sihirli bayt dizisi, biçim sürümü, JSON başlık uzunluğu
+STORE_MAGIC = b"SEGR"
+STORE_VERSION = 1
+_PREFIX = struct.Struct("<4sHI")
+
+# Maske verisinin başlangıcı bu bayt sınırına hizalanır
+PAYLOAD_ALIGNMENT = 8
+
+# Bit-paketli maskelerin zlib sıkıştırma seviyesi (0: sıkıştırma yok)
+MASK_COMPRESSION_LEVEL = 6
+
+# Sonuç dosyalarının uzantısı
+STORE_EXTENSION = ".segr"
+
+
+def settings_hash(settings):
+    """Sonucu belirleyen ayarların (model kimlikleri, eşikler, ...) kararlı özeti."""
+    encoded = json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+# --------------------------------------------------------------------------
+# YAZMA
+# --------------------------------------------------------------------------
+
+def _stored_mask(mask):
+    """Diske yazılacak kompakt maske; henüz büyütülmemiş maskeler düşük çözünürlükte yazılır."""
+    if isinstance(mask, StoredMask):
+        mask = mask.load()
+    if isinstance(mask, LazyUpsampledMask):
+        return mask.full() if mask.is_materialized else mask.low_res
+    if isinstance(mask, CompactMask):
+        return mask
+    return CompactMask.from_dense(mask)
+
+
+def save_result(path, image_hash, image_shape, settings, classified_objects):
+    """
+    classified_objects'i (mask, bbox, label) tek dosyaya yazar: önek + JSON başlık (meta veri, ayarlar,
+    nesne kayıtları) + hizalanmış maske verisi. Her maske bbox içi bit-paketli ve zlib ile sıkıştırılmış
+    olarak saklanır. Dosya önce geçici adla yazılır; yarım kalan yazımlar geçerli sayılmaz.
+    Yazılan bayt sayısını döndürür.
+    """
+    H, W = image_shape[:2]
+    records = []
+    chunks = []
+    offset = 0
+    for obj in classified_objects:
+        mask = _stored_mask(obj['mask'])
+        data = mask.packed.tobytes()
+        encoding = "packbits"
+        if MASK_COMPRESSION_LEVEL:
+            data = zlib.compress(data, MASK_COMPRESSION_LEVEL)
+            encoding = "packbits+zlib"
+        records.append({
+            'label': obj['label'],
+            'bbox': [int(v) for v in obj['bbox']],
+            'area': int(obj['area']) if obj.get('area') is not None else obj['mask'].area,
+            'mask': {
+                'shape': list(mask.shape),
+                'offset': list(mask.offset),
+                'crop_shape': list(mask.crop_shape),
+                'area': mask.area,
+                'encoding': encoding,
+                'start': offset,
+                'length': len(data),
+            },
+        })
+        chunks.append(data)
+        offset += len(data)
+
+    header = json.dumps({
+        'version': STORE_VERSION,
+        'image_hash': image_hash,
+        'width': W,
+        'height': H,
+        'settings': settings,
+        'settings_hash': settings_hash(settings),
+        'created': time.time(),
+        'objects': records,
+    }, ensure_ascii=False, default=str).encode()
+    padding = -(_PREFIX.size + len(header)) % PAYLOAD_ALIGNMENT
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(STORE_MAGIC, STORE_VERSION, len(header)))
+        f.write(header)
+        f.write(b" " * padding)
+        for data in chunks:
+            f.write(data)
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+# --------------------------------------------------------------------------
+# OKUMA
+# --------------------------------------------------------------------------
+
+class StoredResult:
+    """
+    Bir sonuç dosyasını bellek eşlemeli (mmap) açar. Yalnızca başlık ayrıştırılır; maske verisi
+    istenen maske ilk kez kullanıldığında dosyadan okunur.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, header_length = _PREFIX.unpack_from(self._map, 0)
+            if magic != STORE_MAGIC or version != STORE_VERSION:
+                raise ValueError(f"Desteklenmeyen sonuç dosyası: {path}")
+            header_end = _PREFIX.size + header_length
+            header = json.loads(self._map[_PREFIX.size:header_end].decode())
+        except Exception:
+            self.close()
+            raise
+        self._payload_start = header_end + (-header_end % PAYLOAD_ALIGNMENT)
+        self.image_hash = header['image_hash']
+        self.width = header['width']
+        self.height = header['height']
+        self.settings = header['settings']
+        self.settings_hash = header['settings_hash']
+        self.created = header['created']
+        self.records = header['objects']
+        self._masks = [None] * len(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def read_mask(self, index):
+        """index'teki maskeyi dosyadan okuyup CompactMask (gerekirse LazyUpsampledMask) döndürür."""
+        if self._map is None:
+            raise ValueError(f"Sonuç dosyası kapatılmış: {self.path}")
+        info = self.records[index]['mask']
+        start = self._payload_start + info['start']
+        data = self._map[start:start + info['length']]
+        if info['encoding'] == "packbits+zlib":
+            data = zlib.decompress(data)
+        mask = CompactMask.from_packed(np.frombuffer(data, dtype=np.uint8), info['crop_shape'],
+                                       info['offset'], info['shape'], info['area'])
+        if mask.shape != (self.height, self.width):
+            return LazyUpsampledMask(mask, (self.height, self.width))
+        return mask
+
+    def mask(self, index):
+        """index'teki maskeye tembel erişim nesnesi (veri henüz okunmaz)."""
+        if self._masks[index] is None:
+            self._masks[index] = StoredMask(self, index)
+        return self._masks[index]
+
+    def objects(self, indices=None):
+        """Depodaki nesneleri get_segmentation_masks çıktısı biçiminde (mask, bbox, area, label) döndürür."""
+        if indices is None:
+            indices = range(len(self.records))
+        # 'area' alanı olmayan eski kayıtlarda alan maskeden okunur
+        return [{'mask': self.mask(i), 'bbox': list(self.records[i]['bbox']),
+                 'area': self.records[i]['area'] if 'area' in self.records[i] else self.mask(i).area,
+                 'label': self.records[i]['label']}
+                for i in indices]
+
+    def close(self):
+        """Eşlemeyi ve dosyayı kapatır; okunmamış maskelere artık erişilemez."""
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"StoredResult({self.path!r}, objects={len(self.records)}, size={self.width}x{self.height})"
+
+
+def open_result(path):
+    """Sonuç dosyasını açar; dosya yoksa ya da okunamıyorsa hata yazdırıp None döndürür."""
+    try:
+        return StoredResult(path)
+    except FileNotFoundError:
+        print(f"HATA: Sonuç dosyası bulunamadı: {path}")
+    except Exception as e:
+        print(f"Sonuç dosyası okunurken hata oluştu ({path}): {e}")
+    return None
+
+
+# --------------------------------------------------------------------------
+# TEMBEL OKUNAN MASKE
+# --------------------------------------------------------------------------
+
+class StoredMask:
+    """
+    Sonuç dosyasındaki bir maske. Başlıktaki bbox ve alan bilgisi veri okunmadan sunulur;
+    pikseller (crop, paint, to_rle, ...) istendiğinde maske bir kez okunur. CompactMask ile aynı
+    arayüzü sunar.
+    """
+
+    __slots__ = ('result', 'index', 'shape', '_mask')
+
+    def __init__(self, result, index):
+        self.result = result
+        self.index = index
+        self.shape = (result.height, result.width)
+        self._mask = None
+
+    def load(self):
+        """Maskeyi (gerekirse dosyadan okuyup) CompactMask ya da LazyUpsampledMask olarak döndürür."""
+        if self._mask is None:
+            self._mask = self.result.read_mask(self.index)
+        return self._mask
+
+    @property
+    def is_loaded(self):
+        return self._mask is not None
+
+    def _header_value(self, name):
+        """Tam çözünürlükte saklanmış maskeler için başlıktaki değer; diğerlerinde None."""
+        info = self.result.records[self.index]['mask']
+        if tuple(info['shape']) != self.shape:
+            return None
+        return info[name]
+
+    @property
+    def offset(self):
+        value = self._header_value('offset')
+        return tuple(value) if value is not None else self.load().offset
+
+    @property
+    def crop_shape(self):
+        value = self._header_value('crop_shape')
+        return tuple(value) if value is not None else self.load().crop_shape
+
+    @property
+    def area(self):
+        value = self._header_value('area')
+        return value if value is not None else self.load().area
+
+    @property
+    def bbox(self):
+        (x0, y0), (h, w) = self.offset, self.crop_shape
+        return [x0, y0, w, h]
+
+    def crop(self):
+        return self.load().crop()
+
+    def decode(self):
+        return self.load().decode()
+
+    def paint(self, buffer, value=True):
+        return self.load().paint(buffer, value)
+
+    def to_rle(self):
+        return self.load().to_rle()
+
+    def union(self, other):
+        mask = self.load()
+        if isinstance(mask, LazyUpsampledMask):
+            mask = mask.full()
+        return mask.union(other.load() if isinstance(other, StoredMask) else other)
+
+    def dilate(self, kernel_size, kernel=None):
+        return self.load().dilate(kernel_size, kernel)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.load().__array__(dtype)
+
+    @property
+    def nbytes(self):
+        """Şu anda bellekte tutulan bayt sayısı (okunmamış maskeler için 0)."""
+        return self._mask.nbytes if self._mask is not None else 0
+
+    def __repr__(self):
+        return f"StoredMask({self.result.path!r}, index={self.index}, loaded={self.is_loaded})"
+
+
+# --------------------------------------------------------------------------
+# SONUÇ DEPOSU
+# --------------------------------------------------------------------------
+
+class ResultStore:
+    """
+    Segmentasyon + sınıflandırma sonuçlarını görüntü içerik özeti ve ayar özetine göre bir klasörde
+    saklar. Aynı görüntü aynı ayarlarla tekrar istendiğinde sonuç SAM ve ViT çalıştırılmadan
+    dosyadan okunur.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, image_hash, settings):
+        """Görüntü ve ayar özetine karşılık gelen dosya yolu (özetin ilk iki karakteri alt klasördür)."""
+        return os.path.join(self.directory, image_hash[:2],
+                            f"{image_hash}-{settings_hash(settings)[:16]}{STORE_EXTENSION}")
+
+    def load(self, image_hash, settings):
+        """Eşleşen sonuç varsa StoredResult, yoksa None döndürür."""
+        path = self.path_for(image_hash, settings)
+        result = None
+        if os.path.exists(path):
+            result = open_result(path)
+            if result is not None and (result.image_hash != image_hash
+                                       or result.settings_hash != settings_hash(settings)):
+                result.close()
+                result = None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def save(self, image_hash, settings, image_shape, classified_objects):
+        """Sonucu depoya yazar ve dosya yolunu döndürür."""
+        path = self.path_for(image_hash, settings)
+        save_result(path, image_hash, image_shape, settings, classified_objects)
+        return path
+
+    def stats(self):
+        """İsabet/ıska sayılarını ve depodaki dosya sayısı ile toplam boyutu döndürür."""
+        files = 0
+        total_bytes = 0
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                if name.endswith(STORE_EXTENSION):
+                    files += 1
+                    total_bytes += os.path.getsize(os.path.join(dirpath, name))
+        return {'files': files, 'bytes': total_bytes, 'hits': self.hits, 'misses': self.misses}
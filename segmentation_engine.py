@@ -0,0 +1,214 @@
+# segmentation_engine.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from segment_anything import SamPredictor
+from segment_anything.utils.amg import build_all_layer_point_grids
+
+import profiling
+from adaptive_prompts import AdaptiveMaskGenerator
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Görüntü gömmeleri (image embeddings) için bellek bütçesi.
+# vit_l için bir gömme 1x256x64x64 float32 ≈ 4 MB tutar.
+EMBEDDING_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Çağrı başına değiştirilebilen (görüntü kodlayıcıyı yeniden çalıştırmayı gerektirmeyen) ayarlar
+OVERRIDABLE_SETTINGS = (
+    'points_per_side', 'points_per_batch', 'pred_iou_thresh', 'stability_score_thresh',
+    'stability_score_offset', 'box_nms_thresh', 'min_mask_region_area', 'adaptive_prompts',
+)
+
+
+def segmentation_scale(image_shape, max_side):
+    """Uzun kenarı max_side'a indiren ölçek katsayısı (küçültme gerekmiyorsa 1.0)."""
+    if not max_side:
+        return 1.0
+    return min(1.0, max_side / max(image_shape[0], image_shape[1]))
+
+
+def _to_full_resolution(results, full_shape, small_shape):
+    """
+    Küçültülmüş görüntüde üretilen sonuçların bbox, alan ve nokta koordinatlarını tam
+    çözünürlüğe taşır. 'segmentation' (RLE) düşük çözünürlükte bırakılır.
+    """
+    H, W = full_shape
+    h, w = small_shape
+    sx, sy = W / w, H / h
+    for result in results:
+        x, y, bw, bh = result['bbox']
+        x0, y0 = int(np.floor(x * sx)), int(np.floor(y * sy))
+        x1, y1 = min(int(np.ceil((x + bw) * sx)), W), min(int(np.ceil((y + bh) * sy)), H)
+        result['bbox'] = [x0, y0, x1 - x0, y1 - y0]
+        result['area'] = int(round(result['area'] * sx * sy))
+        result['point_coords'] = [[px * sx, py * sy] for px, py in result['point_coords']]
+        cx, cy, cw, ch = result['crop_box']
+        result['crop_box'] = [int(round(cx * sx)), int(round(cy * sy)), int(round(cw * sx)), int(round(ch * sy))]
+    return results
+
+
+def image_content_hash(image):
+    """Görüntünün piksel içeriğinden (boyut ve dtype dahil) kararlı bir özet anahtarı üretir."""
+    image = np.ascontiguousarray(image)
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(repr((image.shape, image.dtype.str)).encode())
+    hasher.update(image.data)
+    return hasher.hexdigest()
+
+
+# --------------------------------------------------------------------------
+# GÖMME ÖNBELLEĞİ
+# --------------------------------------------------------------------------
+
+class EmbeddingCache:
+    """Görüntü gömmelerini içerik özetine göre saklayan, bellek bütçeli LRU önbellek."""
+
+    def __init__(self, max_bytes=EMBEDDING_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Kayıt varsa (features, original_size, input_size) döndürür ve en yeni olarak işaretler."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, features, original_size, input_size):
+        """Gömme kaydını ekler; bütçe aşılırsa en eski kayıtları siler."""
+        size = features.element_size() * features.nelement()
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (features, original_size, input_size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, (old_features, _, _) = self._entries.popitem(last=False)
+                self.current_bytes -= old_features.element_size() * old_features.nelement()
+
+    def clear(self):
+        """Önbelleği boşaltır."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """İsabet/ıska sayılarını ve bellek kullanımını döndürür."""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class CachingSamPredictor(SamPredictor):
+    """set_image çağrısında görüntü kodlayıcıyı yalnızca önbellekte olmayan görüntüler için çalıştırır."""
+
+    def __init__(self, sam_model, embedding_cache):
+        super().__init__(sam_model)
+        self.embedding_cache = embedding_cache
+
+    def set_image(self, image, image_format="RGB"):
+        key = image_content_hash(image) + image_format
+        cached = self.embedding_cache.get(key)
+        if cached is not None:
+            self.reset_image()
+            self.features, self.original_size, self.input_size = cached
+            self.is_image_set = True
+            return
+
+        super().set_image(image, image_format)
+        self.embedding_cache.put(key, self.features, self.original_size, self.input_size)
+
+
+# --------------------------------------------------------------------------
+# SEGMENTASYON MOTORU
+# --------------------------------------------------------------------------
+
+class SegmentationEngine:
+    """
+    Tek bir maske üretecini (AdaptiveMaskGenerator) ve gömme önbelleğini sahiplenen segmentasyon motoru.
+    Aynı görüntü farklı eşiklerle yeniden segmentlendiğinde yalnızca maske çözücü ve
+    son işleme adımları çalışır.
+    """
+
+    def __init__(self, sam_model, cache_max_bytes=EMBEDDING_CACHE_MAX_BYTES, **generator_settings):
+        self.sam_model = sam_model
+        self.generator_settings = dict(generator_settings)
+        self.embedding_cache = EmbeddingCache(cache_max_bytes)
+        self.mask_generator = AdaptiveMaskGenerator(sam_model, **generator_settings)
+        self.mask_generator.predictor = CachingSamPredictor(sam_model, self.embedding_cache)
+        self._lock = threading.Lock()
+
+    def generate(self, image, max_side=None, **overrides):
+        """
+        Görüntü için otomatik maskeleri üretir. overrides ile verilen ayarlar
+        (ör. pred_iou_thresh) yalnızca bu çağrı için geçerlidir.
+        max_side verilirse ve görüntünün uzun kenarı daha büyükse SAM küçültülmüş görüntüde
+        çalışır: min_mask_region_area alan oranında küçültülür, bbox/alan değerleri tam
+        çözünürlükte döner, 'segmentation' RLE'si ise düşük çözünürlükte kalır.
+        """
+        unknown = set(overrides) - set(OVERRIDABLE_SETTINGS)
+        if unknown:
+            raise ValueError(f"Desteklenmeyen segmentasyon ayarları: {', '.join(sorted(unknown))}")
+
+        scale = segmentation_scale(image.shape, max_side)
+        if scale >= 1.0:
+            return self._generate(image, overrides)
+
+        H, W = image.shape[:2]
+        with profiling.stage("sam_downscale"):
+            small = cv2.resize(image, (max(int(round(W * scale)), 1), max(int(round(H * scale)), 1)),
+                               interpolation=cv2.INTER_AREA)
+        area_ratio = (small.shape[0] * small.shape[1]) / (H * W)
+        # Üretecin o anki değeri başka bir çağrının geçici ayarı olabilir; motorun kendi ayarı kullanılır
+        min_area = overrides.get('min_mask_region_area', self.generator_settings.get('min_mask_region_area', 0))
+        if min_area > 0:
+            overrides = dict(overrides, min_mask_region_area=max(int(round(min_area * area_ratio)), 1))
+        results = self._generate(small, overrides)
+        return _to_full_resolution(results, (H, W), small.shape[:2])
+
+    def _generate(self, image, overrides):
+        generator = self.mask_generator
+        with self._lock:
+            saved = {name: getattr(generator, name) for name in overrides if name != 'points_per_side'}
+            saved_grids = generator.point_grids
+            try:
+                for name, value in overrides.items():
+                    if name == 'points_per_side':
+                        generator.point_grids = build_all_layer_point_grids(
+                            value, generator.crop_n_layers, generator.crop_n_points_downscale_factor)
+                    else:
+                        setattr(generator, name, value)
+                with profiling.stage("sam_generate"):
+                    results = generator.generate(image)
+                profiling.count("sam_masks", len(results))
+                return results
+            finally:
+                for name, value in saved.items():
+                    setattr(generator, name, value)
+                generator.point_grids = saved_grids
@@ -0,0 +1,463 @@
+# server.py
+import argparse
+import io
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from model_registry import registry
+import classifier
+import model_loader
+from model_loader import (get_sam_model, get_segmentation_masks, get_segmentation_engine, set_result_store,
+                          get_result_store, set_sam_profile, SAM_PROFILES, SAM_PROFILE)
+from classifier import (set_vit_batcher, get_vit_batcher, vit_forward, get_classification_cache,
+                        set_classifier_profile, CLASSIFIER_PROFILES, CLASSIFIER_PROFILE)
+from segmentation_engine import OVERRIDABLE_SETTINGS
+from vit_batcher import (DynamicBatcher, QueueFullError, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_LATENCY_MS,
+                         DEFAULT_MAX_QUEUE_DEPTH)
+from batch_processing import serialize_objects
+from generator import generate_redesign_image, INPAINTING_PROFILES
+from renderer import render_results, OUTPUT_FORMATS
+from result_store import ResultStore
+from mask_dedup import set_dedup_policy, dedup_stats, DEDUP_POLICIES, DEDUP_POLICY, DEDUP_MAX_MASKS
+from image_io import decode_info
+from utils import decode_image
+import profiling
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Kabul edilen en büyük istek gövdesi (kodlanmış görüntü)
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+# Aynı anda işlenebilecek segmentasyon / yeniden tasarım isteği sayısı; fazlası 503 ile reddedilir
+DEFAULT_MAX_INFLIGHT = 8
+DEFAULT_MAX_INFLIGHT_REDESIGNS = 1
+
+# Gecikme yüzdelikleri için uç nokta başına saklanan son istek sayısı
+LATENCY_WINDOW = 1000
+
+# Reddedilen isteklere önerilen yeniden deneme süresi (s)
+RETRY_AFTER_SECONDS = 1
+
+
+def _parse_bool(value):
+    """Sorgu parametresindeki 1/0, true/false değerini bool'a çevirir; başka değerde ValueError."""
+    value = value.lower()
+    if value in ("1", "true", "yes"):
+        return True
+    if value in ("0", "false", "no"):
+        return False
+    raise ValueError(value)
+
+
+# Sorgu parametresi olarak kabul edilen SAM ayarları ve tipleri
+_SAM_PARAM_TYPES = {
+    'points_per_side': int, 'points_per_batch': int, 'pred_iou_thresh': float, 'stability_score_thresh': float,
+    'stability_score_offset': float, 'box_nms_thresh': float, 'min_mask_region_area': int,
+    'adaptive_prompts': _parse_bool,
+}
+
+
+class ServiceError(Exception):
+    """HTTP durum koduyla birlikte istemciye iletilecek hata."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --------------------------------------------------------------------------
+# METRİKLER
+# --------------------------------------------------------------------------
+
+class EndpointMetrics:
+    """Uç nokta başına istek, hata, red sayıları ve son LATENCY_WINDOW isteğin gecikmeleri."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, status):
+        with self._lock:
+            self.requests += 1
+            if status == 503:
+                self.rejected += 1
+            elif status >= 400:
+                self.errors += 1
+            else:
+                self.latencies.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.asarray(self.latencies) * 1000
+            snapshot = {'requests': self.requests, 'errors': self.errors, 'rejected': self.rejected}
+        if latencies.size:
+            for q in (50, 95, 99):
+                snapshot[f'p{q}_ms'] = round(float(np.percentile(latencies, q)), 1)
+        return snapshot
+
+
+# --------------------------------------------------------------------------
+# SERVİS
+# --------------------------------------------------------------------------
+
+class InferenceService:
+    """
+    SAM, ViT ve (istenirse) inpainting modellerini bellekte tutan, HTTP işleyicisinden bağımsız servis.
+    Eşzamanlı isteklerin ViT kırpıntıları DynamicBatcher ile ortak ileri geçişlerde işlenir;
+    eşzamanlı istek sayısı sınırlıdır (geri basınç).
+    """
+
+    def __init__(self, batcher=None, max_inflight=DEFAULT_MAX_INFLIGHT,
+                 max_inflight_redesigns=DEFAULT_MAX_INFLIGHT_REDESIGNS, warm_inpainting=False):
+        self.batcher = batcher
+        self.warm_inpainting = warm_inpainting
+        self.started_at = time.time()
+        self.metrics = {name: EndpointMetrics() for name in ('segment', 'redesign', 'health', 'metrics')}
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._redesign_slots = threading.BoundedSemaphore(max_inflight_redesigns)
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        if batcher is not None:
+            set_vit_batcher(batcher)
+
+    def warmup(self):
+        """Modelleri ilk istekten önce yükler; yüklenemeyen model varsa False döndürür."""
+        names = ("sam", "vit", "inpainting") if self.warm_inpainting else ("sam", "vit")
+        loaded = registry.warmup(*names)
+        for name, ok in loaded.items():
+            print(f"  {name}: {'hazır' if ok else 'YÜKLENEMEDİ'}")
+        return all(loaded.values())
+
+    def _acquire(self, slots):
+        if not slots.acquire(blocking=False):
+            raise ServiceError(503, "Sunucu meşgul; daha sonra tekrar deneyin.")
+        with self._inflight_lock:
+            self._inflight += 1
+
+    def _release(self, slots):
+        with self._inflight_lock:
+            self._inflight -= 1
+        slots.release()
+
+    def _request_scope(self):
+        """Profil ölçümleri için istek başına kapsam; eski istek izleri LATENCY_WINDOW ile sınırlanır."""
+        if profiling.is_enabled():
+            profiling.trim(LATENCY_WINDOW)
+        return profiling.image_scope(f"istek-{next(self._request_ids)}")
+
+    def _segment(self, body, params):
+        image = decode_image(body)
+        max_side = params.pop('max_side', None)
+        try:
+            classified_objects = get_segmentation_masks(image, get_sam_model(), max_side=max_side, **params)
+        except QueueFullError as e:
+            raise ServiceError(503, str(e))
+        if classified_objects is None:
+            raise ServiceError(503, "SAM modeli yüklenemedi.")
+        return image, classified_objects
+
+    def segment(self, body, params, include_masks=True, render=None):
+        """
+        Görüntüyü segmentleyip sınıflandırır. JSON'a yazılabilir kayıt döndürür; render ("png",
+        "jpg", "webp") verilirse maskeli/etiketli görselin baytlarını döndürür.
+        """
+        self._acquire(self._slots)
+        try:
+            with self._request_scope():
+                image, classified_objects = self._segment(body, params)
+                if render:
+                    return render_results(image, classified_objects, fmt=render)
+            record = serialize_objects(None, image.shape, classified_objects, decode_info(body, image))
+            if not include_masks:
+                for obj in record['objects']:
+                    del obj['mask_rle']
+            return record
+        finally:
+            self._release(self._slots)
+
+    def redesign(self, body, prompt, params, profile=None, steps=None):
+        """
+        Görüntüyü segmentleyip prompt'a göre yeniden tasarlar; PNG baytları döndürür.
+        profile/steps verilmezse generator.INPAINTING_PROFILE kullanılır.
+        """
+        self._acquire(self._redesign_slots)
+        try:
+            # Pipeline yüklenemiyorsa segmentasyon boşuna çalıştırılmaz
+            if registry.get("inpainting") is None:
+                raise ServiceError(503, "Inpainting modeli yüklenemedi.")
+            with self._request_scope():
+                image, classified_objects = self._segment(body, params)
+                redesigned = generate_redesign_image(image, classified_objects, prompt, profile=profile,
+                                                     steps=steps)
+            if redesigned is None:
+                raise ServiceError(500, "Yeniden tasarım başarısız oldu.")
+            buffer = io.BytesIO()
+            redesigned.save(buffer, format="PNG")
+            return buffer.getvalue()
+        finally:
+            self._release(self._redesign_slots)
+
+    def health(self):
+        """Modellerin yüklenme durumu; SAM ve ViT hazırsa 'ok'."""
+        models = {name: registry.is_loaded(name) and registry.get(name) is not None
+                  for name in ("sam", "vit", "inpainting")}
+        return {
+            'status': 'ok' if models['sam'] and models['vit'] else 'loading',
+            'models': models,
+            'profiles': {'sam': model_loader.SAM_PROFILE, 'vit': classifier.CLASSIFIER_PROFILE},
+            'uptime_s': round(time.time() - self.started_at, 1),
+        }
+
+    def metrics_snapshot(self):
+        """Uç nokta gecikmeleri, batch'leyici, önbellek, depo ve tekilleştirme istatistikleri."""
+        with self._inflight_lock:
+            inflight = self._inflight
+        snapshot = {
+            'inflight': inflight,
+            'endpoints': {name: m.snapshot() for name, m in self.metrics.items()},
+        }
+        batcher = get_vit_batcher()
+        if batcher is not None:
+            snapshot['vit_batcher'] = batcher.stats()
+        if registry.is_loaded("sam") and registry.get("sam") is not None:
+            snapshot['embedding_cache'] = get_segmentation_engine(registry.get("sam")).embedding_cache.stats()
+        if get_classification_cache() is not None:
+            snapshot['classification_cache'] = get_classification_cache().stats()
+        if get_result_store() is not None:
+            snapshot['result_store'] = get_result_store().stats()
+        snapshot['dedup'] = dedup_stats()
+        if profiling.is_enabled():
+            snapshot['stages'] = profiling.summary()
+        return snapshot
+
+
+# --------------------------------------------------------------------------
+# HTTP İŞLEYİCİSİ
+# --------------------------------------------------------------------------
+
+def _parse_sam_params(query):
+    """Sorgu parametrelerinden max_side ve SAM ayarlarını okur; bilinmeyen/geçersiz değerde 400."""
+    params = {}
+    for name, values in query.items():
+        if name in ('masks', 'render', 'prompt', 'profile', 'steps'):
+            continue
+        if name == 'max_side':
+            cast = int
+        elif name in OVERRIDABLE_SETTINGS and name in _SAM_PARAM_TYPES:
+            cast = _SAM_PARAM_TYPES[name]
+        else:
+            raise ServiceError(400, f"Bilinmeyen parametre: {name}")
+        try:
+            params[name] = cast(values[-1])
+        except ValueError:
+            raise ServiceError(400, f"Geçersiz değer: {name}={values[-1]}")
+    return params
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health, /metrics
+    POST /segment?max_side=&pred_iou_thresh=...&masks=0|1&render=png|jpg|webp   (gövde: görüntü baytları)
+    POST /redesign?prompt=...&profile=quality|fast&steps=                     (gövde: görüntü baytları)
+    """
+
+    service = None
+    server_version = "SAM3Goruntu/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # İstek başına satır yazılmaz; metrikler /metrics üzerinden izlenir
+        pass
+
+    def _send(self, status, body, content_type, extra_headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload, extra_headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self._send(status, body, "application/json; charset=utf-8", extra_headers)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            raise ServiceError(400, "İstek gövdesi boş; görüntü baytları bekleniyor.")
+        if length > MAX_BODY_BYTES:
+            raise ServiceError(413, f"İstek gövdesi çok büyük (en fazla {MAX_BODY_BYTES} bayt).")
+        self._body_read = True
+        return self.rfile.read(length)
+
+    def _close_if_body_unread(self):
+        """Gövde okunmadan dönen hatada bağlantı kapatılır; okunmamış gövde sonraki istek sanılmasın."""
+        if self.command == "POST" and not self._body_read:
+            self.close_connection = True
+
+    def _handle(self, endpoint, handler):
+        t0 = time.perf_counter()
+        status = 200
+        self._body_read = False
+        try:
+            content_type, body = handler()
+            self._send(status, body, content_type)
+        except ServiceError as e:
+            status = e.status
+            headers = {"Retry-After": str(RETRY_AFTER_SECONDS)} if status == 503 else None
+            self._close_if_body_unread()
+            self._send_json(status, {'error': str(e)}, headers)
+        except ValueError as e:
+            status = 400
+            self._close_if_body_unread()
+            self._send_json(status, {'error': str(e)})
+        except Exception as e:
+            status = 500
+            self._close_if_body_unread()
+            self._send_json(status, {'error': f"Beklenmedik hata: {e}"})
+        finally:
+            if endpoint in self.service.metrics:
+                self.service.metrics[endpoint].record(time.perf_counter() - t0, status)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._handle("health", lambda: ("application/json", json.dumps(self.service.health()).encode()))
+        elif path == "/metrics":
+            self._handle("metrics", lambda: ("application/json",
+                                             json.dumps(self.service.metrics_snapshot(), ensure_ascii=False).encode()))
+        else:
+            self._send_json(404, {'error': f"Bilinmeyen yol: {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/segment":
+            self._handle("segment", lambda: self._segment(query))
+        elif url.path == "/redesign":
+            self._handle("redesign", lambda: self._redesign(query))
+        else:
+            self.close_connection = True
+            self._send_json(404, {'error': f"Bilinmeyen yol: {url.path}"})
+
+    def _segment(self, query):
+        render = query.get('render', [None])[-1]
+        if render and "." + render.lstrip(".").lower() not in OUTPUT_FORMATS:
+            raise ServiceError(400, f"Desteklenmeyen görsel biçimi: {render}")
+        params = _parse_sam_params(query)
+        body = self._read_body()
+        result = self.service.segment(body, params, include_masks=query.get('masks', ['1'])[-1] != '0',
+                                      render=render)
+        if render:
+            return f"image/{'jpeg' if render.lstrip('.') in ('jpg', 'jpeg') else render.lstrip('.')}", result
+        return "application/json; charset=utf-8", json.dumps(result, ensure_ascii=False).encode()
+
+    def _redesign(self, query):
+        prompt = query.get('prompt', [""])[-1].strip()
+        if not prompt:
+            raise ServiceError(400, "prompt parametresi gerekli.")
+        profile = query.get('profile', [None])[-1]
+        if profile is not None and profile not in INPAINTING_PROFILES:
+            raise ServiceError(400, f"Bilinmeyen inpainting profili: {profile}")
+        steps = query.get('steps', [None])[-1]
+        try:
+            steps = int(steps) if steps is not None else None
+        except ValueError:
+            raise ServiceError(400, f"Geçersiz değer: steps={steps}")
+        if steps is not None and steps < 1:
+            raise ServiceError(400, f"Geçersiz değer: steps={steps}")
+        params = _parse_sam_params(query)
+        body = self._read_body()
+        return "image/png", self.service.redesign(body, prompt, params, profile=profile, steps=steps)
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Servisi sunan ThreadingHTTPServer oluşturur (port=0: boş bir port seçilir)."""
+    handler = type("BoundInferenceRequestHandler", (InferenceRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# --------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SAM + ViT çıkarım servisi (HTTP)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-inflight", type=int, default=DEFAULT_MAX_INFLIGHT,
+                        help="Aynı anda işlenecek segmentasyon isteği sayısı (fazlası 503)")
+    parser.add_argument("--max-inflight-redesigns", type=int, default=DEFAULT_MAX_INFLIGHT_REDESIGNS)
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_MAX_LATENCY_MS,
+                        help="ViT batch'leyicisinin kırpıntı toplama penceresi (ms); 0: batch'leyici kapalı")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="Tek ViT ileri geçişindeki en fazla kırpıntı")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE_DEPTH,
+                        help="ViT kuyruğunda bekleyebilecek en fazla kırpıntı")
+    parser.add_argument("--warm-inpainting", action="store_true",
+                        help="Inpainting pipeline'ını da açılışta yükle")
+    parser.add_argument("--result-store", metavar="KLASÖR", help="Segmentasyon sonuç deposu")
+    parser.add_argument("--sam-profile", choices=list(SAM_PROFILES), default=SAM_PROFILE)
+    parser.add_argument("--vit-profile", choices=list(CLASSIFIER_PROFILES), default=CLASSIFIER_PROFILE)
+    parser.add_argument("--dedup-policy", choices=list(DEDUP_POLICIES), default=DEDUP_POLICY,
+                        help="Sınıflandırma öncesi maske tekilleştirmesi (sayılar /metrics'te)")
+    parser.add_argument("--max-masks", type=int, default=DEDUP_MAX_MASKS,
+                        help="Görüntü başına sınıflandırılacak en fazla maske (varsayılan: sınırsız)")
+    parser.add_argument("--profile", action="store_true", help="Aşama ölçümlerini /metrics'e ekle")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    if args.result_store:
+        set_result_store(ResultStore(args.result_store))
+    set_sam_profile(args.sam_profile)
+    set_classifier_profile(args.vit_profile)
+    set_dedup_policy(args.dedup_policy, args.max_masks)
+
+    batcher = None
+    if args.batch_window_ms > 0:
+        batcher = DynamicBatcher(vit_forward, max_batch_size=args.max_batch, max_latency_ms=args.batch_window_ms,
+                                 max_queue_depth=args.max_queue)
+    service = InferenceService(batcher, max_inflight=args.max_inflight,
+                               max_inflight_redesigns=args.max_inflight_redesigns,
+                               warm_inpainting=args.warm_inpainting)
+    print("Modeller yükleniyor...")
+    if not service.warmup():
+        print("UYARI: Bazı modeller yüklenemedi; ilgili uç noktalar hata döndürecek.")
+
+    server = make_server(service, args.host, args.port)
+    print(f"Servis hazır: http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if batcher is not None:
+            batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# tests/conftest.py
+"""
+Ortak test ayarları. Testler ağırlık dosyası ve internet olmadan, benchmarks/stubs.py'deki küçük
+deterministik yedek modellerle CPU'da çalışır. Depo kök dizininden: `python -m pytest -q`.
+"""
+import os
+import sys
+
+import cv2
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+# Testlerde SAM'a verilen ayar: 4x4 nokta ızgarası (yedek modellerle istek başına ~1 s)
+TEST_SAM_SETTINGS = {'points_per_side': 4}
+
+
+@pytest.fixture(scope="session")
+def stub_models():
+    """Kayıt defterindeki 'sam' ve 'vit' yükleyicilerini yedek modellerle değiştirir."""
+    from benchmarks.stubs import install_stub_models
+    install_stub_models()
+
+
+@pytest.fixture(scope="session")
+def stub_inpainting():
+    """Kayıt defterindeki 'inpainting' yükleyicisini küçük UNet/VAE/CLIP'li yedek pipeline ile değiştirir."""
+    from benchmarks.stubs import install_stub_inpainting
+    install_stub_inpainting()
+
+
+@pytest.fixture(scope="session")
+def room_image():
+    """Paketteki fotoğrafın 256x192'ye küçültülmüş RGB hali."""
+    from utils import read_image
+    image = read_image(os.path.join(REPO_ROOT, "test_oda_fotografi2.jpg"))
+    return cv2.resize(image, (256, 192), interpolation=cv2.INTER_AREA)
+
+
+@pytest.fixture(scope="session")
+def room_jpeg(room_image):
+    """room_image'ın JPEG baytları."""
+    ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(room_image, cv2.COLOR_RGB2BGR))
+    assert ok
+    return encoded.tobytes()
@@ -0,0 +1,139 @@
+# tests/test_async_pipeline.py
+"""Asenkron cephe (async_pipeline.py): zaman aşımı, iptal, sınırlı kuyruk ve senkron yolla etiket eşliği."""
+import asyncio
+import threading
+
+import numpy as np
+
+import async_pipeline
+from async_pipeline import AsyncPipeline, ModelExecutor
+from model_loader import get_sam_model, get_segmentation_masks
+from utils import decode_image
+from conftest import TEST_SAM_SETTINGS
+
+
+async def _drain(executor):
+    """Sonucu atılmış olanlar dahil yürütücünün tüm çağrıları bitene kadar bekler."""
+    while executor.inflight:
+        await asyncio.sleep(0.01)
+
+
+def test_timeout_raises_and_skips_vit(stub_models, room_image, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    real_generate_masks = async_pipeline.generate_masks
+
+    def slow_generate_masks(*args, **kwargs):
+        started.set()
+        release.wait(60)
+        return real_generate_masks(*args, **kwargs)
+
+    monkeypatch.setattr(async_pipeline, "generate_masks", slow_generate_masks)
+
+    async def run():
+        async with AsyncPipeline() as pipeline:
+            try:
+                await pipeline.segment_and_classify(room_image, timeout=0.2, **TEST_SAM_SETTINGS)
+            except asyncio.TimeoutError:
+                timed_out = True
+            else:
+                timed_out = False
+            assert started.is_set()
+            release.set()
+            await _drain(pipeline.models['sam'])
+            await asyncio.sleep(0.05)
+            return timed_out, pipeline
+
+    timed_out, pipeline = asyncio.run(run())
+    assert timed_out
+    assert pipeline.stats['timeouts'] == 1
+    # SAM çağrısı çalışırken süre doldu: sonucu atıldı, ViT hiç kuyruğa girmedi
+    assert pipeline.models['sam'].stats['abandoned'] == 1
+    assert pipeline.models['vit'].stats['submitted'] == 0
+
+
+def test_cancelled_call_is_dropped_before_start():
+    release = threading.Event()
+    ran = []
+
+    def work(name):
+        ran.append(name)
+        release.wait(60)
+        return name
+
+    async def run():
+        executor = ModelExecutor("test", workers=1, max_pending=4)
+        try:
+            first = asyncio.create_task(executor.run("test", work, "ilk"))
+            queued = asyncio.create_task(executor.run("test", work, "kuyrukta"))
+            while executor.inflight < 2:
+                await asyncio.sleep(0.01)
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+            release.set()
+            result = await first
+            await _drain(executor)
+            return executor, result, queued
+        finally:
+            executor.shutdown()
+
+    executor, result, queued = asyncio.run(run())
+    assert result == "ilk"
+    assert queued.cancelled()
+    assert ran == ["ilk"]
+    assert executor.stats['cancelled'] == 1 and executor.stats['completed'] == 1
+    assert executor.inflight == 0
+
+
+def test_inflight_is_bounded_by_workers_and_pending():
+    workers, max_pending, calls = 2, 3, 12
+    release = threading.Event()
+    running, max_running = [0], [0]
+    lock = threading.Lock()
+
+    def work(i):
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        release.wait(60)
+        with lock:
+            running[0] -= 1
+        return i
+
+    async def run():
+        executor = ModelExecutor("test", workers=workers, max_pending=max_pending)
+        try:
+            tasks = [asyncio.create_task(executor.run("test", work, i)) for i in range(calls)]
+            await asyncio.sleep(0.2)
+            # Kalan çağrılar olay döngüsünde yer açılmasını bekler; havuza gönderilmez
+            assert executor.inflight == workers + max_pending
+            assert executor.stats['submitted'] == workers + max_pending
+            observed = [executor.inflight]
+            release.set()
+            while not all(task.done() for task in tasks):
+                observed.append(executor.inflight)
+                await asyncio.sleep(0.001)
+            return executor, [task.result() for task in tasks], max(observed)
+        finally:
+            executor.shutdown()
+
+    executor, results, max_inflight = asyncio.run(run())
+    assert results == list(range(calls))
+    assert max_inflight <= workers + max_pending
+    assert max_running[0] <= workers
+    assert executor.stats['completed'] == calls
+
+
+def test_async_labels_match_sync_path(stub_models, room_image, room_jpeg):
+    flipped = np.ascontiguousarray(room_image[:, ::-1])
+    sam_model = get_sam_model()
+    expected = [[obj['label'] for obj in get_segmentation_masks(image, sam_model, **TEST_SAM_SETTINGS)]
+                for image in (room_image, flipped, decode_image(room_jpeg))]
+
+    async def run():
+        async with AsyncPipeline() as pipeline:
+            return await asyncio.gather(*(pipeline.segment_and_classify(source, **TEST_SAM_SETTINGS)
+                                          for source in (room_image, flipped, room_jpeg)))
+
+    results = asyncio.run(run())
+    assert [[obj['label'] for obj in objects] for objects in results] == expected
+    assert all(expected)
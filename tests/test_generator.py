@@ -0,0 +1,137 @@
+# tests/test_generator.py
+"""Yeniden tasarım (generator.py): bölge modu, profil/adım ayarları ve çoklu varyant, yedek pipeline ile."""
+import cv2
+import numpy as np
+import pytest
+
+import generator
+from benchmarks.inpainting import furniture_objects
+from model_registry import registry
+
+PROMPT = "modern minimalist koltuklar"
+
+
+@pytest.fixture
+def pipeline_calls(stub_inpainting, monkeypatch):
+    """Yedek pipeline'a yapılan çağrıların argümanlarını (ve o anki zamanlayıcıyı) kaydeder."""
+    pipeline = registry.get("inpainting")
+    original_call = type(pipeline).__call__
+    calls = []
+
+    def spy(self, *args, **kwargs):
+        calls.append(dict(kwargs, scheduler=type(self.scheduler).__name__))
+        return original_call(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(pipeline), "__call__", spy)
+    return calls
+
+
+def test_region_profile_keeps_size_and_pixels_outside_region(room_image, pipeline_calls):
+    objects = furniture_objects(*room_image.shape[:2])
+    stats = {}
+    result = generator.generate_redesign_image(room_image, objects, PROMPT, profile="fast", steps=2, stats=stats)
+    result = np.asarray(result)
+
+    assert result.shape == room_image.shape
+    assert stats['output_size'] == [room_image.shape[1], room_image.shape[0]]
+
+    mask, _ = generator.redesign_mask(room_image.shape, objects, PROMPT)
+    x0, y0, x1, y1 = generator.inpainting_region(mask)
+    assert list(stats['region']) == [x0, y0, x1, y1]
+    outside_box = np.ones(mask.shape, dtype=bool)
+    outside_box[y0:y1, x0:x1] = False
+    assert outside_box.any()
+    assert np.array_equal(result[outside_box], room_image[outside_box])
+
+    # Kutu içinde de yumuşatılmış kenarın (feather) ötesi değişmez
+    feather = generator.REGION_FEATHER
+    near_mask = cv2.dilate(mask, np.ones((2 * feather + 1,) * 2, np.uint8)).astype(bool)
+    assert np.array_equal(result[~near_mask], room_image[~near_mask])
+    assert not np.array_equal(result[mask.astype(bool)], room_image[mask.astype(bool)])
+
+
+def test_steps_and_profile_reach_pipeline(room_image, pipeline_calls):
+    objects = furniture_objects(*room_image.shape[:2])
+
+    generator.generate_redesign_image(room_image, objects, PROMPT, profile="fast", steps=3)
+    call = pipeline_calls[-1]
+    assert call['num_inference_steps'] == 3
+    assert call['scheduler'] == generator.SCHEDULERS['dpm++']
+    assert max(call['width'], call['height']) == generator.REGION_SIZE
+
+    custom = dict(generator.INPAINTING_PROFILES['quality'], steps=2, scheduler='ddim')
+    result = generator.generate_redesign_image(room_image, objects, PROMPT, profile=custom)
+    call = pipeline_calls[-1]
+    assert call['num_inference_steps'] == 2
+    assert call['scheduler'] == generator.SCHEDULERS['ddim']
+    # Bölge modu kapalı: pipeline'ın varsayılan kare boyutu
+    assert result.size == (call['width'], call['height'])
+
+    with pytest.raises(ValueError):
+        generator.generate_redesign_image(room_image, objects, PROMPT, profile="yok")
+
+
+# --------------------------------------------------------------------------
+# ÇOKLU VARYANT (generate_redesign_variants)
+# --------------------------------------------------------------------------
+
+VARIANT_PROMPTS = ["modern minimalist koltuklar", "iskandinav tarzı ahşap mobilya"]
+VARIANT_SEEDS = [1, 2]
+# Batch'li kayan nokta toplamlarından gelen en büyük izinli piksel farkı
+MAX_PIXEL_DIFF = 1
+
+
+def _variants(image, objects, **kwargs):
+    images = generator.generate_redesign_variants(image, objects, VARIANT_PROMPTS, seeds=VARIANT_SEEDS,
+                                                  steps=2, **kwargs)
+    return [np.asarray(img, dtype=np.int16) for img in images]
+
+
+def _max_diff(a, b):
+    return int(np.abs(a - b).max())
+
+
+def test_variants_come_back_in_prompt_by_seed_order(room_image, stub_inpainting):
+    objects = furniture_objects(*room_image.shape[:2])
+    generator.clear_redesign_cache()
+    stats = {}
+    variants = _variants(room_image, objects, stats=stats)
+    assert len(variants) == len(VARIANT_PROMPTS) * len(VARIANT_SEEDS)
+    assert stats['batches'] == 1
+
+    singles = [np.asarray(generator.generate_redesign_image(room_image, objects, prompt, steps=2, seed=seed),
+                          dtype=np.int16)
+               for prompt in VARIANT_PROMPTS for seed in VARIANT_SEEDS]
+    for i, variant in enumerate(variants):
+        diffs = [_max_diff(variant, single) for single in singles]
+        assert diffs[i] <= MAX_PIXEL_DIFF, diffs
+        # Başka prompt ya da tohumla üretilen varyantlardan ayırt edilebilir olmalı
+        assert all(diff > MAX_PIXEL_DIFF for j, diff in enumerate(diffs) if j != i), diffs
+
+
+def test_fixed_seed_is_reproducible_across_calls(room_image, stub_inpainting):
+    objects = furniture_objects(*room_image.shape[:2])
+    generator.clear_redesign_cache()
+    first_stats, second_stats = {}, {}
+    first = generator.generate_redesign_image(room_image, objects, PROMPT, steps=2, seed=7, stats=first_stats)
+    second = generator.generate_redesign_image(room_image, objects, PROMPT, steps=2, seed=7, stats=second_stats)
+
+    assert np.array_equal(np.asarray(first), np.asarray(second))
+    # İkinci çağrı maskeli latent'i ve negatif gömmeyi önbellekten alır
+    assert first_stats['masked_latent_cache_hits'] == 0
+    assert second_stats['masked_latent_cache_hits'] >= 1
+    assert second_stats['negative_embeds_cache_hits'] >= 1
+
+
+@pytest.mark.parametrize("batch_size", [1, 3])
+def test_split_batches_match_single_batch(room_image, stub_inpainting, batch_size):
+    objects = furniture_objects(*room_image.shape[:2])
+    count = len(VARIANT_PROMPTS) * len(VARIANT_SEEDS)
+    single_stats, split_stats = {}, {}
+    single = _variants(room_image, objects, batch_size=count, stats=single_stats)
+    split = _variants(room_image, objects, batch_size=batch_size, stats=split_stats)
+
+    assert single_stats['batches'] == 1
+    assert split_stats['batches'] == -(-count // batch_size)
+    for a, b in zip(single, split):
+        assert _max_diff(a, b) <= MAX_PIXEL_DIFF
@@ -0,0 +1,52 @@
+# tests/test_image_io.py
+"""Görüntü okuma (image_io.py): varsayılan tam çözünürlük ve küçültülmüş çözmede özgün boyut bilgisi."""
+import cv2
+import pytest
+
+import batch_processing
+import image_io
+from utils import decode_image, read_image
+
+WIDTH, HEIGHT = 512, 384
+
+
+@pytest.fixture(scope="module")
+def large_jpeg(tmp_path_factory, room_image):
+    """room_image'ın 512x384'e büyütülmüş JPEG dosyası."""
+    path = str(tmp_path_factory.mktemp("image_io") / "oda.jpg")
+    image = cv2.resize(room_image, (WIDTH, HEIGHT), interpolation=cv2.INTER_CUBIC)
+    assert cv2.imwrite(path, cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    return path
+
+
+def test_default_decode_is_full_resolution(large_jpeg):
+    assert not image_io.DECODE_MAX_SIDE
+    with open(large_jpeg, "rb") as f:
+        data = f.read()
+    for image, source in ((read_image(large_jpeg), large_jpeg), (decode_image(data), data)):
+        assert image.shape == (HEIGHT, WIDTH, 3)
+        assert image_io.decode_info(source, image) == {'original_width': WIDTH, 'original_height': HEIGHT,
+                                                       'decode_scale': 1.0}
+
+
+def test_reduced_decode_reports_original_size(large_jpeg, monkeypatch):
+    monkeypatch.setattr(image_io, "DECODE_MAX_SIDE", 200)
+    with open(large_jpeg, "rb") as f:
+        data = f.read()
+    expected = {'original_width': WIDTH, 'original_height': HEIGHT, 'decode_scale': 0.5}
+    for image, source in ((read_image(large_jpeg), large_jpeg), (decode_image(memoryview(data)), data)):
+        assert image.shape == (HEIGHT // 2, WIDTH // 2, 3)
+        assert image_io.decode_info(source, image) == expected
+    # Dizi girdisi çözülmediğinden küçültülmüş sayılmaz
+    assert image_io.decode_info(image, image)['decode_scale'] == 1.0
+
+    # Toplu işlemenin çözme aşaması bilgiyi kayda taşır
+    job = batch_processing._decode({'image': large_jpeg})
+    record = batch_processing.serialize_objects(large_jpeg, job['array'].shape, [], job['decode_info'])
+    assert (record['width'], record['height']) == (WIDTH // 2, HEIGHT // 2)
+    assert (record['original_width'], record['original_height'], record['decode_scale']) == (WIDTH, HEIGHT, 0.5)
+
+
+def test_serialized_record_defaults_to_unscaled():
+    record = batch_processing.serialize_objects("a.jpg", (HEIGHT, WIDTH, 3), [])
+    assert (record['original_width'], record['original_height'], record['decode_scale']) == (WIDTH, HEIGHT, 1.0)
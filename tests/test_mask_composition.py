@@ -0,0 +1,114 @@
+# tests/test_mask_composition.py
+"""Yeniden tasarım maskesi (mask_composition.py): bbox içi birleştirme/dilasyon ve etiket indeksi eşdeğerliği."""
+import cv2
+import numpy as np
+import pytest
+
+import generator
+from benchmarks.mask_composition import legacy_compose, synthetic_scene
+from compact_mask import CompactMask
+from mask_composition import LabelIndex, compose_mask, dilate_mask, dilation_kernel, union_into
+
+HEIGHT, WIDTH = 240, 320
+
+
+def _edge_masks():
+    """Görüntü köşelerine ve kenarlarına değen maskeler (dilasyonun sınırda kırpılması için)."""
+    masks = []
+    for x0, y0, x1, y1 in ((0, 0, 40, 30), (WIDTH - 50, HEIGHT - 20, WIDTH, HEIGHT), (100, 0, 180, 12)):
+        dense = np.zeros((HEIGHT, WIDTH), dtype=bool)
+        dense[y0:y1, x0:x1] = True
+        masks.append(CompactMask.from_dense(dense))
+    return masks
+
+
+@pytest.fixture(scope="module")
+def scene():
+    return synthetic_scene(HEIGHT, WIDTH, 40, seed=3)
+
+
+def test_union_matches_full_frame_logical_or(scene):
+    masks = [obj['mask'] for obj in scene] + _edge_masks()
+    expected = np.zeros((HEIGHT, WIDTH), dtype=bool)
+    for mask in masks:
+        expected = np.logical_or(expected, np.asarray(mask))
+
+    buffer = union_into(np.zeros((HEIGHT, WIDTH), dtype=np.uint8), masks)
+    assert buffer.dtype == np.uint8 and set(np.unique(buffer)) <= {0, 1}
+    assert np.array_equal(buffer.astype(bool), expected)
+
+    # Yeniden kullanılan tampon önce sıfırlanır
+    reused = np.ones((HEIGHT, WIDTH), dtype=np.uint8)
+    assert np.array_equal(compose_mask((HEIGHT, WIDTH), masks, buffer=reused), buffer)
+
+
+@pytest.mark.parametrize("size", [1, 3, 15, 31])
+def test_dilation_matches_full_frame_cv2_dilate(scene, size):
+    for mask in [obj['mask'] for obj in scene[:10]] + _edge_masks():
+        dense = np.asarray(mask).astype(np.uint8)
+        expected = cv2.dilate(dense, np.ones((size, size), np.uint8), iterations=1).astype(bool)
+        assert np.array_equal(np.asarray(dilate_mask(mask, size)), expected)
+
+
+def test_compose_matches_legacy_full_frame_path(scene):
+    objects = scene + [{'mask': mask, 'bbox': mask.bbox, 'area': mask.area, 'label': label}
+                       for mask, label in zip(_edge_masks(), ('duvar', 'koltuk', 'zemin'))]
+    for prompt, wall, floor in (("beyaz duvar", True, False), ("ahşap zemin", False, True),
+                                ("modern koltuk", False, False)):
+        expected = legacy_compose((HEIGHT, WIDTH), objects, wall, floor, generator.MASK_DILATION_SIZE)
+        combined, _ = generator.redesign_mask((HEIGHT, WIDTH, 3), objects, prompt)
+        assert np.array_equal(combined, expected), prompt
+
+
+def _linear_indices(objects, labels):
+    """Eski yol: listeyi baştan tarayıp alana göre (eşitlikte liste sırası) sıralar."""
+    matches = [(obj['area'], i) for i, obj in enumerate(objects) if obj['label'] in labels]
+    matches.sort(key=lambda item: item[0], reverse=True)
+    return [i for _, i in matches]
+
+
+def _linear_first_accepted(objects, candidate_labels, accepted_labels, count=3):
+    for i in _linear_indices(objects, candidate_labels)[:count]:
+        if objects[i]['label'] in accepted_labels:
+            return i
+    return None
+
+
+def test_label_index_matches_linear_scan(scene):
+    # Eşit alanlı nesneler: sıralama eşitlikte liste sırasını korumalı
+    objects = [dict(obj) for obj in scene]
+    for obj in objects[::4]:
+        obj['area'] = 5000
+    index = LabelIndex(objects)
+    labels = sorted({obj['label'] for obj in objects})
+
+    for label in labels + ['olmayan']:
+        assert index.indices([label]) == _linear_indices(objects, {label})
+    assert index.indices(generator.CHANGEABLE_OBJECTS) == _linear_indices(objects, set(generator.CHANGEABLE_OBJECTS))
+    assert index.largest(labels, 5) == _linear_indices(objects, set(labels))[:5]
+
+    candidates = generator.structural_candidate_labels()
+    for accepted in ({'duvar'}, {'zemin'}, {'duvar', 'zemin'}, set(generator.UNRELIABLE_LABELS) | {'duvar'}, set()):
+        assert index.first_accepted(candidates, accepted) == _linear_first_accepted(objects, candidates, accepted)
+
+
+def test_structural_masks_without_area_key(scene):
+    # get_segmentation_masks'in eski çıktıları ve elle oluşturulan nesnelerde 'area' yoktur
+    objects = [{k: v for k, v in obj.items() if k != 'area'} for obj in scene]
+    candidates = generator.find_largest_structural_mask(objects)
+
+    structural = generator.structural_candidate_labels()
+    expected = sorted((obj['mask'].area for obj in objects if obj['label'] in structural), reverse=True)[:3]
+    assert candidates
+    assert [area for area, _, _ in candidates] == expected
+    for area, mask, obj in candidates:
+        assert mask is obj['mask'] and area == mask.area
+
+    combined, _ = generator.redesign_mask((HEIGHT, WIDTH, 3), objects, "beyaz duvar")
+    assert combined.shape == (HEIGHT, WIDTH) and combined.any()
+
+
+def test_dilation_kernel_is_cached_and_read_only():
+    kernel = dilation_kernel(15)
+    assert kernel is dilation_kernel(15)
+    assert kernel.shape == (15, 15) and not kernel.flags.writeable
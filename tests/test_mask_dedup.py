@@ -0,0 +1,118 @@
+# tests/test_mask_dedup.py
+"""Maske tekilleştirme (mask_dedup.py): iç içe/yinelenen çiftler, merge, bütçe sırası ve varsayılanlar."""
+import numpy as np
+import pytest
+
+import mask_dedup
+from compact_mask import CompactMask, LazyUpsampledMask
+
+HEIGHT, WIDTH = 120, 160
+
+SOFA = (10, 20, 90, 80)
+HALF_SOFA = (10, 20, 58, 80)      # koltuğun %60'ı: koltuğun parçası sayılır
+CUSHION = (30, 30, 45, 40)        # koltuktaki yastık: ayrı nesne
+SOFA_SHIFTED = (11, 20, 91, 80)   # koltukla neredeyse aynı
+
+
+def _mask(box, shape=(HEIGHT, WIDTH)):
+    x0, y0, x1, y1 = box
+    dense = np.zeros(shape, dtype=bool)
+    dense[y0:y1, x0:x1] = True
+    return CompactMask.from_dense(dense)
+
+
+def _object(box, predicted_iou=None):
+    mask = _mask(box)
+    obj = {'mask': mask, 'bbox': mask.bbox, 'area': mask.area}
+    if predicted_iou is not None:
+        obj['predicted_iou'] = predicted_iou
+    return obj
+
+
+def _lazy_object(box, predicted_iou):
+    """Yarı çözünürlükte üretilmiş, tam çözünürlüğe tembel büyütülen maske."""
+    low_res = _mask(box, (HEIGHT // 2, WIDTH // 2))
+    full = LazyUpsampledMask(low_res, (HEIGHT, WIDTH))
+    # bbox ve alan okunduktan sonra tam çözünürlüğü henüz oluşmamış yeni bir tembel maske verilir
+    return {'mask': LazyUpsampledMask(low_res, (HEIGHT, WIDTH)), 'bbox': full.bbox, 'area': full.area,
+            'predicted_iou': predicted_iou}
+
+
+@pytest.fixture
+def fresh_totals(monkeypatch):
+    monkeypatch.setattr(mask_dedup, "_totals", dict.fromkeys(mask_dedup._totals, 0))
+
+
+def test_nested_half_is_paired_and_small_inner_object_is_not():
+    masks = [_mask(SOFA), _mask(HALF_SOFA), _mask(CUSHION)]
+    assert mask_dedup.redundant_pairs(masks) == {(0, 1): "nested"}
+    assert mask_dedup.redundant_pairs([_mask(SOFA), _mask(SOFA_SHIFTED)]) == {(0, 1): "duplicate"}
+
+
+def test_suppress_keeps_sofa_and_cushion():
+    objects = [_object(SOFA), _object(HALF_SOFA), _object(CUSHION), _object(SOFA_SHIFTED)]
+    stats = {}
+    kept = mask_dedup.deduplicate_objects(objects, policy="suppress", max_masks=None, stats=stats)
+    assert kept == [objects[0], objects[2]]
+    assert (stats['duplicate'], stats['nested'], stats['budget'], stats['saved']) == (1, 1, 0, 2)
+
+
+def test_merge_updates_mask_bbox_and_area():
+    objects = [_object(SOFA, 0.9), _object(SOFA_SHIFTED, 0.95), _object(CUSHION)]
+    kept = mask_dedup.deduplicate_objects(objects, policy="merge", max_masks=None)
+    # Puanı yüksek olan (aynı alan, yüksek predicted_iou) tutulur ve diğerini içine alır
+    assert kept == [objects[1], objects[2]]
+    union = np.asarray(_mask(SOFA)) | np.asarray(_mask(SOFA_SHIFTED))
+    keeper = objects[1]
+    assert np.array_equal(np.asarray(keeper['mask']), union)
+    assert keeper['bbox'] == [10, 20, 81, 60]
+    assert keeper['area'] == int(union.sum())
+
+
+def test_merge_lazy_masks_at_low_resolution():
+    objects = [_lazy_object((5, 10, 45, 40), 0.9), _lazy_object((6, 10, 46, 40), 0.95)]
+    area_before = objects[1]['area']
+    kept = mask_dedup.deduplicate_objects(objects, policy="merge", max_masks=None)
+
+    assert kept == [objects[1]]
+    keeper = objects[1]
+    assert isinstance(keeper['mask'], LazyUpsampledMask) and not keeper['mask'].is_materialized
+    low_union = np.asarray(_mask((5, 10, 45, 40), (60, 80))) | np.asarray(_mask((6, 10, 46, 40), (60, 80)))
+    assert np.array_equal(np.asarray(keeper['mask'].low_res), low_union)
+    assert keeper['bbox'] == [10, 20, 82, 60]
+    assert keeper['area'] == round(area_before * 41 / 40)
+
+
+def test_budget_ranks_by_predicted_iou_times_area():
+    # Alanlar 400 > 300 > 200 > 100; puanlar 160, 300, 180, 100
+    objects = [_object((0, 0, 20, 20), 0.4), _object((30, 0, 45, 20), 1.0), _object((60, 0, 70, 20), 0.9),
+               _object((90, 0, 95, 20), 1.0)]
+    stats = {}
+    kept = mask_dedup.deduplicate_objects(objects, policy="off", max_masks=2, stats=stats)
+    assert kept == [objects[1], objects[2]]
+    assert stats['budget'] == 2
+
+
+def test_defaults_are_lossless_and_none_means_unlimited(monkeypatch, fresh_totals, capsys):
+    objects = [_object(SOFA), _object(HALF_SOFA), _object(CUSHION), _object(SOFA_SHIFTED)]
+    assert mask_dedup.DEDUP_POLICY == "off" and mask_dedup.DEDUP_MAX_MASKS is None
+    assert mask_dedup.deduplicate_objects(objects) == objects
+
+    monkeypatch.setattr(mask_dedup, "DEDUP_MAX_MASKS", 2)
+    assert len(mask_dedup.deduplicate_objects(objects)) == 2
+    assert mask_dedup.deduplicate_objects(objects, max_masks=None) == objects
+    # Sayılar stdout'a değil dedup_stats'a yazılır
+    assert capsys.readouterr().out == ""
+    totals = mask_dedup.dedup_stats()
+    assert (totals['images'], totals['input'], totals['kept'], totals['budget'], totals['saved']) == (3, 12, 10, 2, 2)
+
+
+def test_set_dedup_policy(monkeypatch):
+    monkeypatch.setattr(mask_dedup, "DEDUP_POLICY", mask_dedup.DEDUP_POLICY)
+    monkeypatch.setattr(mask_dedup, "DEDUP_MAX_MASKS", mask_dedup.DEDUP_MAX_MASKS)
+    mask_dedup.set_dedup_policy("suppress", 64)
+    assert mask_dedup.dedup_stats()['policy'] == "suppress" and mask_dedup.DEDUP_MAX_MASKS == 64
+    mask_dedup.set_dedup_policy("merge", 0)
+    assert mask_dedup.DEDUP_MAX_MASKS is None
+    with pytest.raises(ValueError):
+        mask_dedup.set_dedup_policy("yok")
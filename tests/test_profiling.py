@@ -0,0 +1,93 @@
+# tests/test_profiling.py
+"""Aşama ölçümü (profiling.py): iç içe aşamalarda CUDA tepe belleği."""
+import threading
+
+import pytest
+
+import profiling
+
+MB = 2 ** 20
+
+
+class FakeCuda:
+    """torch.cuda'nın tepe bellek sayacını taklit eder (cihaz genelinde tek sayaç)."""
+
+    def __init__(self):
+        self.allocated = self.peak = 0
+
+    def alloc(self, mb):
+        self.allocated += mb * MB
+        self.peak = max(self.peak, self.allocated)
+
+    def free(self, mb):
+        self.allocated -= mb * MB
+
+    def reset_peak_memory_stats(self):
+        self.peak = self.allocated
+
+    def max_memory_allocated(self):
+        return self.peak
+
+
+@pytest.fixture
+def cuda(monkeypatch):
+    fake = FakeCuda()
+    monkeypatch.setattr(profiling, "_cuda", lambda: fake)
+    profiling.reset()
+    profiling.enable()
+    yield fake
+    profiling.disable()
+    profiling.reset()
+
+
+def _cuda_peaks(image):
+    trace = next(t for t in profiling.traces() if t['image'] == image)
+    return {name: entry['cuda_peak_mb'] for name, entry in trace['stages'].items()}
+
+
+def test_inner_stage_does_not_hide_outer_peak(cuda):
+    with profiling.image_scope("a"):
+        with profiling.stage("classify"):
+            cuda.alloc(100)
+            cuda.free(100)
+            with profiling.stage("vit_batch"):
+                cuda.alloc(30)
+                cuda.free(30)
+    assert _cuda_peaks("a") == {'classify': 100, 'vit_batch': 30}
+
+
+def test_outer_peak_includes_inner_peak(cuda):
+    cuda.alloc(10)  # aşamalardan önce ayrılmış bellek
+    with profiling.image_scope("b"):
+        with profiling.stage("segment"):
+            cuda.alloc(20)
+            with profiling.stage("dedup_grid"):
+                cuda.alloc(50)
+                cuda.free(50)
+            with profiling.stage("dedup_verify"):
+                cuda.alloc(5)
+                cuda.free(5)
+            cuda.free(20)
+    assert _cuda_peaks("b") == {'segment': 80, 'dedup_grid': 80, 'dedup_verify': 35}
+    assert not profiling._open_cuda_stages
+
+
+def test_stage_in_another_thread_keeps_peak(cuda):
+    entered, release = threading.Event(), threading.Event()
+
+    def other():
+        with profiling.image_scope("diğer"), profiling.stage("vit_batch"):
+            entered.set()
+            release.wait(10)
+
+    with profiling.image_scope("c"):
+        with profiling.stage("segment"):
+            cuda.alloc(60)
+            cuda.free(60)
+            thread = threading.Thread(target=other)
+            thread.start()
+            assert entered.wait(10)
+            release.set()
+            thread.join()
+    assert _cuda_peaks("c") == {'segment': 60}
+    assert _cuda_peaks("diğer") == {'vit_batch': 0}
@@ -0,0 +1,186 @@
+# tests/test_server.py
+"""HTTP servisi (server.py): parametre doğrulama, gövde sınırı, geri basınç (503) ve /health, /metrics."""
+import contextlib
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import classifier
+import image_io
+import server
+from vit_batcher import DynamicBatcher
+
+
+def _request(url, body=None):
+    """(durum kodu, başlıklar, gövde) döndürür; HTTP hataları da sonuç olarak döner."""
+    req = urllib.request.Request(url, data=body, method="POST" if body is not None else "GET")
+    try:
+        with urllib.request.urlopen(req, timeout=120) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+@contextlib.contextmanager
+def _serving(service):
+    """Servisi boş bir portta arka plan thread'inde sunar; taban URL'yi verir."""
+    httpd = server.make_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
+
+
+@pytest.fixture
+def make_service(stub_models):
+    """InferenceService oluşturur; test sonunda batch'leyici kapatılır ve genel ayar geri alınır."""
+    batchers = []
+
+    def make(batcher=None, **kwargs):
+        if batcher is not None:
+            batchers.append(batcher)
+        return server.InferenceService(batcher, **kwargs)
+
+    yield make
+    classifier.set_vit_batcher(None)
+    for batcher in batchers:
+        batcher.close()
+
+
+def test_unknown_or_invalid_params_return_400(make_service, room_jpeg):
+    with _serving(make_service()) as url:
+        status, _, body = _request(f"{url}/segment?bilinmeyen=1", room_jpeg)
+        assert status == 400
+        assert "bilinmeyen" in json.loads(body)['error']
+        assert _request(f"{url}/segment?points_per_side=abc", room_jpeg)[0] == 400
+        for steps in ("abc", "0", "-3"):
+            assert _request(f"{url}/redesign?prompt=modern&steps={steps}", room_jpeg)[0] == 400
+        assert _request(f"{url}/redesign?prompt=modern&profile=yok", room_jpeg)[0] == 400
+        assert _request(f"{url}/redesign?steps=5", room_jpeg)[0] == 400
+
+
+def test_rejected_request_does_not_poison_keep_alive_connection(make_service, room_jpeg):
+    # Sorgu gövde okunmadan reddedilir; gövde bağlantıda kalırsa sonraki istek 501 alır
+    with _serving(make_service()) as url:
+        host, port = url.rsplit("/", 1)[-1].split(":")
+        conn = http.client.HTTPConnection(host, int(port), timeout=120)
+        try:
+            for path in ("/segment?bilinmeyen=1", "/segment?render=gif", "/redesign?steps=3"):
+                conn.request("POST", path, body=b"\xff" * 5000)
+                response = conn.getresponse()
+                response.read()
+                assert response.status == 400
+                assert response.getheader("Connection") == "close"
+
+                conn.request("GET", "/health")
+                response = conn.getresponse()
+                assert response.status == 200
+                assert 'status' in json.loads(response.read())
+
+            # Gövdesi okunan istekte bağlantı açık kalır
+            conn.request("POST", "/segment?points_per_side=4&masks=0", body=room_jpeg)
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 200 and response.getheader("Connection") is None
+            sock = conn.sock
+            conn.request("GET", "/health")
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 200 and conn.sock is sock
+        finally:
+            conn.close()
+
+
+def test_oversized_body_returns_413(make_service, monkeypatch):
+    monkeypatch.setattr(server, "MAX_BODY_BYTES", 64)
+    with _serving(make_service()) as url:
+        assert _request(f"{url}/segment", b"\xff" * 1024)[0] == 413
+
+
+def test_exhausted_inflight_slots_return_503(make_service, room_jpeg, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_segmentation(image, sam_model, **kwargs):
+        started.set()
+        release.wait(60)
+        return []
+
+    monkeypatch.setattr(server, "get_segmentation_masks", blocking_segmentation)
+    service = make_service(max_inflight=1)
+    with _serving(service) as url:
+        first = {}
+        thread = threading.Thread(target=lambda: first.update(status=_request(f"{url}/segment", room_jpeg)[0]))
+        thread.start()
+        assert started.wait(60)
+        try:
+            status, headers, _ = _request(f"{url}/segment", room_jpeg)
+            assert status == 503
+            assert headers["Retry-After"] == str(server.RETRY_AFTER_SECONDS)
+        finally:
+            release.set()
+            thread.join()
+        assert first['status'] == 200
+        assert service.metrics['segment'].snapshot()['rejected'] == 1
+
+
+def test_full_vit_queue_returns_503(make_service, room_jpeg):
+    # Tek istekteki kırpıntılar kuyruk derinliğini aşar: DynamicBatcher QueueFullError fırlatır
+    batcher = DynamicBatcher(classifier.vit_forward, max_queue_depth=1)
+    with _serving(make_service(batcher)) as url:
+        status, headers, body = _request(f"{url}/segment?points_per_side=4", room_jpeg)
+        assert status == 503, body
+        assert "Retry-After" in headers
+    assert batcher.stats()['rejected'] >= 1
+
+
+def test_health_and_metrics_shape(make_service, room_jpeg):
+    service = make_service(DynamicBatcher(classifier.vit_forward))
+    assert service.warmup()
+    with _serving(service) as url:
+        status, _, body = _request(f"{url}/segment?points_per_side=4&masks=0", room_jpeg)
+        assert status == 200
+        record = json.loads(body)
+        assert (record['width'], record['height']) == (256, 192)
+        assert record['objects'] and all('mask_rle' not in obj for obj in record['objects'])
+
+        status, _, body = _request(f"{url}/health")
+        assert status == 200
+        health = json.loads(body)
+        assert health['status'] == "ok"
+        assert health['models']['sam'] and health['models']['vit']
+        assert set(health['profiles']) == {'sam', 'vit'}
+        assert health['uptime_s'] >= 0
+
+        status, _, body = _request(f"{url}/metrics")
+        assert status == 200
+        metrics = json.loads(body)
+        assert metrics['inflight'] == 0
+        assert set(metrics['endpoints']) == {'segment', 'redesign', 'health', 'metrics'}
+        segment = metrics['endpoints']['segment']
+        assert segment['requests'] == 1 and segment['errors'] == 0 and 'p50_ms' in segment
+        assert metrics['vit_batcher']['crops'] > 0
+        assert 'embedding_cache' in metrics
+        assert metrics['dedup']['policy'] == "off" and metrics['dedup']['images'] >= 1
+
+
+def test_segment_json_reports_decode_scale(make_service, room_jpeg, monkeypatch):
+    # 256x192 JPEG, uzun kenar sınırı 100: 1/2 ölçekte (128x96) çözülür
+    monkeypatch.setattr(image_io, "DECODE_MAX_SIDE", 100)
+    with _serving(make_service()) as url:
+        status, _, body = _request(f"{url}/segment?points_per_side=4", room_jpeg)
+    assert status == 200
+    record = json.loads(body)
+    assert (record['width'], record['height']) == (128, 96)
+    assert (record['original_width'], record['original_height'], record['decode_scale']) == (256, 192, 0.5)
+    assert record['objects']
+    for obj in record['objects']:
+        x, y, w, h = obj['bbox']  # SAM biçimi: x, y, genişlik, yükseklik
+        assert 0 <= x and x + w <= record['width'] and 0 <= y and y + h <= record['height']
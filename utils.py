@@ -1,7 +1,13 @@
 # utils.py
-import cv2
 import numpy as np
-import matplotlib.pyplot as plt
+from compact_mask import CompactMask, LazyUpsampledMask
+from result_store import StoredMask
+from renderer import render_overlay, write_image
+from image_io import read_file, decode_bytes
+
+
+# Ekransız ortamda display_results çıktısının yazılacağı dosya
+DEFAULT_RENDER_PATH = "segmentasyon_sonucu.png"
 
 
 def show_mask(mask, ax, color=None, random_color=False):
@@ -11,39 +17,59 @@ def show_mask(mask, ax, color=None, random_color=False):
     elif color is None:
         color = np.array([30 / 255, 144 / 255, 255 / 255, 0.6])
 
+    if isinstance(mask, (CompactMask, LazyUpsampledMask, StoredMask)):
+        # Yalnızca bbox bölgesi için RGBA katman oluşturulur ve extent ile yerine yerleştirilir
+        if mask.area == 0:
+            return
+        x, y, w, h = mask.bbox
+        mask_image = mask.crop().reshape(h, w, 1) * color.reshape(1, 1, -1)
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+        ax.imshow(mask_image, extent=(x - 0.5, x + w - 0.5, y + h - 0.5, y - 0.5))
+        # Küçük katman eksen sınırlarını daraltmasın
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        return
+
     h, w = mask.shape[-2:]
     mask_image = mask.reshape(h, w, 1) * color.reshape(1, 1, -1)
     ax.imshow(mask_image)
 
 
-def read_image(image_path):
-    """Görüntüyü OpenCV ile okur ve RGB formatına dönüştürür."""
-    image = cv2.imread(image_path)
-    if image is None:
-        raise FileNotFoundError(f"Görüntü bulunamadı: {image_path}")
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    return image
+def read_image(image_path, max_side=None):
+    """
+    Görüntüyü RGB formatında okur (image_io.read_file): dosya belleğe eşlenir, EXIF yönü uygulanır;
+    max_side / DECODE_MAX_SIDE verilirse büyük JPEG'ler doğrudan küçültülerek çözülür.
+    """
+    return read_file(image_path, max_side)
 
 
-def display_results(image, classified_objects, title="Tespit Edilen Nesneler ve Etiketler"):
-    """Görüntüyü, üzerindeki maskeleri ve etiketleri gösterir."""
-    plt.figure(figsize=(10, 10))
-    plt.imshow(image)
-    ax = plt.gca()
+def decode_image(data, max_side=None):
+    """Bellekteki kodlanmış görüntüyü (bytes, memoryview, mmap) kopyalamadan RGB diziye çözer."""
+    return decode_bytes(data, max_side)
 
-    if classified_objects:
-        for obj in classified_objects:
-            mask = obj['mask']
-            label = obj['label']
-            x, y, w, h = obj['bbox']
 
-            show_mask(mask, ax, random_color=True)
+def display_results(image, classified_objects, title="Tespit Edilen Nesneler ve Etiketler", output_path=None):
+    """
+    Görüntüyü, üzerindeki maskeleri ve etiketleri çizer (renderer.render_overlay). output_path
+    verilirse (png/jpg/webp) sonuç dosyaya yazılır ve pencere açılmaz; aksi halde tek bir görüntü
+    olarak matplotlib penceresinde gösterilir. Ekransız ortamda (Agg) pencere yerine
+    DEFAULT_RENDER_PATH dosyasına yazılır.
+    """
+    canvas = render_overlay(image, classified_objects, title=title)
 
-            # Etiketi (label) sınırlayıcı kutunun üstüne yaz
-            ax.text(int(x), int(y) - 10, label,
-                    color='white', fontsize=12, weight='bold',
-                    bbox=dict(facecolor='black', alpha=0.5, edgecolor='none', pad=2))
+    if output_path is None:
+        # matplotlib yalnızca pencere gerçekten gerektiğinde import edilir
+        import matplotlib
+        if matplotlib.get_backend().lower() == "agg":
+            output_path = DEFAULT_RENDER_PATH
+    if output_path is not None:
+        write_image(output_path, canvas)
+        print(f"Sonuç görseli kaydedildi: {output_path}")
+        return canvas
 
-    plt.title(title)
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 10))
+    plt.imshow(canvas)
     plt.axis('off')
-    plt.show()
\ No newline at end of file
+    plt.show()
+    return canvas
@@ -0,0 +1,362 @@
+# video_segmentation.py
+import glob
+import os
+from collections import Counter
+
+import cv2
+import numpy as np
+
+import profiling
+from mask_composition import bbox_iou_matrix, mask_iou
+from model_loader import generate_masks, prepare_objects, classify_objects
+from mask_dedup import deduplicate_objects
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Karenin son anahtar kareye algısal farkı bu eşiğin altındaysa kare atlanır (0-1, gri küçük resim
+# üzerinde ortalama mutlak fark)
+KEYFRAME_DIFF_THRESHOLD = 0.04
+
+# Fark eşiği aşılmasa da en geç bu kadar karede bir anahtar kare işlenir (0: sınır yok)
+MAX_KEYFRAME_INTERVAL = 30
+
+# Algısal fark için küçük resim kenarı (piksel)
+SIGNATURE_SIZE = 32
+
+# Anahtar kareler arası kamera kaymasının (faz korelasyonu) hesaplandığı görüntünün uzun kenarı;
+# korelasyon yanıtı MOTION_MIN_RESPONSE altındaysa kayma sıfır kabul edilir
+MOTION_SIZE = 160
+MOTION_MIN_RESPONSE = 0.1
+
+# Bir tespitin mevcut bir izle eşleşmesi için gereken en düşük bbox IoU
+TRACK_IOU_THRESHOLD = 0.3
+
+# Eşleşen tespitin maskesi, izin son sınıflandırılan maskesine göre bu IoU'nun altına düşerse
+# yeniden sınıflandırılır; üstündeyse izin etiketi kullanılır
+RECLASSIFY_MASK_IOU = 0.7
+
+# Bu kadar anahtar karede eşleşmeyen iz kapatılır
+TRACK_MAX_MISSED = 3
+
+UNCLASSIFIED_LABEL = "Sınıflandırılamadı"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+# --------------------------------------------------------------------------
+# KARE OKUMA VE ANAHTAR KARE SEÇİMİ
+# --------------------------------------------------------------------------
+
+def _image_sequence(source):
+    """Klasör ya da glob deseninden sıralı görüntü yolları; video/kamera kaynağıysa None."""
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if name.lower().endswith(IMAGE_EXTENSIONS))
+    if glob.has_magic(source):
+        return sorted(path for path in glob.glob(source) if path.lower().endswith(IMAGE_EXTENSIONS))
+    return None
+
+
+def read_frames(source, stride=1, max_frames=None):
+    """
+    (kare no, zaman s, RGB kare) üçlüleri üreten generator. source: video dosyası, kamera indeksi
+    ya da görüntü klasörü/glob deseni (görüntü dizilerinde zaman None'dır). stride'a göre atlanan
+    video kareleri çözülmez (cv2.VideoCapture.grab).
+    """
+    from utils import read_image
+
+    sequence = _image_sequence(source) if isinstance(source, str) else None
+    if sequence is not None:
+        for count, index in enumerate(range(0, len(sequence), stride)):
+            if max_frames is not None and count >= max_frames:
+                return
+            with profiling.stage("frame_read"):
+                frame = read_image(sequence[index])
+            yield index, None, frame
+        return
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise FileNotFoundError(f"Video açılamadı: {source}")
+    try:
+        index = 0
+        count = 0
+        while max_frames is None or count < max_frames:
+            with profiling.stage("frame_read"):
+                if index % stride and capture.grab():
+                    index += 1
+                    continue
+                ok, frame = capture.read()
+            if not ok:
+                return
+            timestamp = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            # Her kare yeni bir dizi olduğundan RGB dönüşümü aynı tamponda yapılır
+            yield index, timestamp, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+            index += 1
+            count += 1
+    finally:
+        capture.release()
+
+
+def frame_signature(frame, size=SIGNATURE_SIZE):
+    """Algısal karşılaştırma için gri, size×size, [0, 1] aralığında küçük resim."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32) / 255
+
+
+def frame_difference(signature_a, signature_b):
+    """İki küçük resim arasındaki ortalama mutlak fark (0: aynı, 1: tamamen farklı)."""
+    return float(np.abs(signature_a - signature_b).mean())
+
+
+def motion_frame(frame, size=MOTION_SIZE):
+    """Kayma tahmini için uzun kenarı size olan gri float32 kare ve ölçek (tam / küçük)."""
+    H, W = frame.shape[:2]
+    scale = max(H, W) / size
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (max(int(round(W / scale)), 1), max(int(round(H / scale)), 1)),
+                       interpolation=cv2.INTER_AREA)
+    return small.astype(np.float32), scale
+
+
+def estimate_motion(previous, current):
+    """
+    İki motion_frame arasındaki genel kaymayı (dx, dy) tam çözünürlük pikselinde tahmin eder:
+    önceki karedeki bir nokta güncel karede (x + dx, y + dy) konumundadır.
+    """
+    (prev_small, scale), (cur_small, _) = previous, current
+    if prev_small.shape != cur_small.shape:
+        return 0.0, 0.0
+    window = cv2.createHanningWindow(prev_small.shape[::-1], cv2.CV_32F)
+    (dx, dy), response = cv2.phaseCorrelate(prev_small, cur_small, window)
+    if response < MOTION_MIN_RESPONSE:
+        return 0.0, 0.0
+    return dx * scale, dy * scale
+
+
+# --------------------------------------------------------------------------
+# İZLER
+# --------------------------------------------------------------------------
+
+class Track:
+    """Kareler boyunca izlenen tek nesne; etiket, sınıflandırmaların çoğunluk oyuyla belirlenir."""
+
+    def __init__(self, track_id, obj, frame_index):
+        self.track_id = track_id
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+        self.missed = 0
+        self.votes = Counter()
+        self.history = []
+        self.classified_mask = None
+        self.classified_position = (0.0, 0.0)
+        self.update(obj, frame_index)
+
+    def update(self, obj, frame_index):
+        self.mask = obj['mask']
+        self.bbox = [int(v) for v in obj['bbox']]
+        self.area = obj['area']
+        self.last_frame = frame_index
+        self.missed = 0
+        self.history.append((frame_index, self.bbox))
+
+    def add_label(self, label, camera_position):
+        """Yeni bir sınıflandırma sonucunu oy olarak ekler; maskeyi ve kamera konumunu saklar."""
+        self.votes[label] += 1
+        self.classified_mask = self.mask
+        self.classified_position = camera_position
+
+    @property
+    def label(self):
+        """Kararlı etiket: en çok oy alan; 'Sınıflandırılamadı' yalnızca başka etiket yoksa seçilir."""
+        if not self.votes:
+            return UNCLASSIFIED_LABEL
+        # Oy eşitliğinde ilk eklenen etiket seçilir (max ilk en büyüğü döndürür)
+        return max(self.votes, key=lambda label: (label != UNCLASSIFIED_LABEL, self.votes[label]))
+
+    def to_record(self):
+        return {
+            'track_id': self.track_id,
+            'label': self.label,
+            'votes': dict(self.votes),
+            'first_frame': self.first_frame,
+            'last_frame': self.last_frame,
+            'bbox': self.bbox,
+            'area': self.area,
+            'history': [{'frame': frame, 'bbox': bbox} for frame, bbox in self.history],
+        }
+
+
+# --------------------------------------------------------------------------
+# VİDEO SEGMENTASYONU
+# --------------------------------------------------------------------------
+
+class VideoSegmenter:
+    """
+    Kare dizisini zamansal yeniden kullanımla işler: algısal olarak öncekine yakın kareler atlanır;
+    anahtar karelerde SAM maskeleri bbox IoU ile izlere eşlenir ve yalnızca yeni ya da maskesi
+    belirgin değişen nesneler ViT ile sınıflandırılır. Diğer nesneler izin etiketini taşır.
+    Anahtar kareler arasındaki kamera kayması eşleştirmede ve maske karşılaştırmasında telafi edilir.
+    """
+
+    def __init__(self, sam_model, max_side=None, diff_threshold=KEYFRAME_DIFF_THRESHOLD,
+                 max_interval=MAX_KEYFRAME_INTERVAL, iou_threshold=TRACK_IOU_THRESHOLD,
+                 reclassify_iou=RECLASSIFY_MASK_IOU, max_missed=TRACK_MAX_MISSED, **sam_overrides):
+        self.sam_model = sam_model
+        self.max_side = max_side
+        self.sam_overrides = sam_overrides
+        self.diff_threshold = diff_threshold
+        self.max_interval = max_interval
+        self.iou_threshold = iou_threshold
+        self.reclassify_iou = reclassify_iou
+        self.max_missed = max_missed
+
+        self.active = []
+        self.finished = []
+        self._next_id = 1
+        self._last_signature = None
+        self._last_keyframe = None
+        self._last_motion_frame = None
+        # İlk anahtar kareye göre toplam kamera kayması (dx, dy)
+        self.camera_position = (0.0, 0.0)
+        self.stats = Counter()
+
+    def is_keyframe(self, frame_index, frame):
+        """Kare son anahtar kareden algısal olarak yeterince farklıysa (ya da aralık dolduysa) True."""
+        with profiling.stage("keyframe_test"):
+            signature = frame_signature(frame)
+            if self._last_signature is not None:
+                interval_due = self.max_interval and frame_index - self._last_keyframe >= self.max_interval
+                if not interval_due and frame_difference(signature, self._last_signature) < self.diff_threshold:
+                    return False
+            self._last_signature = signature
+            self._last_keyframe = frame_index
+            return True
+
+    def _update_motion(self, frame):
+        """Son anahtar kareden bu yana kamera kaymasını tahmin eder; (dx, dy) döndürür."""
+        current = motion_frame(frame)
+        motion = (0.0, 0.0)
+        if self._last_motion_frame is not None:
+            motion = estimate_motion(self._last_motion_frame, current)
+        self._last_motion_frame = current
+        self.camera_position = (self.camera_position[0] + motion[0], self.camera_position[1] + motion[1])
+        return motion
+
+    def _match(self, objects, motion):
+        """
+        Tespitleri izlere açgözlü (en yüksek IoU önce) eşler; iz kutuları önce kamera kaymasıyla
+        ötelenir. {tespit sırası: iz} döndürür.
+        """
+        if not self.active or not objects:
+            return {}
+        track_boxes = np.array([track.bbox for track in self.active], dtype=np.float64)
+        track_boxes[:, :2] += motion
+        ious = bbox_iou_matrix(track_boxes, [obj['bbox'] for obj in objects])
+        matches = {}
+        used_tracks = set()
+        for flat in np.argsort(-ious, axis=None, kind="stable"):
+            t, d = np.unravel_index(flat, ious.shape)
+            if ious[t, d] < self.iou_threshold:
+                break
+            if t in used_tracks or d in matches:
+                continue
+            used_tracks.add(t)
+            matches[d] = self.active[t]
+        return matches
+
+    def process(self, frame_index, frame):
+        """
+        Kareyi işler. Atlanan karede None, anahtar karede 'track_id' ve izin kararlı etiketini içeren
+        nesne listesi (get_segmentation_masks biçiminde) döndürür.
+        """
+        self.stats['frames'] += 1
+        if not self.is_keyframe(frame_index, frame):
+            self.stats['skipped'] += 1
+            return None
+        self.stats['keyframes'] += 1
+
+        results = generate_masks(frame, self.sam_model, max_side=self.max_side, **self.sam_overrides)
+        objects = deduplicate_objects(prepare_objects(frame, results))
+        with profiling.stage("track_match"):
+            motion = self._update_motion(frame)
+            matches = self._match(objects, motion)
+            pending = []
+            for d, obj in enumerate(objects):
+                track = matches.get(d)
+                if track is None:
+                    track = Track(self._next_id, obj, frame_index)
+                    self._next_id += 1
+                    self.active.append(track)
+                    pending.append((obj, track))
+                    continue
+                track.update(obj, frame_index)
+                shift = (self.camera_position[0] - track.classified_position[0],
+                         self.camera_position[1] - track.classified_position[1])
+                if mask_iou(track.classified_mask, obj['mask'], shift) < self.reclassify_iou:
+                    pending.append((obj, track))
+                else:
+                    self.stats['labels_reused'] += 1
+                obj['track_id'] = track.track_id
+
+        # Yalnızca yeni ve belirgin değişen nesneler sınıflandırılır
+        classify_objects(frame, [obj for obj, _ in pending])
+        for obj, track in pending:
+            track.add_label(obj['label'], self.camera_position)
+            obj['track_id'] = track.track_id
+        self.stats['masks'] += len(objects)
+        self.stats['classified'] += len(pending)
+        profiling.count("video_classified", len(pending))
+
+        by_id = {track.track_id: track for track in self.active}
+        for obj in objects:
+            obj['label'] = by_id[obj['track_id']].label
+        self._expire({obj['track_id'] for obj in objects})
+        return objects
+
+    def _expire(self, seen_ids):
+        """Bu anahtar karede görülmeyen izlerin kaçırma sayısını artırır, süresi dolanları kapatır."""
+        still_active = []
+        for track in self.active:
+            if track.track_id not in seen_ids:
+                track.missed += 1
+            if track.missed > self.max_missed:
+                self.finished.append(track)
+            else:
+                still_active.append(track)
+        self.active = still_active
+
+    def tracks(self):
+        """Kapatılmış ve etkin tüm izler, kimlik sırasıyla."""
+        return sorted(self.finished + self.active, key=lambda track: track.track_id)
+
+    def summary(self):
+        return {
+            'frames': self.stats['frames'],
+            'keyframes': self.stats['keyframes'],
+            'skipped': self.stats['skipped'],
+            'masks': self.stats['masks'],
+            'classified': self.stats['classified'],
+            'labels_reused': self.stats['labels_reused'],
+            'tracks': len(self.finished) + len(self.active),
+        }
+
+
+def segment_video(source, sam_model, stride=1, max_frames=None, max_side=None, **options):
+    """
+    Video ya da görüntü dizisini VideoSegmenter ile baştan sona işler. {'source', 'summary',
+    'tracks'} kaydını döndürür; izler kararlı etiket, oylar ve anahtar kare bbox geçmişini içerir.
+    """
+    segmenter = VideoSegmenter(sam_model, max_side=max_side, **options)
+    for frame_index, _, frame in read_frames(source, stride=stride, max_frames=max_frames):
+        with profiling.image_scope(f"{source}#{frame_index}"):
+            objects = segmenter.process(frame_index, frame)
+        if objects is not None:
+            print(f"Kare {frame_index}: {len(objects)} nesne, {len(segmenter.active)} etkin iz")
+    summary = segmenter.summary()
+    print(f"\n{summary['frames']} kare: {summary['keyframes']} anahtar kare, {summary['skipped']} atlandı; "
+          f"{summary['masks']} maskeden {summary['classified']} sınıflandırıldı, {summary['tracks']} iz.")
+    return {'source': str(source), 'summary': summary,
+            'tracks': [track.to_record() for track in segmenter.tracks()]}
@@ -0,0 +1,193 @@
+# vit_batcher.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import torch
+
+import profiling
+
+# --------------------------------------------------------------------------
+# AYARLAR
+# --------------------------------------------------------------------------
+
+# Tek ileri geçişte işlenecek en fazla kırpıntı sayısı
+DEFAULT_MAX_BATCH_SIZE = 32
+
+# İlk istek geldikten sonra diğer isteklerin kırpıntılarını toplamak için beklenen en uzun süre (ms)
+DEFAULT_MAX_LATENCY_MS = 10
+
+# Kuyrukta bekleyebilecek en fazla kırpıntı sayısı; aşılırsa yeni istekler bekletilir/reddedilir
+DEFAULT_MAX_QUEUE_DEPTH = 256
+
+# Kuyruk doluyken yeni isteğin yer açılmasını bekleyeceği en uzun süre (s)
+DEFAULT_ENQUEUE_TIMEOUT = 5.0
+
+
+class QueueFullError(RuntimeError):
+    """Batcher kuyruğu dolu ve bekleme süresi içinde yer açılmadı (geri basınç)."""
+
+
+class _Request:
+    __slots__ = ('pixel_values', 'future', 'enqueued_at')
+
+    def __init__(self, pixel_values):
+        self.pixel_values = pixel_values
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+# --------------------------------------------------------------------------
+# DİNAMİK BATCH'LEYİCİ
+# --------------------------------------------------------------------------
+
+class DynamicBatcher:
+    """
+    Eşzamanlı isteklerin (N_i, 3, 224, 224) kırpıntı tensörlerini tek bir arka plan thread'inde
+    toplayıp ortak ileri geçişlerde işler. İlk bekleyen istekten itibaren en fazla max_latency_ms
+    beklenir ya da max_batch_size kırpıntıya ulaşılınca hemen çalıştırılır. Her istek kendi
+    satırlarını Future ile alır. Kuyruktaki kırpıntı sayısı max_queue_depth ile sınırlıdır.
+    """
+
+    def __init__(self, forward, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_latency_ms=DEFAULT_MAX_LATENCY_MS,
+                 max_queue_depth=DEFAULT_MAX_QUEUE_DEPTH, enqueue_timeout=DEFAULT_ENQUEUE_TIMEOUT):
+        """forward: (B, 3, H, W) tensörü alıp (B, ...) çıktı tensörü döndüren fonksiyon."""
+        self.forward = forward
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.max_queue_depth = max_queue_depth
+        self.enqueue_timeout = enqueue_timeout
+
+        self._pending = deque()
+        self._pending_crops = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self.requests = 0
+        self.completed = 0
+        self.crops = 0
+        self.batches = 0
+        self.rejected = 0
+        self.errors = 0
+        self.forward_seconds = 0.0
+        self.wait_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="vit-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, pixel_values, timeout=None):
+        """
+        Kırpıntıları kuyruğa ekler ve satırları sırayla içeren çıktıyı verecek Future döndürür.
+        Kuyruk doluysa en fazla timeout (verilmezse enqueue_timeout) saniye bekler; yer açılmazsa
+        QueueFullError fırlatır. Tek başına max_queue_depth'i aşan istekler de reddedilir.
+        """
+        count = pixel_values.shape[0]
+        request = _Request(pixel_values)
+        if count == 0:
+            request.future.set_result(pixel_values.new_empty((0,)))
+            return request.future
+
+        timeout = self.enqueue_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not self._closed and count <= self.max_queue_depth \
+                    and self._pending_crops + count > self.max_queue_depth:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if self._closed:
+                raise RuntimeError("Batcher kapatıldı.")
+            if self._pending_crops + count > self.max_queue_depth:
+                self.rejected += 1
+                raise QueueFullError(f"ViT kuyruğu dolu ({self._pending_crops}/{self.max_queue_depth} kırpıntı).")
+            self._pending.append(request)
+            self._pending_crops += count
+            self.requests += 1
+            self._condition.notify_all()
+        return request.future
+
+    def __call__(self, pixel_values):
+        """submit + sonucu bekleme; ViT modelinin yerine doğrudan çağrılabilir."""
+        return self.submit(pixel_values).result()
+
+    def _take_batch(self):
+        """Gecikme penceresi dolana ya da batch dolana kadar bekleyip işlenecek istekleri kuyruktan alır."""
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if not self._pending:
+                return []
+            deadline = self._pending[0].enqueued_at + self.max_latency
+            while self._pending_crops < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            # Bir istek bölünmez; batch en az bir istek içerir
+            batch = [self._pending.popleft()]
+            size = batch[0].pixel_values.shape[0]
+            while self._pending and size + self._pending[0].pixel_values.shape[0] <= self.max_batch_size:
+                request = self._pending.popleft()
+                size += request.pixel_values.shape[0]
+                batch.append(request)
+            self._pending_crops -= size
+            # Kuyrukta yer açıldı; bekleyen submit çağrıları uyandırılır
+            self._condition.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            started = time.perf_counter()
+            try:
+                with profiling.stage("vit_batch"):
+                    pixel_values = torch.cat([request.pixel_values for request in batch])
+                    # Tek başına büyük istekler max_batch_size'lık parçalar halinde çalıştırılır
+                    outputs = torch.cat([self.forward(pixel_values[i:i + self.max_batch_size])
+                                         for i in range(0, pixel_values.shape[0], self.max_batch_size)])
+            except Exception as e:
+                self.errors += 1
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            finally:
+                self.forward_seconds += time.perf_counter() - started
+
+            offset = 0
+            for request in batch:
+                count = request.pixel_values.shape[0]
+                self.wait_seconds += started - request.enqueued_at
+                request.future.set_result(outputs[offset:offset + count])
+                offset += count
+            self.batches += -(-offset // self.max_batch_size)
+            self.completed += len(batch)
+            self.crops += offset
+
+    def close(self):
+        """Kuyruktaki istekleri işledikten sonra thread'i durdurur."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def stats(self):
+        """Batch, kırpıntı, red sayılarını ve ortalama batch boyutu / bekleme süresini döndürür."""
+        with self._condition:
+            queue_depth = self._pending_crops
+        return {
+            'requests': self.requests,
+            'crops': self.crops,
+            'batches': self.batches,
+            'mean_batch_size': round(self.crops / self.batches, 2) if self.batches else None,
+            'queue_depth': queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'forward_s': round(self.forward_seconds, 3),
+            'mean_wait_ms': round(self.wait_seconds / self.completed * 1000, 2) if self.completed else None,
+        }